@@ -1,11 +1,75 @@
 import logging
+import os
+import tempfile
 import time
 from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
 
+from program_scheduling.list_scheduler import ListScheduler
 from program_scheduling.network_schedule import NetworkSchedule
 from program_scheduling.node_schedule import NodeSchedule
+from program_scheduling.schedule_catalog import ScheduleCatalog
 from setup_logging import setup_logging
 
+
+def init_worker(loglevel):
+    # with the spawn start method, worker processes do not inherit the logging configuration
+    if len(logging.getLogger("program_scheduling").handlers) == 0:
+        setup_logging(loglevel)
+
+
+def create_node_schedules(dataset_id, n_sessions, ns_id, length_factor, options):
+    """
+    Creates the node schedules of Alice and Bob for one network schedule, one after another or (in joint mode) by a
+    single solve. Every call runs in its own temporary working directory, so the files written (and cleaned up) by
+    the solver do not clash with those of concurrent calls. The node schedules and success metrics are returned
+    instead of saved, so the caller can merge them in a fixed order (and is the only process writing to the schedule
+    catalog).
+
+    :param options: Keyword arguments passed on to `NodeSchedule` (e.g. the schedule type)
+
+    :return: Tuple of the dataset ID, the (name, array) tuples of the created node schedules, their success metrics
+        and incumbents and the time taken
+    """
+    logger = logging.getLogger("program_scheduling")
+    start = time.time()
+    cwd = os.getcwd()
+    catalog = ScheduleCatalog()
+    schedules = []
+    metrics = []
+    incumbents = []
+    with tempfile.TemporaryDirectory(prefix="node-schedule_") as working_dir:
+        os.chdir(working_dir)
+        try:
+            for role in ["alice", "bob"]:
+                if options.get("joint") and role == "bob":
+                    # the node schedule of bob was created together with the one of alice
+                    node_schedule = node_schedule.peer
+                else:
+                    node_schedule = NodeSchedule(dataset_id=dataset_id, n_sessions=n_sessions, ns_id=ns_id,
+                                                 role=role, ns_length_factor=length_factor, save_schedule=False,
+                                                 save_metrics=False, catalog=catalog, **options)
+                if node_schedule.start_times is not None:
+                    name = NodeSchedule.get_name(dataset_id=dataset_id, n_sessions=n_sessions, ns_id=ns_id,
+                                                 length_factor=node_schedule.length_factor,
+                                                 schedule_type=NodeSchedule.get_label(
+                                                     options["schedule_type"], options.get("joint"),
+                                                     options.get("window_size")),
+                                                 role=role)
+                    schedules.append((name, node_schedule.get_schedule_array()))
+                incumbents += node_schedule.get_incumbent_trajectory()
+                # infeasible node schedules are recorded as well, together with the reason (if known)
+                metrics.append(node_schedule.get_success_metrics())
+                if node_schedule.status not in NodeSchedule.FEASIBLE_STATUSES:
+                    logger.warning(f"Network schedule with id {ns_id} did not result in "
+                                   f"a feasible node schedule for {role}.")
+                    if not options.get("joint"):
+                        break  # we don't need to create a node schedule for bob if there is none for alice
+        finally:
+            os.chdir(cwd)
+    return dataset_id, schedules, metrics, incumbents, time.time() - start
+
+
 if __name__ == '__main__':
     parser = ArgumentParser()
     parser.add_argument('-d', '--dataset-id', required=False, type=int,
@@ -22,6 +86,48 @@ if __name__ == '__main__':
                         help="Use optimal scheduling approach (i.e. use an objective function to minimise makespan).")
     parser.add_argument('--naive', dest="naive", action="store_true",
                         help="Use naive scheduling approach (i.e. schedule all blocks consecutively).")
+    parser.add_argument('--list', dest="list", action="store_true",
+                        help="Use the solver-free list scheduler (i.e. place blocks greedily by a priority rule).")
+    parser.add_argument('--lns', dest="lns", action="store_true",
+                        help="Improve the node schedules of the heuristic approach by a large-neighbourhood search "
+                             "(i.e. repeatedly schedule a few sessions again with an objective function while the "
+                             "others stay fixed).")
+    parser.add_argument('--lns_budget', required=False, default=60, type=int,
+                        help="Time budget in seconds of the large-neighbourhood search of every node schedule.")
+    parser.add_argument('--lns_iterations', required=False, default=100, type=int,
+                        help="Maximum number of iterations of the large-neighbourhood search.")
+    parser.add_argument('--lns_sessions', required=False, default=2, type=int,
+                        help="Number of sessions scheduled again in every iteration of the large-neighbourhood search.")
+    parser.add_argument('--priority_rule', required=False, default="EST", type=str,
+                        choices=ListScheduler.PRIORITY_RULES,
+                        help="Priority rule of the list scheduler: earliest start (EST), most successors (MTS), "
+                             "critical sections first (CSF) or longest remaining path first (LPF).")
+    parser.add_argument('--capacities', required=False, default=None, type=int, nargs=2, metavar=("CPU", "QPU"),
+                        help="Number of CPU cores and QPUs of both nodes (overrides configs/nodes.yml).")
+    parser.add_argument('--qubits', required=False, default=None, type=int,
+                        help="Number of qubits of both nodes (overrides configs/nodes.yml).")
+    parser.add_argument('--joint', dest="joint", action="store_true",
+                        help="Create the node schedules of both nodes in a single model, which aligns their QC blocks "
+                             "and the CC blocks with the blocks sending their messages.")
+    parser.add_argument('--window_size', required=False, default=None, type=int,
+                        help="Schedule the sessions in windows of this many sessions, one window after another in the "
+                             "order of their timeslots (rolling horizon), instead of all sessions in a single model.")
+    parser.add_argument('--decompose', dest="decompose", action="store_true",
+                        help="Schedule independent segments between QC blocks that are pinned to a single timeslot by "
+                             "separate models. The result is the same as that of a single model.")
+    parser.add_argument('--segment_workers', required=False, default=1, type=int,
+                        help="Number of processes scheduling the segments of a decomposed node schedule in parallel.")
+    parser.add_argument('--symmetry_breaking', dest="symmetry_breaking", action="store_true",
+                        help="Add constraints removing equivalent solutions of identical sessions.")
+    parser.add_argument('-t', '--time_limit', required=False, default=None, type=int,
+                        help="Time limit in seconds of every solver call. OPT returns the best schedule found so far "
+                             "and falls back to HEU (and NAIVE) if none was found.")
+    parser.add_argument('--portfolio', dest="portfolio", action="store_true",
+                        help="Race several solver configurations in parallel processes and use the first result.")
+    parser.add_argument('-w', '--workers', required=False, default=1, type=int,
+                        help="Number of processes creating node schedules in parallel.")
+    parser.add_argument('--no-cache', dest="use_cache", action="store_false",
+                        help="Always solve from scratch instead of reusing cached node schedules.")
     parser.add_argument('--log', dest='loglevel', type=str, required=False, default="INFO",
                         help="Set logging level: DEBUG, INFO, WARNING, ERROR, or CRITICAL.")
     args, unknown = parser.parse_known_args()
@@ -36,12 +142,45 @@ if __name__ == '__main__':
         logger.warning("Ignoring the number of NS to create and using existing IDS.")
 
     dataset_ids = range(7) if args.all else [args.dataset_id]
-    schedule_type = "OPT" if args.opt else ("NAIVE" if args.naive else "HEU")
+    schedule_type = "OPT" if args.opt else ("NAIVE" if args.naive else ("LIST" if args.list else
+                                                                      ("LNS" if args.lns else "HEU")))
+    if args.joint and schedule_type == "LIST":
+        raise ValueError("The list scheduler cannot create joint node schedules.")
+    if args.window_size is not None and (args.joint or schedule_type == "LIST"):
+        raise ValueError("Rolling-horizon node schedules can neither be joint nor created by the list scheduler.")
+    if args.decompose and (args.joint or args.window_size is not None):
+        raise ValueError("Decomposed node schedules can neither be joint nor scheduled in windows.")
+    if schedule_type == "LNS" and (args.joint or args.window_size is not None or args.decompose):
+        raise ValueError("Large-neighbourhood search node schedules can neither be joint, scheduled in windows nor "
+                         "decomposed.")
+    options = {
+        "schedule_type": schedule_type,
+        "priority_rule": args.priority_rule,
+        "use_cache": args.use_cache,
+        "symmetry_breaking": args.symmetry_breaking,
+        "time_limit": args.time_limit,
+        "portfolio": args.portfolio,
+        "capacities": args.capacities,
+        "qubits": args.qubits,
+        "joint": args.joint,
+        "window_size": args.window_size,
+        "decompose": args.decompose,
+        "segment_workers": args.segment_workers,
+        "lns_budget": args.lns_budget,
+        "lns_iterations": args.lns_iterations,
+        "lns_sessions": args.lns_sessions,
+    }
+
+    # joint and rolling-horizon node schedules are saved under their own schedule type
+    label = NodeSchedule.get_label(schedule_type, args.joint, args.window_size)
 
     start = time.time()
+    catalog = ScheduleCatalog()
 
+    # network schedules are created up front (their IDs depend on the schedules already in the catalog), the node
+    # schedules based on them are independent jobs
+    jobs = []
     for dataset_id in dataset_ids:
-        d_start = time.time()
         logger.info(f"CREATING SCHEDULES FOR DATASET {dataset_id}:")
         ns_length_factor = {6: 3, 12: 5}.get(args.n_sessions)
 
@@ -50,30 +189,43 @@ if __name__ == '__main__':
             ns_ids = [None]
         elif args.existing_ns:
             logger.info("Using existing network schedules.")
-            ns_ids = NetworkSchedule.get_relevant_ids(dataset_id=dataset_id, n_sessions=args.n_sessions,
-                                                      length_factor=ns_length_factor)
+            ns_ids = catalog.get_ns_ids(dataset_id=dataset_id, n_sessions=args.n_sessions,
+                                        length_factor=ns_length_factor)
         else:
-            ns_ids = []
-            for i in range(args.n_ns):
-                network_schedule = NetworkSchedule(dataset_id=dataset_id, n_sessions=args.n_sessions,
-                                                   length_factor=ns_length_factor)
-                ns_ids.append(network_schedule.id)
+            ns_ids = catalog.add_network_schedules(NetworkSchedule.generate_network_schedules(
+                dataset_id=dataset_id, n_sessions=args.n_sessions, length_factor=ns_length_factor, n=args.n_ns,
+                workers=args.workers, first_id=catalog.get_next_ns_id(dataset_id=dataset_id,
+                                                                      n_sessions=args.n_sessions,
+                                                                      length_factor=ns_length_factor)))
 
         for ns_id in ns_ids:
             length_factor = {6: 3, 12: 5}.get(args.n_sessions) if ns_id is not None else 2
             ns_string = "no network schedule" if ns_id is None else f"network schedule with id {ns_id}"
             logger.info(f"Creating node schedules for dataset {dataset_id} with {args.n_sessions} sessions in "
                         f"{schedule_type} approach based on {ns_string}.")
-            for role in ["alice", "bob"]:
-                node_schedule = NodeSchedule(dataset_id=dataset_id, n_sessions=args.n_sessions, ns_id=ns_id,
-                                             role=role, schedule_type=schedule_type,
-                                             ns_length_factor=length_factor)
-                if node_schedule.status != "SAT":
-                    logger.warning(f"Network schedule with id {ns_id} did not result in "
-                                   f"a feasible node schedule for {role}.")
-                    break  # we don't need to create a node schedule for bob if there is no feasible schedule for alice
+            jobs.append((dataset_id, args.n_sessions, ns_id, length_factor, options))
+
+    # results are merged in the order of the jobs, regardless of the order in which they finish
+    dataset_times = {}
+    if args.workers > 1:
+        logger.info(f"Running {len(jobs)} jobs using {args.workers} processes.")
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                 initargs=(args.loglevel,)) as executor:
+            results = executor.map(create_node_schedules, *zip(*jobs))
+            for dataset_id, schedules, metrics, incumbents, job_time in results:
+                catalog.add(schedules)
+                NodeSchedule.save_metrics(metrics, n_sessions=args.n_sessions, schedule_type=label)
+                NodeSchedule.save_incumbents(incumbents, n_sessions=args.n_sessions, schedule_type=label)
+                dataset_times[dataset_id] = dataset_times.get(dataset_id, 0) + job_time
+    else:
+        for job in jobs:
+            dataset_id, schedules, metrics, incumbents, job_time = create_node_schedules(*job)
+            catalog.add(schedules)
+            NodeSchedule.save_metrics(metrics, n_sessions=args.n_sessions, schedule_type=label)
+            NodeSchedule.save_incumbents(incumbents, n_sessions=args.n_sessions, schedule_type=label)
+            dataset_times[dataset_id] = dataset_times.get(dataset_id, 0) + job_time
 
-        d_end = time.time()
-        logger.info(f"Time taken to finish: {round(d_end - d_start, 4)} seconds for dataset {dataset_id}.\n")
+    for dataset_id, dataset_time in dataset_times.items():
+        logger.info(f"Time taken to create node schedules: {round(dataset_time, 4)} seconds for dataset {dataset_id}.")
     end = time.time()
     logger.info("Time taken to finish: %.4f seconds" % (end - start))
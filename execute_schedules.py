@@ -9,6 +9,7 @@ from typing import Dict, List
 import netsquid as ns
 import numpy as np
 import pandas as pd
+import yaml
 from netsquid.qubits import ketstates
 from qoala.lang.ehi import UnitModule
 from qoala.lang.parse import QoalaParser
@@ -20,8 +21,11 @@ from qoala.runtime.program import BatchInfo, BatchResult, ProgramInput
 from qoala.runtime.schedule import TaskSchedule, TaskScheduleEntry
 from qoala.sim.build import build_network
 
+from program_scheduling.activity_metadata import ActiveSet
 from program_scheduling.datasets import create_dataset
+from program_scheduling.node_metadata import NodeMetadata
 from program_scheduling.node_schedule import NodeSchedule
+from program_scheduling.schedule_catalog import ScheduleCatalog
 from setup_logging import setup_logging
 
 HOST_INSTR_TIME = 100_000
@@ -36,10 +40,28 @@ def create_network_info(names: List[str]) -> NetworkInfo:
     return env
 
 
-def create_procnode_cfg(name: str, id: int, num_qubits: int, perfect_params=False) -> ProcNodeConfig:
+def create_procnode_cfg(name: str, id: int, num_qubits=None, perfect_params=False, capacities=None) -> ProcNodeConfig:
+    """
+    :param num_qubits: Number of qubits of the node, defaults to the qubits in the node configuration (or 2 if it does
+        not limit them)
+    :param capacities: Capacity of [CPU, QPU] of the node, defaults to the capacities in the node configuration
+    """
+    node = NodeMetadata(name)
+    capacities = capacities if capacities is not None else node.capacities
+    if num_qubits is None:
+        num_qubits = node.qubits if node.qubits is not None else 2
+    if capacities[0] > 1:
+        logger.warning(f"The host of {name} is simulated as a single processor instead of {capacities[0]} CPU cores.")
+    if capacities[1] > 1:
+        logger.warning(f"The qubits of {name} are simulated as a single QPU instead of {capacities[1]} QPUs.")
     if perfect_params:
         topology = TopologyConfig.perfect_config_uniform_default_params(num_qubits)
     else:
+        with open("configs/qoala_topology_config.yaml", "r") as file_handle:
+            n_topology_qubits = len(yaml.load(file_handle, yaml.SafeLoader)["qubits"])
+        if n_topology_qubits != num_qubits:
+            logger.warning(f"The topology configuration defines {n_topology_qubits} qubits, but {name} should have "
+                           f"{num_qubits} qubits.")
         topology = TopologyConfig.from_file("configs/qoala_topology_config.yaml")
     return ProcNodeConfig(
         node_name=name,
@@ -73,17 +95,26 @@ def create_batch(
     )
 
 
-def create_task_schedule(tasks, node_schedule_config):
+def create_task_schedule(tasks, node_schedule, predecessors=None):
     """
     To fix the length of QC blocks, this method can in the future also take in network schedule (or have the relevant
     information in the node schedule) and return the changed tasks as well.
+
+    :param node_schedule: DataFrame with the node schedule, as returned by `ScheduleCatalog.get_node_schedule`
+    :param predecessors: Optional list with the blocks every block depends on (see `ActiveSet.get_predecessors`). If
+        given, a task waits for the predecessor on the other processor that finishes last. Otherwise, the predecessor
+        is guessed as the only task that finishes when the task starts.
     """
-    node_schedule = pd.read_csv(node_schedule_config)
 
     end_times = [node_schedule["start_time"][i] + node_schedule["duration"][i] for i in range(len(node_schedule["index"]))]
     temp = []
     for i in range(len(node_schedule["index"])):
-        if end_times.count(node_schedule["start_time"][i]) == 1:
+        if predecessors is not None:
+            # blocks on the same processor are executed in the order of their start times anyway
+            other = [p for p in predecessors[i] if node_schedule["type"][p][0] != node_schedule["type"][i][0]]
+            prev_index = max(other, key=lambda p: end_times[p]) if len(other) > 0 else None
+            temp.append((node_schedule["start_time"][i], node_schedule["index"][i], prev_index))
+        elif end_times.count(node_schedule["start_time"][i]) == 1:
             prev_index = end_times.index(node_schedule["start_time"][i])
             if node_schedule["type"][i][0] != node_schedule["type"][prev_index][0]:
                 temp.append((node_schedule["start_time"][i], node_schedule["index"][i], prev_index))
@@ -117,7 +148,7 @@ def create_network_cfg(alice_cfg, bob_cfg):
     return ProcNodeNetworkConfig(nodes=[alice_cfg, bob_cfg], links=links)
 
 
-def execute_node_schedule(dataset, node_schedule_name, seed=0, perfect_params=False):
+def execute_node_schedule(dataset, node_schedule_name, catalog, seed=0, perfect_params=False):
     logger.debug(f"Executing {node_schedule_name}")
     ns.sim_reset()
     ns.set_qstate_formalism(ns.qubits.qformalism.QFormalism.DM)
@@ -126,8 +157,8 @@ def execute_node_schedule(dataset, node_schedule_name, seed=0, perfect_params=Fa
     alice_id = network_info.get_node_id("alice")
     bob_id = network_info.get_node_id("bob")
 
-    alice_node_cfg = create_procnode_cfg("alice", alice_id, num_qubits=2, perfect_params=perfect_params)
-    bob_node_cfg = create_procnode_cfg("bob", bob_id, num_qubits=2, perfect_params=perfect_params)
+    alice_node_cfg = create_procnode_cfg("alice", alice_id, perfect_params=perfect_params)
+    bob_node_cfg = create_procnode_cfg("bob", bob_id, perfect_params=perfect_params)
 
     if perfect_params:
         network_cfg = ProcNodeNetworkConfig.from_nodes_perfect_links(
@@ -168,7 +199,8 @@ def execute_node_schedule(dataset, node_schedule_name, seed=0, perfect_params=Fa
     alice_procnode.initialize_processes()
     alice_tasks = alice_procnode.scheduler.get_tasks_to_schedule()
 
-    alice_schedule = create_task_schedule(alice_tasks, "node_schedules/" + node_schedule_name + "-alice.csv")
+    alice_schedule = create_task_schedule(alice_tasks, catalog.get_node_schedule(node_schedule_name + "-alice"),
+                                          ActiveSet.create_active_set(dataset, "alice", None).get_predecessors())
     alice_procnode.scheduler.upload_schedule(alice_schedule)
 
     for (path, num_iterations) in dataset.items():
@@ -195,7 +227,8 @@ def execute_node_schedule(dataset, node_schedule_name, seed=0, perfect_params=Fa
     bob_procnode.initialize_processes()
     bob_tasks = bob_procnode.scheduler.get_tasks_to_schedule()
 
-    bob_schedule = create_task_schedule(bob_tasks, "node_schedules/" + node_schedule_name + "-bob.csv")
+    bob_schedule = create_task_schedule(bob_tasks, catalog.get_node_schedule(node_schedule_name + "-bob"),
+                                        ActiveSet.create_active_set(dataset, "bob", None).get_predecessors())
     bob_procnode.scheduler.upload_schedule(bob_schedule)
 
     network.start()
@@ -218,12 +251,10 @@ class NodeScheduleResult:
 def save_success_metrics(node_schedule_name, success_metrics, schedule_type, n_qoala_runs, risk_aware):
     # there will be a saved file for each combination of dataset, number of sessions, and session type
     # node schedule name is e.g. node-schedule_sessions-6_dataset-0_schedule-HEU_length-3_NS-75_role
-    parts = node_schedule_name.split("_")
-    n_sessions = int(parts[1].split("-")[1])
-    dataset_id = int(parts[2].split("-")[1])
-    assert schedule_type == parts[3].split("-")[1]
-    length_factor = int(parts[4].split("-")[1])
-    ns_id = parts[5].split("-")[1]
+    n_sessions, dataset_id, name_schedule_type, length_factor, ns_id, _ = \
+        ScheduleCatalog.NODE_SCHEDULE_PATTERN.match(node_schedule_name + "-alice").groups()
+    n_sessions, dataset_id, length_factor = int(n_sessions), int(dataset_id), int(length_factor)
+    assert schedule_type == name_schedule_type
 
     filename = f"qoala-results-node-schedule_sessions-{n_sessions}_dataset-{dataset_id}_schedule-{schedule_type}"
 
@@ -248,19 +279,18 @@ def save_success_metrics(node_schedule_name, success_metrics, schedule_type, n_q
         df.to_csv(f"results/{filename}.csv", index=False)
 
 
-def evaluate_node_schedule(node_schedule_name, perfect_params):
+def evaluate_node_schedule(node_schedule_name, catalog, perfect_params):
     # node_schedule_name is `node-schedule_sessions-6_dataset-1_schedule-HEU_length-3_NS-1_role`
-    parts = node_schedule_name.split("_")
-    dataset_id = int(parts[2].split("-")[1])
-    n_sessions = int(parts[1].split("-")[1])
-    dataset = create_dataset(dataset_id=dataset_id, n_sessions=n_sessions)
+    n_sessions, dataset_id, _, _, ns_id, _ = \
+        ScheduleCatalog.NODE_SCHEDULE_PATTERN.match(node_schedule_name + "-alice").groups()
+    dataset = create_dataset(dataset_id=int(dataset_id), n_sessions=int(n_sessions))
 
-    if parts[5].split("-")[1] == "None":
+    if ns_id == "None":
         seed = 0
     else:
-        seed = int(parts[5].split("-")[1])
-    result = execute_node_schedule(dataset=dataset, node_schedule_name=node_schedule_name, seed=seed,
-                                   perfect_params=perfect_params)
+        seed = int(ns_id)
+    result = execute_node_schedule(dataset=dataset, node_schedule_name=node_schedule_name, catalog=catalog,
+                                   seed=seed, perfect_params=perfect_params)
 
     if result is None:
         # execution of the node schedule failed (TODO: why does this happen?)
@@ -343,8 +373,16 @@ if __name__ == "__main__":
                         help="The schedules to be executed were created without network schedule constraints.")
     parser.add_argument('--opt', dest="opt", action="store_true",
                         help="The schedules to be executed were scheduled in an optimal fashion.")
+    parser.add_argument('--lns', dest="lns", action="store_true",
+                        help="The schedules to be executed were improved by a large-neighbourhood search.")
     parser.add_argument('--naive', dest="naive", action="store_true",
                         help="The schedules to be executed were scheduled in a naive fashion.")
+    parser.add_argument('--list', dest="list", action="store_true",
+                        help="The schedules to be executed were created by the list scheduler.")
+    parser.add_argument('--joint', dest="joint", action="store_true",
+                        help="The schedules to be executed were created jointly for both nodes.")
+    parser.add_argument('--window_size', required=False, default=None, type=int,
+                        help="The schedules to be executed were created in windows of this many sessions.")
     parser.add_argument('--risk_aware', dest="risk_aware", action="store_true",
                         help="Use a risk-aware extension of Qoala execution.")
     parser.add_argument('--perfect_params', dest="perfect_params", action="store_true",
@@ -360,13 +398,17 @@ if __name__ == "__main__":
         raise ValueError("No dataset ID was specified and the `--all` flag is not set.")
 
     dataset_ids = range(7) if args.all else [args.dataset_id]
-    schedule_type = "OPT" if args.opt else ("NAIVE" if args.naive else "HEU")
+    schedule_type = NodeSchedule.get_label(
+        "OPT" if args.opt else ("NAIVE" if args.naive else ("LIST" if args.list else ("LNS" if args.lns else "HEU"))),
+        args.joint, args.window_size)
 
     start = time.time()
+    catalog = ScheduleCatalog()
     for dataset_id in dataset_ids:
         logger.info(f"EXECUTING NODE SCHEDULES FOR DATASET {dataset_id}")
         for node_schedule_name in NodeSchedule.get_relevant_node_schedule_names(dataset_id, args.n_sessions,
-                                                                                schedule_type=schedule_type):
+                                                                                schedule_type=schedule_type,
+                                                                                catalog=catalog):
             logger.debug(f"Executing node schedule {node_schedule_name}")
             if args.no_ns and "NS-None" not in node_schedule_name:
                 continue
@@ -375,7 +417,7 @@ if __name__ == "__main__":
 
             success_metrics = {}
             for _ in range(args.n_qoala_runs):
-                sm = evaluate_node_schedule(node_schedule_name=node_schedule_name,
+                sm = evaluate_node_schedule(node_schedule_name=node_schedule_name, catalog=catalog,
                                             perfect_params=args.perfect_params)
                 for (k, v) in sm.items():
                     success_metrics.update({k: success_metrics.get(k, []) + [v]})
@@ -427,6 +427,50 @@ def plot_compare_success_metric_for_ns_and_no_ns(n_sessions, success_metric, sav
         plt.show()
 
 
+def plot_lns_makespan(n_sessions, save_fig=True):
+    static = read_in_data("static")
+
+    filtered = static[static.schedule_type.isin(["HEU", "LNS", "OPT"])]
+    filtered = filtered[(filtered.n_sessions == n_sessions) & filtered.ns_id.notnull()]
+    filtered["makespan"] = filtered["makespan"] / 1e9
+
+    plt.figure(figsize=(12, 6))
+    ax = sns.barplot(x="dataset_id", y="makespan", data=filtered, hue="schedule_type", hue_order=["HEU", "LNS", "OPT"],
+                     capsize=0.1, errwidth=1, errcolor="black", errorbar="sd")
+
+    plt.legend(title="Schedule type", loc="upper left")
+    ax.set_xticklabels(["BQC", "PP", "QKD", "BQC\n\& PP", "BQC\n\& QKD", "PP\n\& QKD", "BQC \& PP\n\& QKD"])
+    plt.xlabel("Dataset")
+    plt.ylabel("Makespan (s)")
+    plt.tight_layout()
+
+    if save_fig:
+        plt.savefig(f"plots/lns_makespan_sessions-{n_sessions}.png")
+    else:
+        plt.show()
+
+
+def plot_lns_trajectory(n_sessions, dataset_id, save_fig=True):
+    # the first incumbent of every node schedule is the HEU node schedule the search started from
+    data = read_in_data(f"incumbents-node-schedule_sessions-{n_sessions}_schedule-LNS")
+    filtered = data[data.dataset_id == dataset_id]
+
+    plt.figure(figsize=(12, 6))
+    for _, trajectory in filtered.groupby(["ns_id", "role"], dropna=False):
+        trajectory = trajectory.sort_values("time")
+        plt.step(trajectory["time"], trajectory["makespan"] / trajectory["makespan"].iloc[0], where="post",
+                 alpha=0.6)
+
+    plt.xlabel("Time (s)")
+    plt.ylabel("Makespan relative to HEU")
+    plt.tight_layout()
+
+    if save_fig:
+        plt.savefig(f"plots/lns_trajectory_sessions-{n_sessions}_dataset-{dataset_id}.png")
+    else:
+        plt.show()
+
+
 if __name__ == '__main__':
     set_up_seaborn()
 
@@ -449,3 +493,8 @@ if __name__ == '__main__':
     plot_success_probability_all_datasets_no_ns(n_sessions=12)
     plot_compare_success_metric_for_ns_and_no_ns(12, "success_probability")
     plot_compare_success_metric_for_ns_and_no_ns(12, "makespan")
+
+    # Plots for the large-neighbourhood search improving HEU node schedules
+    plot_lns_makespan(n_sessions=6)
+    plot_lns_makespan(n_sessions=12)
+    plot_lns_trajectory(n_sessions=12, dataset_id=6)
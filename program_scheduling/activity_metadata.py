@@ -1,9 +1,9 @@
 import logging
 import sys
 
+import numpy as np
+
 from program_scheduling.session_metadata import SessionMetadata, BlockMetadata
-from math import gcd, floor
-from functools import reduce
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +19,7 @@ class ActivityMetadata:
         self.cs_ids = [b.CS for b in session_metadata.blocks]
         self.types = [b.type for b in session_metadata.blocks]
 
-        self.successors = [[i + 1] for i in range(self.n_blocks - 1)]
-        self.successors.append([])
+        self.successors = self._calculate_successors(session_metadata)
 
         self.resource_reqs = [self._calculate_resource_reqs(b) for b in session_metadata.blocks]
 
@@ -28,6 +27,8 @@ class ActivityMetadata:
         self._update_qc_blocks_based_on_network_schedule(network_schedule)
         self.d_max = self._calculate_time_lags(session_metadata)
         self.qc_indices = self._calculate_qc_indices(session_metadata)
+        self.qubits = self._calculate_qubits(session_metadata)
+        self.senders = [b.sender for b in session_metadata.blocks]
 
     @staticmethod
     def _calculate_resource_reqs(block_metadata: BlockMetadata):
@@ -36,7 +37,21 @@ class ActivityMetadata:
         quantum = block_metadata.type[0] == "Q"
         # sanity check that block is either fully classical or fully quantum
         assert (classical and not quantum) or (not classical and quantum)
-        return [int(classical), int(quantum)]
+        return [block_metadata.demand * int(classical), block_metadata.demand * int(quantum)]
+
+    @staticmethod
+    def _calculate_successors(session_metadata: SessionMetadata):
+        """
+        Every block depends on the blocks listed as its predecessors or, if there is no such list, on the block before
+        it (so by default the blocks of a session form a chain).
+        """
+        names = [b.name for b in session_metadata.blocks]
+        successors = [[] for _ in session_metadata.blocks]
+        for j, block in enumerate(session_metadata.blocks):
+            predecessors = block.predecessors if block.predecessors is not None else names[max(j - 1, 0):j]
+            for name in predecessors:
+                successors[names.index(name)].append(j)
+        return successors
 
     @staticmethod
     def _calculate_qc_indices(session_metadata: SessionMetadata):
@@ -50,6 +65,24 @@ class ActivityMetadata:
                 last_index += 1
         return qc_indices
 
+    @staticmethod
+    def _calculate_qubits(session_metadata: SessionMetadata):
+        """
+        Number of qubits the session holds after every block. Unless a block defines it, a QC block adds the qubit of
+        one EPR pair, a QL block measures all qubits and classical blocks do not change the qubits.
+        """
+        qubits = []
+        held = 0
+        for b in session_metadata.blocks:
+            if b.qubits is not None:
+                held = b.qubits
+            elif b.type == "QC":
+                held += 1
+            elif b.type == "QL":
+                held = 0
+            qubits.append(held)
+        return qubits
+
     def _update_qc_blocks_based_on_network_schedule(self, network_schedule):
         """
         In the future, each session might have a different QC block length.
@@ -92,19 +125,39 @@ class ActivityMetadata:
 
 
 class ActiveSet:
+    # block types are stored by their index in this list
+    TYPES = ["CL", "CC", "QL", "QC"]
 
     def __init__(self):
+        """
+        Blocks of all sessions that should be scheduled. The blocks are stored column-wise in NumPy arrays, where block
+        types, critical sections and block names are integer codes. The attributes with one list entry per block
+        (e.g. `types` or `d_max`) are read-only views of these arrays, which are only created when they are used.
+        """
         self.n_blocks = 0
-        self.ids = []
+        self.id_array = np.zeros(0, dtype=np.int64)
+        self.type_codes = np.zeros(0, dtype=np.int8)
+        self.cs_codes = np.zeros(0, dtype=np.int64)  # index in `cs_values`, or -1 outside of a critical section
+        self.qc_codes = np.zeros(0, dtype=np.int64)  # QC index within the session, or -1 if it is not a QC block
+        self.name_codes = np.zeros(0, dtype=np.int64)  # index in `name_values`
+        self.duration_array = np.zeros(0, dtype=np.int64)
+        self.d_max_array = np.zeros(0, dtype=np.int64)
+        self.has_d_max = np.zeros(0, dtype=bool)  # False if there is no maximum time lag
+        self.resource_req_array = np.zeros((0, 2), dtype=np.int64)
+        self.qubit_array = np.zeros(0, dtype=np.int64)  # number of qubits the session holds after the block
+        # index in `name_values` of the block of the other node sending the message the block receives, or -1
+        self.sender_codes = np.zeros(0, dtype=np.int64)
         self.successors = []
-        self.resource_reqs = []
-        self.types = []
-        self.durations = []
-        self.d_max = []
-        self.block_names = []
+        self.cs_values = []
+        self.name_values = []
+        # first and last (exclusive) block of every session
+        self.session_ranges = {}
+        # time unit of the scaled durations, None means that it is the greatest common divisor of the durations
         self.gcd = None
-        self.qc_indices = []
-        self.cs_ids = []
+        # index of the last block of all sessions, which is not kept out of critical sections (None if the active set
+        # is a selection of blocks without it)
+        self.last_block = None
+        self._views = {}
 
     # TODO: something like this is needed for the test but do it in a pythonic way (kwargs)
     # def __init__(self, n_blocks, ids, succ, reqs, types, durations, d_min, d_max, block_names, gcd):
@@ -121,40 +174,301 @@ class ActiveSet:
 
     @staticmethod
     def create_active_set(dataset, role, network_schedule):
+        """
+        Creates the active set in one pass: every configuration is turned into activity metadata once, which is
+        then repeated for all its sessions.
+        """
         active = ActiveSet()
         logger.debug(f"Your active set now has the following sessions:")
         last_session_id = 0
         for (config_file, number) in dataset.items():
             ids = list(range(last_session_id, last_session_id + number))
             logger.debug(f"\t{number} sessions of {config_file}_{role} with IDs {ids}")
-            for id in ids:
-                session_metadata = SessionMetadata(yaml_file=config_file + f"_{role}.yml", session_id=id)
-                active._merge_activity_metadata(ActivityMetadata(session_metadata, network_schedule))
+            if number > 0:
+                session_metadata = SessionMetadata(yaml_file=config_file + f"_{role}.yml", session_id=ids[0])
+                active._append_sessions(ActivityMetadata(session_metadata, network_schedule), ids)
             last_session_id += number
         return active
 
+    def _view(self, name, create):
+        if name not in self._views:
+            self._views[name] = create()
+        return self._views[name]
+
+    @property
+    def ids(self):
+        return self._view("ids", lambda: self.id_array.tolist())
+
+    @property
+    def types(self):
+        return self._view("types", lambda: [self.TYPES[c] for c in self.type_codes.tolist()])
+
+    @property
+    def cs_ids(self):
+        return self._view("cs_ids", lambda: [self.cs_values[c] if c >= 0 else None for c in self.cs_codes.tolist()])
+
+    @property
+    def qc_indices(self):
+        return self._view("qc_indices", lambda: [c if c >= 0 else None for c in self.qc_codes.tolist()])
+
+    @property
+    def block_names(self):
+        return self._view("block_names", lambda: [self.name_values[c] for c in self.name_codes.tolist()])
+
+    @property
+    def durations(self):
+        return self._view("durations", lambda: self.duration_array.tolist())
+
+    @property
+    def d_max(self):
+        return self._view("d_max", lambda: [d if has else None for d, has in
+                                            zip(self.d_max_array.tolist(), self.has_d_max.tolist())])
+
+    @property
+    def resource_reqs(self):
+        return self._view("resource_reqs", lambda: self.resource_req_array.tolist())
+
+    @property
+    def qubits(self):
+        return self._view("qubits", lambda: self.qubit_array.tolist())
+
+    def get_session_blocks(self, session_id):
+        if session_id not in self.session_ranges:
+            return []
+        return list(range(*self.session_ranges[session_id]))
+
+    def get_predecessors(self):
+        """
+        :return: For every block, the list of blocks it depends on
+        """
+        predecessors = [[] for _ in range(self.n_blocks)]
+        for i, successors in enumerate(self.successors):
+            for j in successors:
+                predecessors[j].append(i)
+        return predecessors
+
+    def get_qubit_intervals(self):
+        """
+        Splits the qubits held by every session into intervals in which a fixed number of qubits is held: from the
+        start of the block that takes the qubits until the end of the block that releases them. Qubits are released
+        in the reverse order in which they are taken, and the qubits that are still held after the last block of a
+        session are released with it.
+
+        :return: List of (first block, last block, number of qubits) tuples
+        """
+        intervals = []
+        for session_id, (first, end) in self.session_ranges.items():
+            taken = []  # stack of (block, number of qubits)
+            held = 0
+            for i, qubits in enumerate(self.qubit_array[first:end].tolist(), start=first):
+                if qubits > held:
+                    taken.append((i, qubits - held))
+                while qubits < held:
+                    block, n = taken.pop()
+                    released = min(n, held - qubits)
+                    intervals.append((block, i, released))
+                    if released < n:
+                        taken.append((block, n - released))
+                    held -= released
+                held = qubits
+            intervals += [(block, end - 1, n) for block, n in reversed(taken)]
+        return intervals
+
+    def get_qc_pairs(self, peer):
+        """
+        :param peer: Active set of the other node with the same sessions
+        :return: List of (block, block of the peer) tuples of the QC blocks in which both nodes generate entanglement
+            together, i.e. the QC blocks with the same QC index in the same session
+        """
+        pairs = []
+        peer_blocks = {(session_id, qc_index): i for i, (session_id, qc_index) in
+                       enumerate(zip(peer.id_array.tolist(), peer.qc_codes.tolist())) if qc_index >= 0}
+        for i in np.flatnonzero(self.qc_codes >= 0).tolist():
+            key = (self.ids[i], self.qc_indices[i])
+            if key not in peer_blocks:
+                raise ValueError(f"QC block {self.block_names[i]} of session {key[0]} has no counterpart on the "
+                                 f"other node")
+            pairs.append((i, peer_blocks.pop(key)))
+        if len(peer_blocks) > 0:
+            raise ValueError(f"QC blocks of sessions {sorted({s for (s, _) in peer_blocks})} of the other node have "
+                             f"no counterpart")
+        return pairs
+
+    def get_messages(self, peer):
+        """
+        :param peer: Active set of the other node with the same sessions
+        :return: List of (block of the peer, block) tuples, where the block receives a message sent by the block of the
+            peer
+        """
+        messages = []
+        for j in np.flatnonzero(self.sender_codes >= 0).tolist():
+            sender = self.name_values[self.sender_codes[j]]
+            blocks = [i for i in peer.get_session_blocks(self.ids[j]) if peer.block_names[i] == sender]
+            if len(blocks) == 0:
+                raise ValueError(f"Sender {sender} of block {self.block_names[j]} of session {self.ids[j]} is not "
+                                 f"defined on the other node")
+            messages.append((blocks[0], j))
+        return messages
+
+    def get_cs_spans(self):
+        """
+        :return: Dictionary from every (session ID, critical section ID) to the indices of its first and last block
+        """
+        in_cs = np.flatnonzero(self.cs_codes >= 0)
+        if len(in_cs) == 0:
+            return {}
+        # blocks of a critical section are consecutive, so a span ends where the next one starts
+        keys = self.id_array[in_cs] * (len(self.cs_values) + 1) + self.cs_codes[in_cs]
+        order = np.argsort(keys, kind="stable")
+        boundaries = np.flatnonzero(np.diff(keys[order])) + 1
+        firsts = in_cs[order[np.concatenate(([0], boundaries))]]
+        lasts = in_cs[order[np.concatenate((boundaries, [len(order)])) - 1]]
+        return {(session_id, self.cs_values[cs_code]): (first, last) for session_id, cs_code, first, last in
+                zip(self.id_array[firsts].tolist(), self.cs_codes[firsts].tolist(), firsts.tolist(), lasts.tolist())}
+
+    def get_interchangeable_sessions(self):
+        """
+        Groups sessions that are identical copies of each other (e.g. created from the same configuration file),
+        such that swapping all their blocks results in the same scheduling problem.
+
+        :return: List of groups (lists of session IDs in order of appearance) with at least two sessions
+        """
+        groups = {}
+        for session_id in dict.fromkeys(self.ids):
+            blocks = self.get_session_blocks(session_id)
+            first = blocks[0]
+            signature = (
+                tuple(self.block_names[i] for i in blocks),
+                tuple(self.types[i] for i in blocks),
+                tuple(self.durations[i] for i in blocks),
+                tuple(self.d_max[i] for i in blocks),
+                tuple(self.cs_ids[i] for i in blocks),
+                tuple(self.qc_indices[i] for i in blocks),
+                tuple(tuple(r) for r in (self.resource_reqs[i] for i in blocks)),
+                tuple(self.qubits[i] for i in blocks),
+                tuple(tuple(j - first for j in self.successors[i]) for i in blocks),
+            )
+            groups.setdefault(signature, []).append(session_id)
+        return [group for group in groups.values() if len(group) > 1]
+
     def get_gcd(self):
-        return reduce(gcd, self.durations)
+        if self.gcd is not None:
+            return self.gcd
+        return int(np.gcd.reduce(self.duration_array))
 
-    def scale_down(self):
+    def select_sessions(self, session_ids):
+        """
+        :param session_ids: IDs of the sessions to keep
+        :return: Active set with only the blocks of these sessions (in the order of their IDs)
+        """
+        return self.select_blocks([i for session_id in sorted(session_ids)
+                                   for i in self.get_session_blocks(session_id)])
+
+    def select_blocks(self, blocks):
+        """
+        The selected blocks keep their maximum time lags, which (as in the model) apply to the block before them in the
+        selection.
+
+        :param blocks: Indices of the blocks to keep, where the blocks of every session are consecutive
+        :return: Active set with only these blocks (in the given order), which keeps the time unit of this active set,
+            so scaled start times of both active sets can be compared
+        """
+        blocks = np.array(blocks, dtype=np.int64)
+        new_index = {i: k for k, i in enumerate(blocks.tolist())}
+
+        active = ActiveSet()
+        active.n_blocks = len(blocks)
+        for name in ["id_array", "type_codes", "cs_codes", "qc_codes", "name_codes", "duration_array", "d_max_array",
+                     "has_d_max", "resource_req_array", "qubit_array", "sender_codes"]:
+            setattr(active, name, getattr(self, name)[blocks])
+        active.successors = [[new_index[j] for j in self.successors[i] if j in new_index] for i in blocks.tolist()]
+        active.cs_values = list(self.cs_values)
+        active.name_values = list(self.name_values)
+        for k, session_id in enumerate(active.ids):
+            first = active.session_ranges.get(session_id, (k, k))[0]
+            active.session_ranges[session_id] = (first, k + 1)
+        active.gcd = self.get_gcd()
+        active.last_block = new_index.get(self.last_block)
+        return active
+
+    def add_session(self, other: ActivityMetadata):
+        """
+        :param other: Activity metadata of a session that is not part of this active set
+        :return: Active set with the blocks of this active set followed by those of the session, whose time unit
+            divides the one of this active set, so start times of this active set are multiples of it
+        """
+        if other.session_id in self.session_ranges:
+            raise ValueError(f"Session {other.session_id} is already part of the active set.")
+        active = self.select_blocks(range(self.n_blocks))
+        active.gcd = int(np.gcd.reduce(np.array(other.durations + [self.get_gcd()], dtype=np.int64)))
+        active._merge_activity_metadata(other)
+        return active
+
+    def scale_down_arrays(self):
+        """
+        :return: Tuple of the scaled durations, the scaled maximum time lags (rounded down) and whether a block has
+            a maximum time lag, as arrays
+        """
         gcd = self.get_gcd()
-        scaled_durations = [int(d / gcd) for d in self.durations]
+        return self.duration_array // gcd, self.d_max_array // gcd, self.has_d_max
+
+    def scale_down(self):
+        scaled_durations, scaled_d_max, has_d_max = self.scale_down_arrays()
         # these might not be integers but as long as d_max is rounded up, it should be fine
-        scaled_d_max = [floor(d / gcd) if d is not None else None for d in self.d_max]
-        return scaled_durations, scaled_d_max
+        return scaled_durations.tolist(), [d if has else None for d, has in zip(scaled_d_max.tolist(),
+                                                                                has_d_max.tolist())]
+
+    @staticmethod
+    def _encode(values, known):
+        """
+        :return: Index of every value in `known` (which is extended with unseen values), or -1 for None
+        """
+        codes = []
+        for value in values:
+            if value is None:
+                codes.append(-1)
+                continue
+            if value not in known:
+                known.append(value)
+            codes.append(known.index(value))
+        return codes
+
+    def _append_sessions(self, other: ActivityMetadata, session_ids):
+        """
+        Appends copies of the blocks of one session for every session ID.
+        """
+        n_sessions = len(session_ids)
+        firsts = self.n_blocks + other.n_blocks * np.arange(n_sessions)
+        self.id_array = np.concatenate((self.id_array, np.repeat(np.array(session_ids, dtype=np.int64),
+                                                                 other.n_blocks)))
+        self.type_codes = np.concatenate((self.type_codes, np.tile(np.array(
+            [self.TYPES.index(t) for t in other.types], dtype=np.int8), n_sessions)))
+        self.cs_codes = np.concatenate((self.cs_codes, np.tile(np.array(
+            self._encode(other.cs_ids, self.cs_values), dtype=np.int64), n_sessions)))
+        self.qc_codes = np.concatenate((self.qc_codes, np.tile(np.array(
+            [c if c is not None else -1 for c in other.qc_indices], dtype=np.int64), n_sessions)))
+        self.name_codes = np.concatenate((self.name_codes, np.tile(np.array(
+            self._encode(other.block_names, self.name_values), dtype=np.int64), n_sessions)))
+        self.duration_array = np.concatenate((self.duration_array, np.tile(np.array(
+            other.durations, dtype=np.int64), n_sessions)))
+        self.d_max_array = np.concatenate((self.d_max_array, np.tile(np.array(
+            [d if d is not None else 0 for d in other.d_max], dtype=np.int64), n_sessions)))
+        self.has_d_max = np.concatenate((self.has_d_max, np.tile(np.array(
+            [d is not None for d in other.d_max], dtype=bool), n_sessions)))
+        self.resource_req_array = np.concatenate((self.resource_req_array, np.tile(np.array(
+            other.resource_reqs, dtype=np.int64).reshape(-1, 2), (n_sessions, 1))))
+        self.qubit_array = np.concatenate((self.qubit_array, np.tile(np.array(other.qubits, dtype=np.int64),
+                                                                     n_sessions)))
+        self.sender_codes = np.concatenate((self.sender_codes, np.tile(np.array(
+            self._encode(other.senders, self.name_values), dtype=np.int64), n_sessions)))
+        # successors are reindexed to the position of the session
+        self.successors += [[j + first for j in successors] for first in firsts.tolist()
+                            for successors in other.successors]
+        for session_id, first in zip(session_ids, firsts.tolist()):
+            self.session_ranges[session_id] = (first, first + other.n_blocks)
+        self.n_blocks += other.n_blocks * n_sessions
+        self.last_block = self.n_blocks - 1
+        self._views = {}
 
     def _merge_activity_metadata(self, other: ActivityMetadata):
-        if self.n_blocks == 0:  # we don't need to reindex successors
-            self.successors += other.successors
-        else:
-            new_successors = [x if len(x) == 0 else [x[0] + self.n_blocks] for x in other.successors]
-            self.successors += new_successors
-        self.ids += [other.session_id] * other.n_blocks
-        self.n_blocks += other.n_blocks
-        self.resource_reqs += other.resource_reqs
-        self.block_names += other.block_names
-        self.types += other.types
-        self.durations += other.durations
-        self.d_max += other.d_max
-        self.qc_indices += other.qc_indices
-        self.cs_ids += other.cs_ids
+        self._append_sessions(other, [other.session_id])
@@ -0,0 +1,97 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger("program_scheduling")
+
+
+class AnchorDecomposition:
+
+    def __init__(self, active_set, durations, d_max, time_windows, limited_qubits=False, ordered=False):
+        """
+        Splits an active set into segments of blocks that can be scheduled independently of each other. With a network
+        schedule, QC blocks that can only be scheduled in a single timeslot (anchors) pin the blocks around them, so
+        the time windows fall apart into groups that do not overlap: every block of a segment has finished before any
+        block of the next segment can start. The precedence, resource and critical section constraints between such
+        segments always hold, so two segments are only merged (together with the segments between them) if another
+        constraint links them: a maximum time lag between consecutive blocks in different segments, qubits held from
+        one segment into another (if the number of qubits is limited), or blocks of a session (or, if `ordered`, of
+        all sessions) whose segments are not in the order of the blocks. The decomposition is therefore exact: a node
+        schedule exists if and only if one exists for every segment, and its makespan is that of the last segment.
+        Segments in which every block has a fixed start time leave nothing to search, so they are merged into the
+        segment before them (or after them, for the first one) instead of being scheduled by a model of their own.
+
+        :param active_set: Active set with all blocks that should be scheduled
+        :param durations: (Scaled) durations of the blocks
+        :param d_max: (Scaled) maximum time lags of the blocks
+        :param time_windows: `TimeWindows` of the blocks
+        :param limited_qubits: Whether the model limits the number of qubits held at the same time
+        :param ordered: Whether the model schedules all blocks in the order of their indices (as the NAIVE approach)
+        """
+        self.active_set = active_set
+        self.durations = np.array(durations, dtype=np.int64)
+        self.d_max = d_max
+        self.est = np.array(time_windows.est, dtype=np.int64)
+        self.lst = np.array(time_windows.lst, dtype=np.int64)
+        self.limited_qubits = limited_qubits
+        self.ordered = ordered
+        self.segments = self._calculate_segments()
+
+    def _calculate_segments(self):
+        """
+        :return: List of segments (sorted lists of block indices) in the order of time
+        """
+        n_blocks = self.active_set.n_blocks
+        if n_blocks == 0:
+            return []
+        # blocks are swept by their earliest start time, and a new segment starts at a block that cannot start before
+        # all previous blocks have finished (and started, in case of blocks without a duration)
+        order = np.argsort(self.est, kind="stable")
+        ends = np.maximum(self.lst + self.durations, self.lst + 1)
+        starts_segment = np.zeros(n_blocks, dtype=bool)
+        starts_segment[1:] = self.est[order][1:] >= np.maximum.accumulate(ends[order])[:-1]
+        segment = np.zeros(n_blocks, dtype=np.int64)
+        segment[order] = np.cumsum(starts_segment)
+
+        # cut[k] is False if segments k and k + 1 have to be merged
+        cut = np.ones(int(segment.max()), dtype=bool)
+        for a, b in self._get_links(segment):
+            cut[min(a, b):max(a, b)] = False
+        fixed = np.ones(len(cut) + 1, dtype=bool)
+        np.logical_and.at(fixed, segment, self.est == self.lst)
+        for k in np.flatnonzero(fixed).tolist():
+            if len(cut) > 0:
+                cut[max(k - 1, 0)] = False
+        merged = np.concatenate(([0], np.cumsum(cut)))[segment]
+        segments = [np.flatnonzero(merged == k).tolist() for k in range(int(merged.max()) + 1)]
+        logger.debug(f"Anchors split the blocks into {len(cut) + 1} groups, which form {len(segments)} segments.")
+        return segments
+
+    def _get_links(self, segment):
+        """
+        :param segment: Segment of every block before merging
+        :return: List of pairs of segments that have to be merged
+        """
+        links = []
+        for i in range(self.active_set.n_blocks - 1):
+            if self.d_max[i + 1] is not None and segment[i] != segment[i + 1]:
+                links.append((segment[i], segment[i + 1]))
+        if self.limited_qubits:
+            links += [(segment[first], segment[last]) for (first, last, _) in self.active_set.get_qubit_intervals()
+                      if segment[first] != segment[last]]
+        # the segments of consecutive blocks may not decrease, which the latest segment of the blocks before ensures
+        groups = [range(self.active_set.n_blocks)] if self.ordered else \
+            [range(first, end) for (first, end) in self.active_set.session_ranges.values()]
+        for blocks in groups:
+            latest = -1
+            for i in blocks:
+                if segment[i] < latest:
+                    links.append((segment[i], latest))
+                latest = max(latest, segment[i])
+        return links
+
+    def get_bounds(self, blocks):
+        """
+        :return: Tuple of the earliest and latest start times of the blocks, which bound the time windows of a segment
+        """
+        return self.est[blocks].tolist(), self.lst[blocks].tolist()
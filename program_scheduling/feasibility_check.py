@@ -0,0 +1,133 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger("program_scheduling")
+
+
+class FeasibilityCheck:
+
+    def __init__(self, active_set, durations, network_schedule=None, time_windows=None, capacities=(1, 1),
+                 qubits=None):
+        """
+        Necessary conditions for the existence of a node schedule, which are cheap to check compared to building and
+        solving the model. If one of them does not hold, the active set cannot be scheduled (on the network schedule).
+
+        :param active_set: Active set with all blocks that should be scheduled
+        :param durations: (Scaled) durations of the blocks
+        :param network_schedule: Optional (scaled) network schedule
+        :param time_windows: Optional `TimeWindows` of the blocks, required for the checks using earliest and latest
+            start times
+        :param capacities: Capacities of [CPU, QPU]
+        :param qubits: Number of qubits of the node (None means unlimited)
+        """
+        self.active_set = active_set
+        self.durations = durations
+        self.network_schedule = network_schedule
+        self.time_windows = time_windows
+        self.capacities = capacities
+        self.qubits = qubits
+
+        self.slots = {}
+        if network_schedule is not None:
+            for i in range(active_set.n_blocks):
+                if active_set.types[i] == "QC":
+                    self.slots[i] = network_schedule.get_slots(active_set.ids[i], active_set.qc_indices[i])
+
+    def get_reason(self):
+        """
+        :return: Description of the first necessary condition that does not hold, or None if all of them hold
+        """
+        for check in [self._check_demands, self._check_qubits, self._check_slots, self._check_setup_time,
+                      self._check_time_windows, self._check_gaps]:
+            reason = check()
+            if reason is not None:
+                return reason
+        return None
+
+    def _describe(self, i):
+        return f"block {i} ({self.active_set.block_names[i]}) of session {self.active_set.ids[i]}"
+
+    def _check_demands(self):
+        for i in range(self.active_set.n_blocks):
+            for k, resource in enumerate(["CPU", "QPU"]):
+                if self.active_set.resource_reqs[i][k] > self.capacities[k]:
+                    return f"{self._describe(i)} uses {self.active_set.resource_reqs[i][k]} units of the {resource}, " \
+                           f"but its capacity is {self.capacities[k]}"
+        return None
+
+    def _check_qubits(self):
+        if self.qubits is None:
+            return None
+        for i in range(self.active_set.n_blocks):
+            if self.active_set.qubits[i] > self.qubits:
+                return f"session {self.active_set.ids[i]} holds {self.active_set.qubits[i]} qubits after " \
+                       f"{self._describe(i)}, but the node only has {self.qubits}"
+        return None
+
+    def _check_slots(self):
+        for i, slots in self.slots.items():
+            if len(slots) == 0:
+                return f"there is no timeslot for QC {self._describe(i)}"
+        return None
+
+    def _check_setup_time(self):
+        """
+        The blocks that the first QC block of a session depends on have to be finished before the last timeslot it can
+        use.
+        """
+        # setup[i] is the length of the longest chain of blocks that block i depends on
+        setup = [0] * self.active_set.n_blocks
+        checked = set()
+        for i in range(self.active_set.n_blocks):
+            session_id = self.active_set.ids[i]
+            if i in self.slots and session_id not in checked:
+                if self.slots[i][-1] < setup[i]:
+                    return f"the setup of session {session_id} takes {setup[i]}, but the last " \
+                           f"timeslot of its first QC block starts at {self.slots[i][-1]}"
+                checked.add(session_id)
+            # blocks only depend on blocks with a lower index
+            for j in self.active_set.successors[i]:
+                setup[j] = max(setup[j], setup[i] + self.durations[i])
+        return None
+
+    def _check_time_windows(self):
+        if self.time_windows is None or not self.time_windows.is_empty():
+            return None
+        i = next(i for i in range(self.active_set.n_blocks) if self.time_windows.est[i] > self.time_windows.lst[i])
+        return f"{self._describe(i)} has no feasible start time (earliest {self.time_windows.est[i]}, latest " \
+               f"{self.time_windows.lst[i]})"
+
+    def _check_gaps(self):
+        """
+        QC blocks that can only be scheduled in one timeslot split the node schedule into gaps. The blocks whose time
+        windows lie within a gap have to be processed in it, so their work may not exceed the capacity of the gap.
+        """
+        if self.time_windows is None or self.time_windows.is_empty():
+            return None
+        est = np.array(self.time_windows.est)
+        lst = np.array(self.time_windows.lst)
+        durations = np.array(self.durations)
+        forced = [i for i in self.slots if est[i] == lst[i]]
+        if len(forced) == 0:
+            return None
+
+        # gaps start at the end of a forced QC block (or 0) and end at the start of one (or the horizon)
+        gap_starts = np.array(sorted({0} | {int(est[i] + durations[i]) for i in forced}))
+        gap_ends = np.array(sorted({int(est[i]) for i in forced} | {int(lst.max() + durations.max())}))
+        for k, resource in enumerate(["CPU", "QPU"]):
+            blocks = np.array([i for i in range(self.active_set.n_blocks) if self.active_set.resource_reqs[i][k] > 0])
+            if len(blocks) == 0:
+                continue
+            energy = np.array([self.durations[i] * self.active_set.resource_reqs[i][k] for i in blocks])
+            # inside[a, b, i] is True if the time window of block i lies within the gap from gap_starts[a] to gap_ends[b]
+            inside = (est[blocks][None, None, :] >= gap_starts[:, None, None]) & \
+                     (lst[blocks][None, None, :] + durations[blocks][None, None, :] <= gap_ends[None, :, None])
+            work = (inside * energy[None, None, :]).sum(axis=2)
+            capacity = np.maximum(gap_ends[None, :] - gap_starts[:, None], 0) * self.capacities[k]
+            exceeding = np.argwhere(work > capacity)
+            if len(exceeding) > 0:
+                a, b = exceeding[0]
+                return f"{resource} work of {work[a, b]} does not fit between the forced QC blocks at " \
+                       f"{gap_starts[a]} and {gap_ends[b]}"
+        return None
@@ -0,0 +1,62 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger("program_scheduling")
+
+
+class LargeNeighbourhoodSearch:
+
+    def __init__(self, active_set, durations, n_free=2, seed=0):
+        """
+        Neighbourhoods of a large-neighbourhood search that improves the makespan of a node schedule: in every
+        iteration, the blocks of a few sessions are freed and scheduled again, while the blocks of all other sessions
+        stay where they are (see `NodeSchedule._construct_lns_schedule`). The neighbourhoods alternate between the
+        session that finishes last together with random other sessions, which can shorten the makespan directly, and
+        the sessions closest to a random time, which compacts the node schedule in between so that later iterations
+        can move the last session forward.
+
+        :param active_set: Active set with all blocks of the node schedule
+        :param durations: (Scaled) durations of the blocks
+        :param n_free: Number of sessions that are freed in every iteration
+        :param seed: Seed of the random choices
+        """
+        if n_free < 1:
+            raise ValueError(f"Neighbourhoods need at least one session, not {n_free}.")
+        self.active_set = active_set
+        self.durations = np.array(durations, dtype=np.int64)
+        self.session_ids = list(active_set.session_ranges.keys())
+        self.n_free = min(n_free, len(self.session_ids))
+        self.random = np.random.default_rng(seed)
+
+    def get_spans(self, start_times):
+        """
+        :param start_times: (Scaled) start times of all blocks
+        :return: Tuple of two arrays with the first start time and the last end time of every session (in the order of
+            `session_ids`)
+        """
+        starts = np.array(start_times, dtype=np.int64)
+        ends = starts + self.durations
+        ranges = [self.active_set.session_ranges[session_id] for session_id in self.session_ids]
+        return np.array([starts[first:end].min() for (first, end) in ranges], dtype=np.int64), \
+            np.array([ends[first:end].max() for (first, end) in ranges], dtype=np.int64)
+
+    def get_neighbourhood(self, iteration, start_times):
+        """
+        :param iteration: Number of the iteration, which decides the kind of neighbourhood
+        :param start_times: (Scaled) start times of all blocks in the current node schedule
+        :return: Sorted list of the IDs of the sessions to free
+        """
+        firsts, lasts = self.get_spans(start_times)
+        if iteration % 2 == 0:
+            # ties between sessions that finish last are broken randomly
+            last = int(self.random.choice(np.flatnonzero(lasts == lasts.max())))
+            others = np.array([k for k in range(len(self.session_ids)) if k != last], dtype=np.int64)
+            chosen = [last] + self.random.choice(others, size=self.n_free - 1, replace=False).tolist()
+        else:
+            t = int(self.random.integers(0, max(int(lasts.max()), 1)))
+            # distance of the sessions to the time, which is zero for those running at that time
+            distance = np.maximum(firsts - t, 0) + np.maximum(t - lasts, 0)
+            order = np.lexsort((self.random.permutation(len(self.session_ids)), distance))
+            chosen = order[:self.n_free].tolist()
+        return sorted(self.session_ids[k] for k in chosen)
@@ -0,0 +1,469 @@
+import heapq
+import logging
+from bisect import bisect_left, bisect_right, insort
+
+logger = logging.getLogger("program_scheduling")
+
+
+class ResourceProfile:
+
+    def __init__(self, capacity):
+        """
+        Usage of a single resource over time. The usage is a step function stored as sorted change points, i.e.
+        `usage[k]` units of the resource are in use on the interval [times[k], times[k + 1]).
+
+        :param capacity: Number of units of the resource available at any point in time
+        """
+        self.capacity = capacity
+        self.times = [0]
+        self.usage = [0]
+
+    def blocked_until(self, start, end, demand):
+        """
+        Checks whether `demand` units of the resource are available on the interval [start, end).
+
+        :return: None if the demand fits, otherwise the earliest time at which an activity starting at `start` could
+        be moved to without overlapping the first overloaded stretch of the interval
+        """
+        k = bisect_right(self.times, start) - 1
+        while k < len(self.times) and self.times[k] < end:
+            if self.usage[k] + demand > self.capacity:
+                # skip to the end of the overloaded stretch
+                while self.usage[k] + demand > self.capacity:
+                    k += 1
+                return self.times[k]
+            k += 1
+        return None
+
+    def add(self, start, end, demand):
+        if end <= start:
+            return
+        first = self._split(start)
+        last = self._split(end)
+        for k in range(first, last):
+            self.usage[k] += demand
+
+    def _split(self, t):
+        k = bisect_right(self.times, t) - 1
+        if self.times[k] != t:
+            self.times.insert(k + 1, t)
+            self.usage.insert(k + 1, self.usage[k])
+            return k + 1
+        return k
+
+
+class _Job:
+    """
+    A job is the unit that the list scheduler places at once: either a single block outside of a critical section or
+    all blocks of a critical section. The blocks of a job are split into segments of blocks that have to be executed
+    back-to-back (a maximum time lag of zero between consecutive blocks).
+    """
+    __slots__ = ["index", "session_id", "blocks", "segments", "offsets", "is_cs", "predecessors", "n_successors",
+                 "tail"]
+
+    def __init__(self, index, session_id, blocks, is_cs):
+        self.index = index
+        self.session_id = session_id
+        self.blocks = blocks
+        self.is_cs = is_cs
+        self.segments = []
+        self.offsets = {}
+        # blocks of other jobs that the blocks of this job depend on, by block
+        self.predecessors = {}
+        self.n_successors = 0
+        self.tail = 0
+
+
+class ListScheduler:
+    """
+    Serial schedule-generation scheme working directly on an active set. Jobs are picked one at a time according to
+    a priority rule and placed at the earliest time that respects the precedence constraints, the resource
+    capacities, the maximum time lags, the exclusivity of critical sections, (if given) the network schedule and the
+    number of qubits of the node. Unlike the CSP-based approaches, this does not require compiling a model or
+    launching a solver.
+
+    Qubits are a resource as well, held from the start of the block that takes them until the end of the block that
+    releases them (see `ActiveSet.get_qubit_intervals`). As the releasing block is usually placed later, the qubits
+    are reserved until the end of the horizon and given back once it is placed. A job that cannot take its qubits
+    while other sessions hold theirs waits until one of them releases qubits.
+
+    Supported priority rules:
+        EST -- earliest start time first
+        MTS -- most (transitive) successors first
+        CSF -- critical sections first
+        LPF -- longest remaining path (in time) first
+    """
+    PRIORITY_RULES = ["EST", "MTS", "CSF", "LPF"]
+
+    def __init__(self, active_set, durations, d_max, network_schedule=None, horizon=None, priority_rule="EST",
+                 capacities=(1, 1), frozen=None, qubits=None):
+        """
+        :param active_set: Active set with all blocks that should be scheduled
+        :param durations: (Scaled) durations of the blocks
+        :param d_max: (Scaled) maximum time lags of the blocks
+        :param network_schedule: Optional (scaled) network schedule whose timeslots the QC blocks are snapped to
+        :param horizon: Upper bound (exclusive) on the start time of every block, derived from the durations if None
+        :param priority_rule: One of `ListScheduler.PRIORITY_RULES`
+        :param capacities: Capacity of [CPU, QPU]
+        :param frozen: Optional `RollingHorizon` whose frozen blocks the blocks are placed around, without starting
+            before its release time
+        :param qubits: Number of qubits of the node (None means unlimited)
+        """
+        if priority_rule not in self.PRIORITY_RULES:
+            raise ValueError(f"Priority rule {priority_rule} not recognised, pick one of {self.PRIORITY_RULES}.")
+
+        self.active_set = active_set
+        self.durations = durations
+        self.d_max = d_max
+        self.network_schedule = network_schedule
+        self.horizon = horizon
+        self.priority_rule = priority_rule
+        self.capacities = capacities
+        self.qubits = qubits
+        self.release = frozen.release if frozen is not None else 0
+
+        for reqs in active_set.resource_reqs:
+            for k, capacity in enumerate(capacities):
+                if reqs[k] > capacity:
+                    raise ValueError(f"Resource requirement {reqs} exceeds the capacities {capacities}.")
+
+        self.predecessors = active_set.get_predecessors()
+
+        self.slots = self._calculate_slots()
+        self.jobs = self._create_jobs()
+        if self.horizon is None:
+            # every job can always be appended after all previously placed ones (and after the last timeslot)
+            self.horizon = sum(durations) + max([max(s, default=0) for s in self.slots.values()], default=0) + 1
+            if frozen is not None:
+                self.horizon += max(frozen.get_end(), self.release)
+
+        # qubits taken by every block as (releasing block, number of qubits) tuples, and the other way around, where
+        # qubits whose releasing block is not placed yet are reserved until every block has ended
+        self._takes = {}
+        self._releases = {}
+        if qubits is not None:
+            for (first, last, n) in active_set.get_qubit_intervals():
+                if n > qubits:
+                    raise ValueError(f"A session holds {n} qubits at once, but the node only has {qubits}.")
+                self._takes.setdefault(first, []).append((last, n))
+                self._releases.setdefault(last, []).append((first, n))
+        self._qubit_end = self.horizon + max(durations, default=0)
+        self._qubit_profile = ResourceProfile(qubits) if qubits is not None else None
+        self._n_open = 0  # number of intervals whose qubits are reserved until the end
+
+        self._profiles = [ResourceProfile(capacity) for capacity in capacities]
+        self._starts = []  # sorted start times of all scheduled blocks
+        self._span_starts = []  # sorted start times of the scheduled critical sections
+        self._span_ends = []  # start times of the last blocks of the scheduled critical sections
+        if frozen is not None:
+            self._add_frozen(frozen)
+
+    def _add_frozen(self, frozen):
+        """
+        Adds the resource usage, start times and critical sections of the frozen blocks, which (like those of other
+        sessions) are kept apart from all critical sections regardless of their IDs.
+        """
+        for k, profile in enumerate(self._profiles):
+            for (start, length, units) in frozen.get_resource_segments(k):
+                profile.add(start, start + length, units)
+        self._starts = sorted(frozen.start_times.values())
+        span_starts, span_ends = frozen.get_cs_spans(None)
+        self._span_starts, self._span_ends = span_starts.tolist(), span_ends.tolist()
+        if self._qubit_profile is not None:
+            for (start, end, n) in frozen.get_qubit_intervals():
+                self._qubit_profile.add(start, end, n)
+
+    def _calculate_slots(self):
+        slots = {}
+        if self.network_schedule is None:
+            return slots
+        for i in range(self.active_set.n_blocks):
+            if self.active_set.types[i] == "QC":
+                slots[i] = self.network_schedule.get_slots(self.active_set.ids[i], self.active_set.qc_indices[i])
+        return slots
+
+    def _lag(self, i, j):
+        """
+        Maximum time lag between the end of block i and the start of its successor j, following the constraints of
+        `NodeSchedule.construct_node_schedule`. With a network schedule, QC blocks wait for their timeslot instead.
+        """
+        if self.d_max[j] is None:
+            return None
+        if self.network_schedule is not None and self.active_set.types[j] == "QC" and self.d_max[i] is not None:
+            return None
+        return self.d_max[j]
+
+    def _create_jobs(self):
+        active = self.active_set
+        jobs = []
+        job_of_block = [None] * active.n_blocks
+        for i in range(active.n_blocks):
+            if job_of_block[i] is not None:
+                continue
+            blocks = [i]
+            if active.cs_ids[i] is not None:
+                # extend the job for as long as the critical section continues (its blocks form a chain)
+                while blocks[-1] + 1 in active.successors[blocks[-1]]:
+                    j = blocks[-1] + 1
+                    if active.ids[j] != active.ids[i] or active.cs_ids[j] != active.cs_ids[i]:
+                        break
+                    blocks.append(j)
+            job = _Job(len(jobs), active.ids[i], blocks, is_cs=active.cs_ids[i] is not None)
+            for b in blocks:
+                job_of_block[b] = job.index
+
+            segment = [blocks[0]]
+            job.offsets[blocks[0]] = 0
+            for prev, b in zip(blocks, blocks[1:]):
+                if self._lag(prev, b) == 0:
+                    job.offsets[b] = job.offsets[prev] + self.durations[prev]
+                    segment.append(b)
+                else:
+                    job.segments.append(segment)
+                    job.offsets[b] = 0
+                    segment = [b]
+            job.segments.append(segment)
+            jobs.append(job)
+
+        for job in jobs:
+            for b in job.blocks:
+                predecessors = [p for p in self.predecessors[b] if job_of_block[p] != job.index]
+                if len(predecessors) > 0:
+                    job.predecessors[b] = predecessors
+
+        # transitive successors (as a bitset of jobs) and remaining path length, calculated backwards, since the
+        # successors of a job always come after it
+        reachable = [0] * len(jobs)
+        for job in reversed(jobs):
+            successor_jobs = [jobs[k] for k in sorted({job_of_block[j] for b in job.blocks
+                                                       for j in active.successors[b]} - {job.index})]
+            for s in successor_jobs:
+                reachable[job.index] |= reachable[s.index] | (1 << s.index)
+            job.n_successors = sum(len(jobs[k].blocks) for k in range(job.index + 1, len(jobs))
+                                   if reachable[job.index] >> k & 1)
+            job.tail = sum(self.durations[b] for b in job.blocks) + max([s.tail for s in successor_jobs], default=0)
+        return jobs
+
+    def _snap(self, segment, offsets, t):
+        """
+        QC blocks can only start at one of their timeslots in the network schedule, so a segment containing QC blocks
+        is moved to the earliest start time (not before t) for which all of them are aligned with a timeslot.
+
+        :return: Start time of the segment or None if its QC blocks run out of timeslots
+        """
+        aligned = False
+        while not aligned:
+            aligned = True
+            for b in segment:
+                if b not in self.slots:
+                    continue
+                slots = self.slots[b]
+                k = bisect_left(slots, t + offsets[b])
+                if k == len(slots):
+                    return None
+                if slots[k] - offsets[b] > t:
+                    t = slots[k] - offsets[b]
+                    aligned = False
+        return t
+
+    def _release(self, job, segment, start_times):
+        """
+        :return: Earliest start time of a segment of the job for which its blocks start after all their predecessors
+            in other jobs have finished (and not before the release time)
+        """
+        return max([start_times[p] + self.durations[p] - job.offsets[b] for b in segment
+                    for p in job.predecessors.get(b, [])] + [self.release])
+
+    def _latest(self, job, start_times):
+        # maximum time lags only exist between a block and the block before it
+        first = job.blocks[0]
+        if first - 1 not in job.predecessors.get(first, []):
+            return None
+        lag = self._lag(first - 1, first)
+        return None if lag is None else start_times[first - 1] + self.durations[first - 1] + lag
+
+    def _segment_blocked_until(self, segment, offsets, s):
+        blocked = None
+        for b in segment:
+            b_start = s + offsets[b]
+            b_end = b_start + self.durations[b]
+            for k, profile in enumerate(self._profiles):
+                demand = self.active_set.resource_reqs[b][k]
+                if demand > 0:
+                    until = profile.blocked_until(b_start, b_end, demand)
+                    if until is not None:
+                        blocked = max(blocked or 0, s + until - b_start)
+            # blocks cannot start within a critical section of another session
+            k = bisect_right(self._span_starts, b_start) - 1
+            if k >= 0 and self._span_ends[k] >= b_start:
+                blocked = max(blocked or 0, s + self._span_ends[k] + 1 - b_start)
+        return blocked
+
+    def _try_place(self, job, t, latest, start_times):
+        """
+        Tries to place the job with its first block starting no earlier than t.
+
+        :return: Tuple of start times (or None) and the next time to try from (or None if the job cannot be placed)
+        """
+        starts = {}
+        prev_block = None
+        for k, segment in enumerate(job.segments):
+            first = segment[0]
+            if k == 0:
+                earliest, segment_latest = t, latest
+            else:
+                prev_end = starts[prev_block] + self.durations[prev_block]
+                lag = self._lag(prev_block, first)
+                earliest = max(prev_end, self._release(job, segment, start_times))
+                segment_latest = None if lag is None else prev_end + lag
+            s = self._snap(segment, job.offsets, earliest)
+            while True:
+                if s is None:
+                    return None, None
+                if segment_latest is not None and s > segment_latest:
+                    return None, (None if k == 0 else t + 1)
+                blocked = self._segment_blocked_until(segment, job.offsets, s)
+                if blocked is None:
+                    break
+                if k == 0:
+                    return None, blocked
+                s = self._snap(segment, job.offsets, blocked)
+            for b in segment:
+                starts[b] = s + job.offsets[b]
+            prev_block = segment[-1]
+
+        if max(starts.values()) >= self.horizon:
+            return None, None
+
+        if job.is_cs:
+            # no block of another session can start within this critical section
+            span_start, span_end = starts[job.blocks[0]], starts[job.blocks[-1]]
+            k = bisect_left(self._starts, span_start)
+            if k < len(self._starts) and self._starts[k] <= span_end:
+                return None, self._starts[k] + 1
+
+        shift = self._qubits_blocked_until(job, starts)
+        if shift is not None:
+            return None, t + shift
+        return starts, None
+
+    def _qubit_intervals(self, job, starts):
+        """
+        :return: List of (start, end, number of qubits) tuples of the qubits taken by the blocks of the job, where
+            qubits that are not released within the job are held until the end
+        """
+        return [(starts[b], starts[last] + self.durations[last] if last in starts else self._qubit_end, n)
+                for b in job.blocks for (last, n) in self._takes.get(b, [])]
+
+    def _qubits_blocked_until(self, job, starts):
+        """
+        :return: None if the qubits taken by the job are available, otherwise the smallest shift of the job that
+            skips the first stretch in which they are not
+        """
+        shift = None
+        added = []
+        for (start, end, n) in self._qubit_intervals(job, starts):
+            until = self._qubit_profile.blocked_until(start, end, n)
+            if until is not None:
+                shift = until - start
+                break
+            # the qubits of a job are taken together
+            self._qubit_profile.add(start, end, n)
+            added.append((start, end, n))
+        for (start, end, n) in added:
+            self._qubit_profile.add(start, end, -n)
+        return shift
+
+    def _place(self, job, start_times):
+        t = self._release(job, job.segments[0], start_times)
+        latest = self._latest(job, start_times)
+        while t is not None and t < self.horizon:
+            starts, t = self._try_place(job, t, latest, start_times)
+            if starts is not None:
+                return starts
+        return None
+
+    def _commit(self, job, starts):
+        """
+        :return: True if the job releases qubits that were reserved until the end
+        """
+        for (start, end, n) in self._qubit_intervals(job, starts):
+            self._qubit_profile.add(start, end, n)
+        released = False
+        for b in job.blocks:
+            self._n_open += sum(1 for (last, _) in self._takes.get(b, []) if last not in starts)
+            for (first, n) in self._releases.get(b, []):
+                if first not in starts:
+                    self._qubit_profile.add(starts[b] + self.durations[b], self._qubit_end, -n)
+                    self._n_open -= 1
+                    released = True
+        for b, s in starts.items():
+            for k, profile in enumerate(self._profiles):
+                profile.add(s, s + self.durations[b], self.active_set.resource_reqs[b][k])
+            insort(self._starts, s)
+        if job.is_cs:
+            k = bisect_left(self._span_starts, starts[job.blocks[0]])
+            self._span_starts.insert(k, starts[job.blocks[0]])
+            self._span_ends.insert(k, starts[job.blocks[-1]])
+        return released
+
+    def _priority(self, job, start_times):
+        release = self._release(job, job.segments[0], start_times)
+        est = self._snap(job.segments[0], job.offsets, release)
+        est = float("inf") if est is None else est
+        if self.priority_rule == "EST":
+            return est, job.index
+        elif self.priority_rule == "MTS":
+            return -job.n_successors, est, job.index
+        elif self.priority_rule == "CSF":
+            return not job.is_cs, est, job.index
+        else:
+            return -job.tail, est, job.index
+
+    def schedule(self):
+        """
+        Schedules all jobs of the active set.
+
+        :return: List of (scaled) start times of all blocks or None if the scheduler could not place every job
+        """
+        start_times = [None] * self.active_set.n_blocks
+        # jobs waiting for a block, and the number of blocks every job is still waiting for
+        waiting = {}
+        n_waiting = [0] * len(self.jobs)
+        for job in self.jobs:
+            for p in {p for predecessors in job.predecessors.values() for p in predecessors}:
+                waiting.setdefault(p, []).append(job)
+                n_waiting[job.index] += 1
+
+        # the priority of a job does not change once it is eligible, since its release time is then known
+        eligible = [(self._priority(job, start_times), job.index) for job in self.jobs if n_waiting[job.index] == 0]
+        heapq.heapify(eligible)
+        # jobs that wait for other sessions to release qubits
+        deferred = []
+        while len(eligible) > 0:
+            _, index = heapq.heappop(eligible)
+            job = self.jobs[index]
+            starts = self._place(job, start_times)
+            if starts is None and self._n_open > 0 and any(b in self._takes for b in job.blocks):
+                deferred.append(job)
+                continue
+            if starts is None:
+                logger.debug(f"List scheduler could not place blocks {job.blocks} of session {job.session_id}.")
+                return None
+            if self._commit(job, starts):
+                for other in deferred:
+                    heapq.heappush(eligible, (self._priority(other, start_times), other.index))
+                deferred = []
+            for b, s in starts.items():
+                start_times[b] = s
+            for b in job.blocks:
+                for successor in waiting.pop(b, []):
+                    n_waiting[successor.index] -= 1
+                    if n_waiting[successor.index] == 0:
+                        heapq.heappush(eligible, (self._priority(successor, start_times), successor.index))
+
+        if len(deferred) > 0:
+            logger.debug(f"List scheduler could not place the blocks of sessions {[j.session_id for j in deferred]} "
+                         f"for lack of qubits.")
+            return None
+        return start_times
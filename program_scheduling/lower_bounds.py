@@ -0,0 +1,102 @@
+import logging
+
+logger = logging.getLogger("program_scheduling")
+
+
+class LowerBounds:
+
+    def __init__(self, active_set, durations, network_schedule=None, time_windows=None, capacities=(1, 1)):
+        """
+        Lower bounds on the makespan of every node schedule of an active set. All bounds are valid relaxations of the
+        node schedule model, so the makespan of an optimal node schedule is never below `get_bound()`.
+
+        :param active_set: Active set with all blocks that should be scheduled
+        :param durations: (Scaled) durations of the blocks
+        :param network_schedule: Optional (scaled) network schedule
+        :param time_windows: Optional `TimeWindows` of the blocks, which strengthens the critical path bound
+        :param capacities: Capacities of [CPU, QPU]
+        """
+        self.active_set = active_set
+        self.durations = durations
+        self.network_schedule = network_schedule
+        self.time_windows = time_windows
+        self.capacities = capacities
+
+        self.heads = self._calculate_heads()
+        self.tails = self._calculate_tails()
+        self.bounds = {
+            "chain": max(self.tails, default=0),
+            "CPU": self._load_bound(0),
+            "QPU": self._load_bound(1),
+        }
+        if network_schedule is not None:
+            self.bounds["QC"] = self._qc_bound()
+        if time_windows is not None and not time_windows.is_empty():
+            self.bounds["windows"] = max((self.heads[i] + self.tails[i] for i in range(active_set.n_blocks)),
+                                         default=0)
+
+    def _calculate_heads(self):
+        """
+        :return: For every block, the earliest time it can start (taken from the time windows if these are given)
+        """
+        heads = [0] * self.active_set.n_blocks
+        if self.time_windows is not None and not self.time_windows.is_empty():
+            heads = list(self.time_windows.est)
+        for i in range(self.active_set.n_blocks):
+            for j in self.active_set.successors[i]:
+                heads[j] = max(heads[j], heads[i] + self.durations[i])
+        return heads
+
+    def _calculate_tails(self):
+        """
+        :return: For every block, the length of the longest chain of successors starting with (and including) it
+        """
+        tails = [0] * self.active_set.n_blocks
+        # blocks only have successors with a higher index
+        for i in reversed(range(self.active_set.n_blocks)):
+            tails[i] = self.durations[i] + max((tails[j] for j in self.active_set.successors[i]), default=0)
+        return tails
+
+    def _load_bound(self, resource_index):
+        """
+        All blocks using a resource have to be processed after the earliest of them can start, and the chain after the
+        last of them takes at least the shortest time any of them is followed by.
+        """
+        blocks = [i for i in range(self.active_set.n_blocks) if self.active_set.resource_reqs[i][resource_index] > 0]
+        if len(blocks) == 0:
+            return 0
+        load = sum(self.durations[i] * self.active_set.resource_reqs[i][resource_index] for i in blocks)
+        # rounded up, since start times are integers
+        return min(self.heads[i] for i in blocks) + -(-load // self.capacities[resource_index]) \
+            + min(self.tails[i] - self.durations[i] for i in blocks)
+
+    def _qc_bound(self):
+        """
+        A QC block cannot start before the first timeslot of the network schedule that is assigned to it.
+        """
+        bound = 0
+        for i in range(self.active_set.n_blocks):
+            if self.active_set.types[i] != "QC":
+                continue
+            slots = self.network_schedule.get_slots(self.active_set.ids[i], self.active_set.qc_indices[i])
+            if len(slots) > 0:
+                bound = max(bound, slots[0] + self.tails[i])
+        return bound
+
+    def get_bounds(self):
+        """
+        :return: Dictionary with the value of every individual bound
+        """
+        return self.bounds
+
+    def get_bound(self):
+        return max(self.bounds.values())
+
+    @staticmethod
+    def get_gap(makespan, bound):
+        """
+        :return: Relative gap between a makespan and a lower bound (0 means the makespan is optimal)
+        """
+        if makespan is None or bound is None or bound == 0:
+            return None
+        return (makespan - bound) / bound
@@ -1,7 +1,8 @@
+import copy
 import logging
 import os
 from argparse import ArgumentParser
-from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import pandas as pd
@@ -15,6 +16,13 @@ logger = logging.getLogger("program_scheduling")
 
 class NetworkSchedule:
     QC_LENGTH = 20_000_000  # QC duration constant set by Qoala
+    # number of timeslots after a picked timeslot that need to stay free, and the timeslot (relative to the picked
+    # one) that is added for the rest of the critical section
+    BLOCKED_TIMESLOTS = {"bqc": (4, 2), "pingpong": (6, 3), "qkd": (1, None)}
+    SETUP_TIME = 450000  # duration of the first two blocks of pingpong for Alice
+    APPLICATIONS = ["bqc", "pingpong", "qkd"]
+    # number of seeds that are tried if the constructive generator runs into a dead end
+    MAX_ATTEMPTS = 100
 
     def __init__(self, dataset_id, n_sessions, sessions=None, start_times=None, filename=None, save=True, seed=None,
                  length_factor=3):
@@ -23,6 +31,10 @@ class NetworkSchedule:
         are not define, a network schedule will be randomly generated. Filename for saving the network schedule
         can be set for testing purposes.
 
+        The timeslots are stored column-wise in NumPy arrays (`start_time_array`, `session_id_array`,
+        `qc_index_array` and `app_array`), from which lookup tables per session and per QC index are built on first
+        use. `sessions` and `start_times` are list views of these columns.
+
         :param dataset_id: ID of the dataset specifying a combination of applications
         :param n_sessions: Total number of sessions to be scheduled
         :param sessions: List of sessions for which QC timeslots are scheduled
@@ -35,51 +47,142 @@ class NetworkSchedule:
         self.length_factor = length_factor
         self.length = NetworkSchedule._calculate_length(self.dataset, length_factor=length_factor)
         self.id = None
+        self._required_timeslots = None
+
+        self.start_time_array = np.zeros(0, dtype=np.int64)
+        self.session_id_array = np.zeros(0, dtype=np.int64)  # -1 until the sessions are rewritten
+        self.qc_index_array = np.zeros(0, dtype=np.int64)  # -1 until the sessions are rewritten
+        self.app_array = np.zeros(0, dtype=object)  # None if the application is not known
+        self._start_times_by_session = None
+        self._start_times_by_qc_index = None
 
         if start_times is None and sessions is None:
             if save:
-                folder_path = os.path.dirname(__file__).rstrip("program_scheduling") + "network_schedules"
-                if not os.path.exists(folder_path):
-                    os.makedirs(folder_path)
-                self.id = self.calculate_id(folder_path)
+                # imported here, as the catalog imports this module
+                from program_scheduling.schedule_catalog import ScheduleCatalog
+                catalog = ScheduleCatalog()
+                self.id = catalog.get_next_ns_id(dataset_id=dataset_id, n_sessions=n_sessions,
+                                                 length_factor=length_factor)
                 self.generate_random_network_schedule()
-                self.save_network_schedule(filename=filename)
+                if filename is None:
+                    catalog.add_network_schedules([self])
+                else:
+                    self.save_network_schedule(filename=filename)
+                catalog.close()
             else:
                 assert seed is not None
                 self.id = seed
                 self.generate_random_network_schedule()
         else:
             assert len(sessions) == len(start_times)
-            self.sessions = sessions
             self.start_times = start_times
+            self.sessions = sessions
+
+    @property
+    def start_times(self):
+        return self.start_time_array.tolist()
+
+    @start_times.setter
+    def start_times(self, start_times):
+        self.start_time_array = np.array(start_times, dtype=np.int64)
+        self._invalidate_lookup_tables()
+
+    @property
+    def sessions(self):
+        """
+        :return: For every timeslot, its (session ID, QC index) tuple once the sessions are rewritten, and its
+            application otherwise
+        """
+        if len(self.session_id_array) > 0 and (self.qc_index_array >= 0).all():
+            return list(zip(self.session_id_array.tolist(), self.qc_index_array.tolist()))
+        if len(self.session_id_array) > 0 and (self.session_id_array >= 0).all():
+            return self.session_id_array.tolist()
+        return self.app_array.tolist()
+
+    @sessions.setter
+    def sessions(self, sessions):
+        n = len(sessions)
+        self.session_id_array = np.full(n, -1, dtype=np.int64)
+        self.qc_index_array = np.full(n, -1, dtype=np.int64)
+        if n > 0 and isinstance(sessions[0], tuple):
+            self.session_id_array[:] = [session_id for (session_id, _) in sessions]
+            self.qc_index_array[:] = [qc_index for (_, qc_index) in sessions]
+            if len(self.app_array) != n:
+                self.app_array = np.full(n, None, dtype=object)
+        elif n > 0 and not isinstance(sessions[0], str):
+            self.session_id_array[:] = sessions
+            self.app_array = np.full(n, None, dtype=object)
+        else:
+            self.app_array = np.array(sessions, dtype=object)
+        self._invalidate_lookup_tables()
+
+    def _invalidate_lookup_tables(self):
+        self._start_times_by_session = None
+        self._start_times_by_qc_index = None
 
-    def calculate_id(self, folder_path):
-        relevant_ids = []
-        filename_part = NetworkSchedule.get_name(dataset_id=self.dataset_id, n_sessions=self.n_sessions,
-                                                 length_factor=self.length_factor)
-        for f in os.listdir(folder_path):
-            if filename_part in f:
-                relevant_ids.append(int(f.split(".")[0].split("-")[-1]))
-        return max(relevant_ids) + 1 if len(relevant_ids) > 0 else 0
+    @staticmethod
+    def _group_start_times(keys, start_times):
+        """
+        :return: Dictionary from every key to the array of start times of its timeslots (in their original order)
+        """
+        if len(keys) == 0:
+            return {}
+        order = np.argsort(keys, kind="stable")
+        unique_keys, first = np.unique(keys[order], return_index=True)
+        return dict(zip(unique_keys.tolist(), np.split(start_times[order], first[1:])))
+
+    def _build_lookup_tables(self):
+        assigned = self.session_id_array >= 0
+        self._start_times_by_session = self._group_start_times(self.session_id_array[assigned],
+                                                               self.start_time_array[assigned])
+        # sessions can also be looked up by their application, which are strings and thus never clash with IDs
+        known = self.app_array != None  # noqa: E711 (element-wise comparison)
+        self._start_times_by_session.update(self._group_start_times(self.app_array[known].astype(str),
+                                                                    self.start_time_array[known]))
+        assigned = self.qc_index_array >= 0
+        self._start_times_by_qc_index = self._group_start_times(self.qc_index_array[assigned],
+                                                                self.start_time_array[assigned])
+
+    @staticmethod
+    def generate_network_schedules(dataset_id, n_sessions, length_factor, n, workers=1, first_id=None):
+        """
+        Generates many network schedules, possibly in parallel. Network schedule j is generated from seed
+        `first_id + j * MAX_ATTEMPTS` and may only try the seeds up to the next one, so every network schedule
+        depends on j alone (and not on the number of workers or the order in which they finish).
+
+        :param dataset_id: ID of the dataset specifying a combination of applications
+        :param n_sessions: Total number of sessions to be scheduled
+        :param length_factor: Length factor of the network schedules
+        :param n: Number of network schedules to generate
+        :param workers: Number of processes generating network schedules
+        :param first_id: First seed, by default the first ID after the network schedules in the catalog
+        :return: Generator of network schedules (not saved), in order of their seeds
+        """
+        if first_id is None:
+            # imported here, as the catalog imports this module
+            from program_scheduling.schedule_catalog import ScheduleCatalog
+            first_id = ScheduleCatalog().get_next_ns_id(dataset_id=dataset_id, n_sessions=n_sessions,
+                                                        length_factor=length_factor)
+        jobs = [(dataset_id, n_sessions, length_factor, first_id + j * NetworkSchedule.MAX_ATTEMPTS)
+                for j in range(n)]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                yield from executor.map(_generate_network_schedule, jobs, chunksize=max(1, n // (4 * workers)))
+        else:
+            yield from map(_generate_network_schedule, jobs)
 
     @staticmethod
     def scale_down(network_schedule, factor):
-        network_schedule.start_times = list(map(lambda t: int(t / factor), network_schedule.start_times))
+        """
+        :return: Copy of the network schedule with its start times and length divided by the factor, which leaves the
+            network schedule itself unchanged (e.g. for a fallback that scales it again)
+        """
+        network_schedule = copy.deepcopy(network_schedule)
+        network_schedule.start_time_array = (network_schedule.start_time_array / factor).astype(np.int64)
+        network_schedule._invalidate_lookup_tables()
         network_schedule.length = int(network_schedule.length / factor)  # TODO: is this always int?
         return network_schedule
 
-    @staticmethod
-    def get_relevant_ids(dataset_id, n_sessions, length_factor):
-        relevant_ids = []
-        folder_path = os.path.dirname(__file__).rstrip("program_scheduling") + "network_schedules"
-        filename_part = NetworkSchedule.get_name(dataset_id=dataset_id, n_sessions=n_sessions,
-                                                 length_factor=length_factor)
-        for f in os.listdir(folder_path):
-            if filename_part in f:
-                id = int(f.split(".")[0].split("-")[-1])
-                relevant_ids.append(id)
-        return relevant_ids
-
     def save_network_schedule(self, filename):
         """
         Saves the network schedule. First checks if network_schedules folder is created.
@@ -89,6 +192,8 @@ class NetworkSchedule:
         :return:
         """
         folder_path = os.path.dirname(__file__).rstrip("program_scheduling") + "network_schedules"
+        if not os.path.exists(folder_path):
+            os.makedirs(folder_path)
         if filename is None:
             filename = NetworkSchedule.get_name(dataset_id=self.dataset_id, n_sessions=self.n_sessions,
                                                 ns_id=self.id, length_factor=self.length_factor)
@@ -124,21 +229,63 @@ class NetworkSchedule:
 
         return assigned_timeslots
 
+    def _get_required_timeslots(self):
+        """
+        :return: Dictionary with the number of timeslots to pick for each application, i.e. one per critical section
+        """
+        if self._required_timeslots is None:
+            self._required_timeslots = {
+                k.split("/")[-1]: len(set([b.CS for b in SessionMetadata(k + "_alice.yml", session_id=1).blocks
+                                           if b.type == "QC"])) * v
+                for (k, v) in self.dataset.items()
+            }
+        return self._required_timeslots
+
     def _pick_timeslots(self, timeslots):
-        np.random.seed(self.id)
+        """
+        Picks the first timeslot of every critical section from the timeslots assigned to its application. Timeslots
+        are picked one at a time, uniformly among those that keep the network schedule feasible, so the result is
+        feasible by construction.
 
-        n_critical_sections = {k.split("/")[-1]:
-                               len(set([b.CS for b in SessionMetadata(k + "_alice.yml", session_id=1).blocks
-                                        if b.type == "QC"]))
-                               for (k, v) in self.dataset.items()}
+        :param timeslots: List of (start time, application) tuples as returned by `_get_all_timeslots`
+        :return: List of picked (start time, application) tuples, or None if the picks ran into a dead end
+        """
+        # indexed by position on the grid of all timeslots (as in `feasible_timeslot_batch`), so the neighbours of
+        # timeslot k are k - 1 and k + 1 even if these are not assigned to any application (e.g. for qkd only)
+        first_start_time = 100000
+        positions = np.array([(t - first_start_time) // self.QC_LENGTH for (t, _) in timeslots], dtype=np.int64)
+        n_timeslots = int(positions.max()) + 1 if len(timeslots) > 0 else 0
+        start_times = first_start_time + np.arange(n_timeslots, dtype=np.int64) * self.QC_LENGTH
+        applications = np.full(n_timeslots, None, dtype=object)
+        applications[positions] = [a for (_, a) in timeslots]
+        max_window = max(window for (window, _) in self.BLOCKED_TIMESLOTS.values())
+        # padded at both ends, so timeslot k corresponds to index k + 1
+        picked = np.zeros(n_timeslots + max_window + 1, dtype=bool)
+        blocked = np.zeros(n_timeslots + max_window + 1, dtype=bool)
 
         picked_timeslots = []
-        for (k, v) in self.dataset.items():
-            session = k.split("/")[-1]
-            indices = [i for i, timeslot in enumerate(timeslots) if timeslot[1] == session]
-            required_cs = n_critical_sections[session] * v
-            picked_indices = np.random.choice(indices, required_cs, replace=False)
-            picked_timeslots += [timeslots[i] for i in picked_indices]
+        # the applications blocking the most timeslots are placed first
+        required = self._get_required_timeslots()
+        for session in sorted(required, key=lambda a: -self.BLOCKED_TIMESLOTS.get(a, (0, None))[0]):
+            window, cs_offset = self.BLOCKED_TIMESLOTS.get(session, (0, None))
+            for _ in range(required[session]):
+                candidates = (applications == session) & ~picked[1:n_timeslots + 1] & ~blocked[1:n_timeslots + 1]
+                for offset in range(1, window + 1):
+                    candidates &= ~picked[1 + offset:n_timeslots + 1 + offset]
+                if cs_offset is not None:
+                    candidates &= start_times + cs_offset * self.QC_LENGTH <= self.length - self.QC_LENGTH
+                if session == "pingpong":
+                    candidates &= (start_times >= self.SETUP_TIME) & ~picked[:n_timeslots]
+
+                indices = np.flatnonzero(candidates)
+                if len(indices) == 0:
+                    return None
+                k = np.random.choice(indices)
+                picked[k + 1] = True
+                blocked[k + 2:k + 2 + window] = True
+                if session == "pingpong":
+                    blocked[k] = True
+                picked_timeslots.append((int(start_times[k]), session))
 
         return picked_timeslots
 
@@ -159,65 +306,93 @@ class NetworkSchedule:
         return ns
 
     def feasible_network_schedule(self, suggested_ns):
-        # check for length
-        for (start_time, _) in suggested_ns:
-            if start_time > (self.length - self.QC_LENGTH):
+        """
+        Checks whether picked timeslots (i.e. the first timeslot of every critical section) can be completed to a
+        feasible network schedule.
+
+        :param suggested_ns: List of (start time, application) tuples
+        :return: True if the network schedule is feasible
+        """
+        # timeslots can only block each other if they are a multiple of QC_LENGTH apart
+        groups = {}
+        for (start_time, session) in suggested_ns:
+            groups.setdefault(start_time % self.QC_LENGTH, []).append((start_time, session))
+        for residue, timeslots in groups.items():
+            first_start_time = min(start_time for (start_time, _) in timeslots)
+            n_timeslots = (max(start_time for (start_time, _) in timeslots) - first_start_time) // self.QC_LENGTH + 1
+            applications = np.zeros((1, n_timeslots), dtype=int)
+            for (start_time, session) in timeslots:
+                applications[0, (start_time - first_start_time) // self.QC_LENGTH] = self.get_application_code(session)
+            if not self.feasible_timeslot_batch(applications, first_start_time)[0]:
                 return False
+        return True
+
+    @staticmethod
+    def get_application_code(session):
+        """
+        :return: Code of an application in the arrays of `feasible_timeslot_batch` (0 means no timeslot)
+        """
+        if session in NetworkSchedule.APPLICATIONS:
+            return NetworkSchedule.APPLICATIONS.index(session) + 1
+        return len(NetworkSchedule.APPLICATIONS) + 1
+
+    def feasible_timeslot_batch(self, applications, first_start_time=100000):
+        """
+        Checks many candidate network schedules at once. Each candidate is a row of consecutive timeslots, where
+        timeslot k starts at `first_start_time + k * QC_LENGTH` and holds the code (see `get_application_code`) of
+        the application whose critical section starts in it, or 0 if it is not picked.
+
+        :param applications: 2-D array of application codes with one row per candidate
+        :param first_start_time: Start time of the first timeslot
+        :return: 1-D boolean array, True for every feasible candidate
+        """
+        applications = np.asarray(applications)
+        n_candidates, n_timeslots = applications.shape
+        max_window = max(window for (window, _) in self.BLOCKED_TIMESLOTS.values())
+        # padded at both ends, so timeslot k corresponds to column k + 1
+        occupied = np.zeros((n_candidates, n_timeslots + max_window + 1), dtype=bool)
+        occupied[:, 1:n_timeslots + 1] = applications != 0
+        start_times = first_start_time + np.arange(n_timeslots, dtype=np.int64) * self.QC_LENGTH
+        latest_start_time = self.length - self.QC_LENGTH
+
+        # check for length
+        infeasible = (occupied[:, 1:n_timeslots + 1] & (start_times > latest_start_time)).any(axis=1)
 
         # check for crit sections
-        for (start_time, session) in suggested_ns:
-            if session == "bqc":
-                new_start_time = start_time + 2 * self.QC_LENGTH
-                if new_start_time > (self.length - self.QC_LENGTH):
-                    return False
-                # bqc needs to have 1 empty timeslot after
-                for blocked in range(start_time + self.QC_LENGTH,
-                                     new_start_time + 2 * self.QC_LENGTH + 1,
-                                     self.QC_LENGTH):
-                    if blocked in [t for (t, _) in suggested_ns]:
-                        return False
+        for session, (window, cs_offset) in self.BLOCKED_TIMESLOTS.items():
+            picked = applications == self.get_application_code(session)
+            if cs_offset is not None:
+                infeasible |= (picked & (start_times + cs_offset * self.QC_LENGTH > latest_start_time)).any(axis=1)
+            # the timeslots after the picked one need to be empty
+            for offset in range(1, window + 1):
+                infeasible |= (picked & occupied[:, 1 + offset:n_timeslots + 1 + offset]).any(axis=1)
             if session == "pingpong":
-                new_start_time = start_time + 3 * self.QC_LENGTH
-                if new_start_time > (self.length - self.QC_LENGTH):
-                    return False
-                # pingpong needs to have 2 empty timeslots after
-                for blocked in range(start_time + self.QC_LENGTH,
-                                     new_start_time + 3 * self.QC_LENGTH + 1,
-                                     self.QC_LENGTH):
-                    if blocked in [t for (t, _) in suggested_ns]:
-                        return False
-            if session == "qkd":
-                if start_time + self.QC_LENGTH in [t for (t, _) in suggested_ns]:
-                    return False
-
-        # check for setup time (pingpong)
-        for (start_time, session) in suggested_ns:
-            if session == "pingpong":
-                if start_time < 450000:  # duration of first two blocks for Alice
-                    return False
-                if start_time - self.QC_LENGTH in [t for (t, _) in suggested_ns]:
-                    return False
+                # check for setup time (pingpong)
+                infeasible |= (picked & (start_times < self.SETUP_TIME)).any(axis=1)
+                infeasible |= (picked & occupied[:, :n_timeslots]).any(axis=1)
 
-        return True
+        return ~infeasible
 
     def generate_random_network_schedule(self):
         """
         A method for generating a random network schedule. Depends on the probabilities that a session should be
         scheduled. Each session has a probability `p` assigned. At each decision point, a choice is randomly
-        made between scheduling a timeslot for a specific session or not assigning the NS timeslot.
+        made between scheduling a timeslot for a specific session or not assigning the NS timeslot. The first timeslots
+        of the critical sections are then picked such that the network schedule is feasible by construction; only if
+        the picks run into a dead end, the next seed is tried.
 
         :return:
         """
-        timeslots_to_pick_from = self._get_all_timeslots()
-        suggested_ns = self._pick_timeslots(timeslots_to_pick_from)
-
-        while not self.feasible_network_schedule(suggested_ns):
-            if self.id % 100 == 0:
-                logger.debug(f"Trying out seed {self.id}")
-            self.id += 1
-
-            timeslots_to_pick_from = self._get_all_timeslots()
-            suggested_ns = self._pick_timeslots(timeslots_to_pick_from)
+        suggested_ns = None
+        for attempt in range(self.MAX_ATTEMPTS):
+            if attempt > 0:
+                logger.debug(f"Picking timeslots ran into a dead end, trying out seed {self.id + 1}")
+                self.id += 1
+            suggested_ns = self._pick_timeslots(self._get_all_timeslots())
+            if suggested_ns is not None:
+                break
+        if suggested_ns is None:
+            raise ValueError(f"No feasible network schedule could be generated within {self.MAX_ATTEMPTS} seeds.")
 
         ns_timeslots = self._add_cs_timeslots(suggested_ns)
         logger.info(f"Generated network schedule with seed={self.id}")
@@ -284,54 +459,70 @@ class NetworkSchedule:
             return f"network-schedule_sessions-{n_sessions}_dataset-{dataset_id}_length-{length_factor}_id-{ns_id}"
 
     def rewrite_sessions(self, dataset):
-        # TODO: make this prettier
-        session_ids = {}
+        """
+        Assigns every timeslot to a QC block of a session. Sessions of an application get consecutive IDs (in the
+        order of the dataset), and the timeslots of an application cycle through its sessions and their QC blocks,
+        e.g. (0, 0), (0, 1), (1, 0), (1, 1), (0, 0), ... for two sessions with two QC blocks each.
+
+        :param dataset: Dataset the network schedule was created for
+        """
+        first_session_ids = {}
         last_session_id = 0
         for (config_file, number) in dataset.items():
-            ids = list(range(last_session_id, last_session_id + number))
-            session_ids.update({config_file.split("/")[-1]: ids})
+            first_session_ids[config_file.split("/")[-1]] = (last_session_id, number)
             last_session_id += number
 
-        new_d = {}
-        for (session, ids) in session_ids.items():
-            if session == "qkd":
-                # yes you're going to regret this
-                new_d.update({session: list(chain(*zip(
-                    zip(ids, [0] * len(ids)),
-                    zip(ids, [1] * len(ids)),
-                    zip(ids, [2] * len(ids)),
-                ))) * 10})
-            else:
-                new_d.update({session: list(chain(*zip(
-                    zip(ids, [0] * len(ids)),  # first QC blocks
-                    zip(ids, [1] * len(ids))  # second QC blocks
-                ))) * 10})
-
-        rewrite = []
-        for sesh in self.sessions:
-            rewrite.append(new_d[sesh].pop(0))
-
-        self.sessions = rewrite
+        session_id_array = np.full(len(self.app_array), -1, dtype=np.int64)
+        qc_index_array = np.full(len(self.app_array), -1, dtype=np.int64)
+        for session in set(self.app_array.tolist()):
+            first_session_id, number = first_session_ids[session]
+            n_qc_blocks = 3 if session == "qkd" else 2
+            timeslots = np.flatnonzero(self.app_array == session)
+            # position of every timeslot among those of the application, modulo a full cycle
+            k = np.arange(len(timeslots)) % (number * n_qc_blocks)
+            session_id_array[timeslots] = first_session_id + k // n_qc_blocks
+            qc_index_array[timeslots] = k % n_qc_blocks
+
+        self.session_id_array = session_id_array
+        self.qc_index_array = qc_index_array
+        self._invalidate_lookup_tables()
 
     def get_session_start_times(self, session):
-        start_times = []
-        for i, (s, _) in enumerate(self.sessions):
-            if s == session:
-                start_times.append(self.start_times[i])
-        if len(start_times) > 0:
-            return start_times
-        else:
-            return None
+        """
+        :param session: Session ID (or application, if the sessions are not rewritten yet)
+        :return: Start times of the timeslots of the session, or None if it has none
+        """
+        if self._start_times_by_session is None:
+            self._build_lookup_tables()
+        start_times = self._start_times_by_session.get(session)
+        return start_times.tolist() if start_times is not None else None
 
     def get_qc_block_start_times(self, qc_index):
-        start_times = []
-        for i, (_, qc_i) in enumerate(self.sessions):
-            if qc_i == qc_index:
-                start_times.append(self.start_times[i])
-        if len(start_times) > 0:
-            return start_times
-        else:
-            return None
+        """
+        :return: Start times of the timeslots of the QC index, or None if it has none
+        """
+        if self._start_times_by_qc_index is None:
+            self._build_lookup_tables()
+        start_times = self._start_times_by_qc_index.get(qc_index)
+        return start_times.tolist() if start_times is not None else None
+
+    def get_slots(self, session, qc_index):
+        """
+        Timeslots that a QC block can be scheduled in, i.e. those assigned to both its session and its QC index.
+
+        :return: Sorted list of start times
+        """
+        if self._start_times_by_session is None or self._start_times_by_qc_index is None:
+            self._build_lookup_tables()
+        empty = np.zeros(0, dtype=np.int64)
+        return np.intersect1d(self._start_times_by_session.get(session, empty),
+                              self._start_times_by_qc_index.get(qc_index, empty)).tolist()
+
+
+def _generate_network_schedule(job):
+    dataset_id, n_sessions, length_factor, seed = job
+    return NetworkSchedule(dataset_id=dataset_id, n_sessions=n_sessions, save=False, seed=seed,
+                           length_factor=length_factor)
 
 
 if __name__ == '__main__':
@@ -354,6 +545,11 @@ if __name__ == '__main__':
     # length factor
     parser.add_argument('-l', '--length_factor', required=False, type=int, default=3,
                         help="Seed for randomly generating the network schedule.")
+    # bulk generation
+    parser.add_argument('-n', '--n_ns', required=False, type=int, default=None,
+                        help="Generate (and save) this many network schedules at once.")
+    parser.add_argument('-w', '--workers', required=False, type=int, default=1,
+                        help="Number of processes generating network schedules in bulk.")
     # logging
     parser.add_argument('--log', dest='loglevel', type=str, required=False, default="INFO",
                         help="Set log level: DEBUG, INFO, WARNING, ERROR, or CRITICAL")
@@ -361,5 +557,12 @@ if __name__ == '__main__':
 
     setup_logging(args.loglevel)
 
-    NetworkSchedule(dataset_id=args.dataset_id, n_sessions=args.n_sessions, save=args.save,
-                    filename=args.save_schedule_filename, seed=args.seed, length_factor=args.length_factor)
+    if args.n_ns is not None:
+        from program_scheduling.schedule_catalog import ScheduleCatalog
+        # the network schedules are added to the catalog, from whose names the IDs of later ones are taken
+        ScheduleCatalog().add_network_schedules(NetworkSchedule.generate_network_schedules(
+            dataset_id=args.dataset_id, n_sessions=args.n_sessions, length_factor=args.length_factor,
+            n=args.n_ns, workers=args.workers, first_id=args.seed))
+    else:
+        NetworkSchedule(dataset_id=args.dataset_id, n_sessions=args.n_sessions, save=args.save,
+                        filename=args.save_schedule_filename, seed=args.seed, length_factor=args.length_factor)
@@ -0,0 +1,37 @@
+import os
+
+import yaml
+
+
+class NodeMetadata:
+    # resources are stored in this order, e.g. in the capacities of a node and the resource requirements of a block
+    RESOURCES = ["CPU", "QPU"]
+
+    def __init__(self, role, yaml_file=None):
+        """
+        Resources of a node, as defined in the node configuration. A resource that is not listed has a capacity of 1,
+        and the number of qubits is unlimited if it is not listed.
+
+        :param role: Name of the node in the configuration (alice or bob)
+        :param yaml_file: Path of the node configuration, defaults to `configs/nodes.yml`
+        """
+        if yaml_file is None:
+            yaml_file = os.path.dirname(__file__).rstrip("program_scheduling") + "configs/nodes.yml"
+        with open(yaml_file, 'r') as file_handle:
+            config = yaml.load(file_handle, yaml.SafeLoader) or {}
+
+        if role not in config.keys():
+            raise ValueError(f"Node {role} is not defined in node configuration")
+
+        self.role = role
+        self.capacities = [config.get(role).get(resource, 1) for resource in self.RESOURCES]
+        for resource, capacity in zip(self.RESOURCES, self.capacities):
+            if not isinstance(capacity, int) or capacity < 1:
+                raise ValueError(f"Capacity of {resource} of node {role} should be a positive integer")
+        self.qubits = config.get(role).get("qubits")
+        if self.qubits is not None and (not isinstance(self.qubits, int) or self.qubits < 1):
+            raise ValueError(f"Number of qubits of node {role} should be a positive integer")
+
+    def __str__(self):
+        return f"Node {self.role}: " + ", ".join(f"{resource} capacity = {capacity}" for resource, capacity in
+                                                 zip(self.RESOURCES, self.capacities)) + f", qubits = {self.qubits}"
@@ -1,67 +1,166 @@
 import logging
 import os
+import re
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np
 import pandas as pd
-from pycsp3 import VarArray, Cumulative, satisfy, minimize, Maximum, compile, solver, ACE, \
-    status, clear, SAT, OPTIMUM, UNSAT, UNKNOWN, solution
+from pycsp3 import Var, VarArray, Cumulative, LexIncreasing, Sum, satisfy, minimize, compile, solver, ACE, \
+    status, clear, SAT, OPTIMUM, solution, posted
 from termcolor import cprint
 
 from program_scheduling.datasets import create_dataset
 from program_scheduling.activity_metadata import ActiveSet
+from program_scheduling.anchor_decomposition import AnchorDecomposition
+from program_scheduling.feasibility_check import FeasibilityCheck
+from program_scheduling.large_neighbourhood_search import LargeNeighbourhoodSearch
+from program_scheduling.list_scheduler import ListScheduler
+from program_scheduling.lower_bounds import LowerBounds
 from program_scheduling.network_schedule import NetworkSchedule
+from program_scheduling.node_metadata import NodeMetadata
+from program_scheduling.rolling_horizon import RollingHorizon
+from program_scheduling.schedule_cache import NodeScheduleCache
+from program_scheduling.schedule_catalog import ScheduleCatalog
+from program_scheduling.solver_portfolio import SolverPortfolio
+from program_scheduling.time_windows import TimeWindows
 
 logger = logging.getLogger("program_scheduling")
 
 
 class NodeSchedule:
+    # statuses for which start times are available
+    FEASIBLE_STATUSES = ["SAT", "FEASIBLE_NOT_PROVEN"]
+    # schedule types that are tried, in this order, if a time-limited solve does not find any node schedule
+    FALLBACK_TYPES = ["OPT", "HEU", "NAIVE"]
 
     def __init__(self, dataset_id, n_sessions, ns_id, role, schedule_type="HEU", save_schedule=True, save_metrics=True,
-                 ns_length_factor=3, start_times=None, filename=None):
+                 ns_length_factor=3, start_times=None, filename=None, priority_rule="EST", use_cache=True,
+                 symmetry_breaking=False, time_limit=None, portfolio=False, catalog=None, capacities=None,
+                 qubits=None, joint=False, peer=None, window_size=None, active_set=None, frozen=None,
+                 decompose=False, segment_workers=1, bounds=None, fallback=True, lns_budget=60, lns_iterations=100,
+                 lns_sessions=2):
         self.dataset_id = dataset_id
         self.n_sessions = n_sessions
         self.ns_id = ns_id
         self.schedule_type = schedule_type
         self.role = role
+        self.priority_rule = priority_rule
+        # https://github.com/xcsp3team/pycsp3/blob/master/docs/optionsSolvers.pdf
+        # here you can possibly define other heuristics to use
+        self.solver_options = {}
+        self.symmetry_breaking = symmetry_breaking
+        # wall-clock budget in seconds of a single solver call (None means no limit)
+        self.time_limit = time_limit
+        # whether a time-limited solve that does not find any node schedule falls back to the next schedule type
+        self.fallback = fallback
+        self.fallback_type = None
+        # race several solver configurations instead of only using ACE with `solver_options`
+        self.portfolio = portfolio
+        self.solver_name = None
+        self.incumbents = []
+        self.cache = NodeScheduleCache() if use_cache else None
+        self.time_windows = None
+        self.domain_reduction = None
+        self.lower_bounds = None
+        self.infeasibility_reason = None
+        # number of variables and constraints, size in bytes of the XCSP file and time taken to build the model
+        self.model_size = None
+        self._n_frozen_segments = 0
         self.length_factor = 1 if ns_id is None else ns_length_factor
+        # network schedules are read from (and node schedules saved to) the catalog
+        self.catalog = catalog if catalog is not None else ScheduleCatalog()
+        # capacity of [CPU, QPU] and number of qubits (None means unlimited), taken from the node configuration if not
+        # given
+        node = NodeMetadata(role)
+        self.capacities = list(capacities) if capacities is not None else node.capacities
+        self.qubits = qubits if qubits is not None else node.qubits
+        # in joint mode, the node schedules of both nodes are created by a single model, where `peer` is the node
+        # schedule of the other node
+        self.joint = joint
+        self.peer = peer
+        if joint and schedule_type == "LIST":
+            raise ValueError("The list scheduler cannot create joint node schedules.")
+        # with a window size, the sessions are scheduled in windows of this many sessions (see `RollingHorizon`),
+        # where `frozen` is the rolling horizon of the node schedule whose window this node schedule is
+        self.window_size = window_size
+        self.frozen = frozen
+        if window_size is not None and (joint or schedule_type == "LIST"):
+            raise ValueError("Rolling-horizon node schedules can neither be joint nor created by the list scheduler.")
+        # with `decompose`, independent segments between anchors (see `AnchorDecomposition`) are scheduled by separate
+        # models, in `segment_workers` processes, where `bounds` are the time windows of the blocks of a segment
+        self.decompose = decompose
+        self.segment_workers = segment_workers
+        self.bounds = bounds
+        self.n_segments = None
+        if decompose and (joint or window_size is not None):
+            raise ValueError("Decomposed node schedules can neither be joint nor scheduled in windows.")
+        # the LNS schedule type improves a HEU node schedule by a large-neighbourhood search (see
+        # `LargeNeighbourhoodSearch`) that frees `lns_sessions` sessions per iteration, for at most `lns_iterations`
+        # iterations or `lns_budget` seconds
+        self.lns_budget = lns_budget
+        self.lns_iterations = lns_iterations
+        self.lns_sessions = lns_sessions
+        if schedule_type == "LNS" and (joint or window_size is not None or decompose):
+            raise ValueError("Large-neighbourhood search node schedules can neither be joint, scheduled in windows "
+                             "nor decomposed.")
 
         dataset = create_dataset(dataset_id, n_sessions)
         if ns_id is not None:
-            ns_name = NetworkSchedule.get_name(dataset_id=dataset_id, n_sessions=n_sessions, ns_id=ns_id,
-                                               length_factor=ns_length_factor)
-            folder_path = os.path.dirname(__file__).rstrip("program_scheduling") + "network_schedules"
-            ns_csv = pd.read_csv(f"{folder_path}/{ns_name}.csv")
-
-            network_schedule = NetworkSchedule(dataset_id=dataset_id, n_sessions=n_sessions,
-                                               sessions=list(ns_csv["session"]),
-                                               start_times=list(map(lambda x: int(x), ns_csv["start_time"])),
-                                               length_factor=ns_length_factor)
+            network_schedule = self.catalog.get_network_schedule(dataset_id=dataset_id, n_sessions=n_sessions,
+                                                                 length_factor=ns_length_factor, ns_id=ns_id)
             network_schedule.rewrite_sessions(dataset)
         else:
             network_schedule = None
 
-        self.active_set = ActiveSet.create_active_set(dataset=dataset, role=role, network_schedule=network_schedule)
+        if active_set is None:
+            active_set = ActiveSet.create_active_set(dataset=dataset, role=role, network_schedule=network_schedule)
+        self.active_set = active_set
 
-        if start_times is not None:
+        if start_times is not None or peer is not None:
+            # the start times of a peer are set by the joint solve of the node schedule that created it
             self.start_times = start_times
-            solve_time = None
+            self.status = None
+            self.solve_time = None
         else:
-            self.status, self.start_times, solve_time = self.construct_node_schedule(network_schedule=network_schedule,
-                                                                                     schedule_type=schedule_type)
+            if joint:
+                self.peer = NodeSchedule(dataset_id=dataset_id, n_sessions=n_sessions, ns_id=ns_id,
+                                         role="bob" if role == "alice" else "alice", schedule_type=schedule_type,
+                                         save_schedule=False, save_metrics=False, ns_length_factor=ns_length_factor,
+                                         priority_rule=priority_rule, use_cache=use_cache,
+                                         symmetry_breaking=symmetry_breaking, time_limit=time_limit,
+                                         portfolio=portfolio, catalog=self.catalog, capacities=capacities,
+                                         qubits=qubits, joint=True, peer=self)
+                if self.peer.active_set.get_gcd() != self.active_set.get_gcd():
+                    raise ValueError("Joint node schedules require the block durations of both nodes to have the "
+                                     "same greatest common divisor.")
+            self.status, self.start_times, self.solve_time = \
+                self.construct_node_schedule(network_schedule=network_schedule, schedule_type=schedule_type)
+            if self.peer is not None:
+                self._share_with_peer()
 
         self.makespan = None
         self.PUF_both = None
         self.PUF_CPU = None
         self.PUF_QPU = None
 
+        if peer is None:
+            self._save(save_schedule, save_metrics, filename)
+            if self.peer is not None:
+                self.peer._save(save_schedule, save_metrics)
+
+    def _save(self, save_schedule, save_metrics, filename=None):
         if save_schedule and self.start_times is not None:
             if filename is None:
-                filename = NodeSchedule.get_name(dataset_id=dataset_id, n_sessions=n_sessions, ns_id=ns_id,
-                                                 length_factor=self.length_factor, schedule_type=schedule_type,
-                                                 role=role)
+                filename = NodeSchedule.get_name(dataset_id=self.dataset_id, n_sessions=self.n_sessions,
+                                                 ns_id=self.ns_id, length_factor=self.length_factor,
+                                                 schedule_type=NodeSchedule.get_label(self.schedule_type, self.joint,
+                                                                                      self.window_size),
+                                                 role=self.role)
             self.save_node_schedule(filename=filename)
         if save_metrics and self.start_times is not None:
-            self.save_success_metrics(solve_time=solve_time)
+            self.save_success_metrics()
 
     @staticmethod
     def get_name(dataset_id, n_sessions, schedule_type, length_factor=None, ns_id=None, role=None):
@@ -72,53 +171,447 @@ class NodeSchedule:
                f"length-{length_factor}_NS-{ns_id}_role-{role}"
 
     @staticmethod
-    def get_relevant_node_schedule_names(dataset_id, n_sessions, schedule_type):
-        relevant_node_schedule_names = []
-        folder_path = os.path.dirname(__file__).rstrip("program_scheduling") + "node_schedules"
-        filename_part = NodeSchedule.get_name(dataset_id=dataset_id, n_sessions=n_sessions, schedule_type=schedule_type)
-        for f in os.listdir(folder_path):
-            if filename_part in f:
-                relevant_node_schedule_names.append(f[:-8] if "bob" in f else f[:-10])
-        unique = list(set(relevant_node_schedule_names))
-        unique.sort()
-        return unique
+    def get_label(schedule_type, joint=False, window_size=None):
+        """
+        :return: Schedule type under which node schedules and their metrics are saved, which keeps joint and
+            rolling-horizon node schedules apart from the others
+        """
+        if window_size is not None:
+            return f"{schedule_type}_WINDOW{window_size}"
+        return f"{schedule_type}_JOINT" if joint else schedule_type
 
-    def construct_node_schedule(self, network_schedule, schedule_type):
+    @staticmethod
+    def get_relevant_node_schedule_names(dataset_id, n_sessions, schedule_type, catalog=None):
+        catalog = catalog if catalog is not None else ScheduleCatalog()
+        return catalog.get_node_schedule_names(dataset_id=dataset_id, n_sessions=n_sessions,
+                                               schedule_type=schedule_type)
+
+    def _prepare(self, network_schedule):
+        """
+        Scales the blocks and the network schedule down and calculates the time windows, the lower bounds and whether
+        the node schedule can exist at all.
+
+        :return: Tuple of the scaled durations, maximum time lags and network schedule and the schedule size
+        """
         scaled_durations, scaled_d_max = self.active_set.scale_down()
+        scaled_network_schedule = None
         if network_schedule is not None:
             scaled_network_schedule = NetworkSchedule.scale_down(network_schedule, self.active_set.get_gcd())
 
         # in case a session with post-processing is scheduled right at the end of NS (currently dominated by QKD)
         extra_margin = int(35_000_000 / self.active_set.get_gcd())
-        schedule_size = scaled_network_schedule.length + extra_margin if network_schedule is not None \
-            else int(sum(scaled_durations))
+        if scaled_network_schedule is not None:
+            schedule_size = scaled_network_schedule.length + extra_margin
+        else:
+            # in joint mode, the blocks of a node might have to wait for all blocks of the other node
+            schedule_size = int(sum(scaled_durations)) + (int(sum(self.peer.active_set.scale_down()[0]))
+                                                          if self.joint else 0)
+            if self.frozen is not None:
+                # the blocks of a window might have to wait for all frozen blocks (or the release time)
+                schedule_size += max(self.frozen.get_end(), self.frozen.release)
+        bounds = self.bounds
+        if bounds is not None:
+            # the blocks of a segment cannot start later than their bounds allow
+            schedule_size = max(bounds[1]) + 1
+        elif self.frozen is not None and self.frozen.release > 0:
+            # the blocks of a window cannot start before the release time
+            bounds = ([self.frozen.release] * self.active_set.n_blocks, [schedule_size - 1] * self.active_set.n_blocks)
         logger.debug(f"Length of network schedule is {schedule_size}")
-        capacities = [1, 1]  # capacity of [CPU, QPU]
+        if self.joint:
+            # a QC block can wait for the other node to be ready and a CC block for the message it receives from the
+            # other node, even within a critical section
+            waiting = [i for (i, _) in self.active_set.get_qc_pairs(self.peer.active_set)] + \
+                [j for (_, j) in self.active_set.get_messages(self.peer.active_set)]
+            for j in waiting:
+                if scaled_d_max[j] is not None:
+                    scaled_d_max[j] = schedule_size
+
+        self.time_windows = TimeWindows(self.active_set, scaled_durations, scaled_d_max,
+                                        network_schedule=scaled_network_schedule, horizon=schedule_size,
+                                        bounds=bounds)
+        self.domain_reduction = self.time_windows.get_reduction_ratio()
+        logger.info(f"Time windows remove {round(self.domain_reduction * 100, 2)}% of the variable domains.")
+
+        self.infeasibility_reason = FeasibilityCheck(self.active_set, scaled_durations,
+                                                     network_schedule=scaled_network_schedule,
+                                                     time_windows=self.time_windows,
+                                                     capacities=self.capacities, qubits=self.qubits).get_reason()
+        if self.infeasibility_reason is None:
+            self.lower_bounds = LowerBounds(self.active_set, scaled_durations,
+                                            network_schedule=scaled_network_schedule,
+                                            time_windows=self.time_windows, capacities=self.capacities)
+            logger.debug(f"Lower bounds on the makespan are {self.lower_bounds.get_bounds()}")
+        return scaled_durations, scaled_d_max, scaled_network_schedule, schedule_size
+
+    def construct_node_schedule(self, network_schedule, schedule_type):
+        """
+        :return: Tuple of the status, the start times of the blocks and the time taken, where in joint mode the start
+            times of the blocks of the peer follow those of this node
+        """
+        start = time.time()
+        scaled_durations, scaled_d_max, scaled_network_schedule, schedule_size = self._prepare(network_schedule)
+        capacities = self.capacities
+        peer_model = None
+        if self.peer is not None:
+            peer_durations, peer_d_max, peer_network_schedule, _ = self.peer._prepare(network_schedule)
+            peer_model = (peer_durations, peer_d_max, peer_network_schedule)
+            # neither node schedule exists if one of them does not
+            for node, other in [(self, self.peer), (self.peer, self)]:
+                if node.infeasibility_reason is None and other.infeasibility_reason is not None:
+                    node.infeasibility_reason = f"the node schedule of {other.role} cannot exist, as " \
+                                                f"{other.infeasibility_reason}"
+
+        # reject node schedules that provably do not exist before building (or looking up) any model
+        if self.infeasibility_reason is not None:
+            logger.info(f"No feasible node schedule can be found, as {self.infeasibility_reason}.")
+            return "UNSAT", None, time.time() - start
+
+        cache_key = None
+        if self.cache is not None:
+            options = {"schedule_size": schedule_size, "capacities": capacities, "qubits": self.qubits,
+                       "solver_options": self.solver_options,
+                       "priority_rule": self.priority_rule if schedule_type == "LIST" else None,
+                       "symmetry_breaking": self.symmetry_breaking,
+                       "portfolio": self.portfolio, "window_size": self.window_size,
+                       "decompose": self.decompose,
+                       "lns": [self.lns_budget, self.lns_iterations, self.lns_sessions]
+                       if schedule_type == "LNS" else None}
+            if peer_model is not None:
+                options["peer"] = NodeScheduleCache.get_key(self.peer.active_set, *peer_model, schedule_type,
+                                                            {"capacities": self.peer.capacities,
+                                                             "qubits": self.peer.qubits})
+                options["messages"] = [self.active_set.get_messages(self.peer.active_set),
+                                       self.peer.active_set.get_messages(self.active_set)]
+            cache_key = NodeScheduleCache.get_key(self.active_set, scaled_durations, scaled_d_max,
+                                                  scaled_network_schedule, schedule_type, options)
+            cached = self.cache.load(cache_key)
+            if cached is not None:
+                logger.info(f"Found cached node schedule for {self.role} with {self.n_sessions} sessions of dataset "
+                            f"{self.dataset_id} (status {cached[0]}, originally solved in {round(cached[2], 4)} "
+                            f"seconds).")
+                return cached
+
+        segments = None
+        if self.decompose and schedule_type not in ["LIST", "LNS"]:
+            segments = AnchorDecomposition(self.active_set, scaled_durations, scaled_d_max, self.time_windows,
+                                           limited_qubits=self.qubits is not None,
+                                           ordered=schedule_type == "NAIVE").segments
+            self.n_segments = len(segments)
+
+        if schedule_type == "LNS":
+            result = self._construct_lns_schedule(network_schedule, scaled_durations)
+        elif schedule_type == "LIST":
+            result = self._construct_list_schedule(scaled_durations, scaled_d_max, scaled_network_schedule,
+                                                   schedule_size, capacities)
+        elif self.window_size is not None and len(self.active_set.session_ranges) > self.window_size:
+            result = self._construct_rolling_schedule(scaled_durations, scaled_network_schedule, schedule_type)
+        elif segments is not None and len(segments) > 1:
+            result = self._construct_decomposed_schedule(segments, schedule_type)
+        else:
+            result = self._construct_csp_schedule(scaled_durations, scaled_d_max, scaled_network_schedule,
+                                                  schedule_size, capacities, schedule_type, peer_model)
+
+        if cache_key is not None:
+            self.cache.save(cache_key, *result)
+
+        if result[0] == "UNKNOWN" and self.time_limit is not None and self.fallback and \
+                schedule_type in self.FALLBACK_TYPES[:-1]:
+            fallback_type = self.FALLBACK_TYPES[self.FALLBACK_TYPES.index(schedule_type) + 1]
+            logger.info(f"No node schedule was found within {self.time_limit} seconds, falling back to the "
+                        f"{fallback_type} approach.")
+            self.fallback_type = fallback_type
+            status, start_times, solve_time = self.construct_node_schedule(network_schedule, fallback_type)
+            result = (status, start_times, result[2] + solve_time)
+        return result
+
+    def _construct_csp_schedule(self, scaled_durations, scaled_d_max, scaled_network_schedule, schedule_size,
+                                capacities, schedule_type, peer_model=None):
+        """
+        :param peer_model: Tuple of the scaled durations, maximum time lags and network schedule of the peer, if the
+            node schedules of both nodes are created by this model
+        """
+        build_start = time.time()
+        domains = [self._get_domain(i) for i in range(self.active_set.n_blocks)]
+        if any(len(domain) == 0 for domain in domains):
+            logger.info("No feasible node schedule can be found around the frozen blocks.")
+            return "UNSAT", None, time.time() - build_start
+        # x[i] is the starting time of the ith job, restricted to its time window
+        x = VarArray(size=self.active_set.n_blocks, dom=lambda i: domains[i])
+        self._post_node_constraints(x, scaled_durations, scaled_d_max, scaled_network_schedule, capacities,
+                                    schedule_type, self.symmetry_breaking)
+        n_blocks = self.active_set.n_blocks
+        ends = [x[i] + scaled_durations[i] for i in range(self.active_set.n_blocks)]
+        lower_bound = self.lower_bounds.get_bound()
+        max_duration = max(scaled_durations)
+
+        if peer_model is not None:
+            # y[i] is the starting time of the ith job of the peer
+            y = VarArray(size=self.peer.active_set.n_blocks, dom=lambda i: self.peer.time_windows.domain(i))
+            # a permutation of interchangeable sessions has to be applied to both nodes, so only the symmetry breaking
+            # constraints of this node are added
+            self.peer._post_node_constraints(y, *peer_model, self.peer.capacities, schedule_type, False)
+            satisfy(
+                self._joint_constraints(x, y, scaled_durations, peer_model[0])
+            )
+            n_blocks += self.peer.active_set.n_blocks
+            ends += [y[i] + peer_model[0][i] for i in range(self.peer.active_set.n_blocks)]
+            lower_bound = max(lower_bound, self.peer.lower_bounds.get_bound())
+            max_duration = max(max_duration, max(peer_model[0]))
+
+        # optional objective function
+        if schedule_type == "OPT":
+            # the domain of the makespan starts at the lower bound, so the solver stops as soon as a schedule reaches it
+            makespan = Var(dom=range(lower_bound, schedule_size + max_duration + 1))
+            satisfy(
+                [end <= makespan for end in ends]
+            )
+            minimize(
+                makespan
+            )
+
+        instance = compile()
+        self.model_size = {
+            "n_variables": n_blocks + self._n_frozen_segments + (1 if schedule_type == "OPT" else 0),
+            "n_constraints": len(posted()),
+            "xcsp_bytes": os.path.getsize(instance[0]),
+            "build_time": time.time() - build_start
+        }
+        logger.debug(f"Built model with {self.model_size['n_variables']} variables and "
+                     f"{self.model_size['n_constraints']} constraints ({self.model_size['xcsp_bytes']} bytes) in "
+                     f"{round(self.model_size['build_time'], 4)} seconds.")
+
+        start = time.time()
+        if self.portfolio:
+            solver_status, values, self.solver_name, log_file = \
+                SolverPortfolio(time_limit=self.time_limit).solve(instance)
+        else:
+            solver_status, values, log_file = self._solve_with_ace(instance)
+            self.solver_name = "ACE"
+        end = time.time()
+
+        stat = None
+        start_times = None
+        solve_time = end - start
+
+        if schedule_type == "OPT":
+            self.incumbents = self._read_incumbents(log_file)
+
+        roles = self.role if peer_model is None else f"{self.role} and {self.peer.role}"
+        if solver_status in ["SAT", "OPTIMUM"]:
+            # the start times come first (those of the peer after those of this node), followed by the makespan
+            start_times = [s * self.active_set.get_gcd() for s in values[:n_blocks]]
+            # when the time limit is reached, the solver returns the best schedule found so far
+            stat = "FEASIBLE_NOT_PROVEN" if solver_status == "SAT" and schedule_type == "OPT" \
+                and self.time_limit is not None else "SAT"
+
+            logger.info(f"Found node schedule for {roles} with {self.n_sessions} sessions of "
+                        f"dataset {self.dataset_id} in {round(solve_time, 2)} seconds (status {stat}).")
+
+            # remove PyCSP log files
+            for filename in os.listdir():
+                if filename.endswith(".log") or filename.endswith(".xml"):
+                    os.remove(filename)
+
+        elif solver_status == "UNKNOWN":
+            stat = "UNKNOWN"
+            logger.info("The solver cannot find a solution. (The problem might be too large.) "
+                        "Time taken to finish: %.4f seconds" % solve_time)
+        elif solver_status == "UNSAT":
+            stat = "UNSAT"
+            logger.info("No feasible node schedule can be found. Time taken to finish: %.4f seconds" % solve_time)
+        else:
+            logger.info("Something else went wrong. Time taken to finish: %.4f seconds" % solve_time)
+
+        clear()
+        return stat, start_times, solve_time
+
+    def _construct_rolling_schedule(self, scaled_durations, scaled_network_schedule, schedule_type):
+        """
+        Schedules the sessions window by window (see `RollingHorizon`), each by a model of its own that sees the blocks
+        of the earlier windows as frozen. The windows are not optimised together, so the node schedule is never proven
+        optimal, and a window for which no node schedule is found leaves the status UNKNOWN (which triggers the
+        fallback if there is a time limit). Maximum time lags only link sessions within the same window.
+        """
+        start = time.time()
+        rolling_horizon = RollingHorizon(self.active_set, scaled_durations, self.window_size,
+                                         network_schedule=scaled_network_schedule)
+        gcd = self.active_set.get_gcd()
+        stat = "SAT"
+        for k, session_ids in enumerate(rolling_horizon.windows):
+            window = NodeSchedule(dataset_id=self.dataset_id, n_sessions=self.n_sessions, ns_id=self.ns_id,
+                                  role=self.role, schedule_type=schedule_type, save_schedule=False, save_metrics=False,
+                                  ns_length_factor=self.length_factor, use_cache=False,
+                                  symmetry_breaking=self.symmetry_breaking, time_limit=self.time_limit,
+                                  portfolio=self.portfolio, catalog=self.catalog, capacities=self.capacities,
+                                  qubits=self.qubits, active_set=self.active_set.select_sessions(session_ids),
+                                  frozen=rolling_horizon, fallback=False)
+            logger.info(f"Window {k + 1} of {len(rolling_horizon.windows)} with sessions {sorted(session_ids)} took "
+                        f"{round(window.solve_time, 2)} seconds (status {window.status}).")
+            # the largest model of all windows is reported
+            if window.model_size is not None and (self.model_size is None or
+                                                  window.model_size["n_variables"] > self.model_size["n_variables"]):
+                self.model_size = window.model_size
+            self.solver_name = window.solver_name
+            if window.status not in self.FEASIBLE_STATUSES:
+                if window.infeasibility_reason is not None:
+                    # the sessions of the window cannot be scheduled at all, let alone together with the others
+                    self.infeasibility_reason = window.infeasibility_reason
+                    return "UNSAT", None, time.time() - start
+                return "UNKNOWN", None, time.time() - start
+            if window.status == "FEASIBLE_NOT_PROVEN":
+                stat = window.status
+            blocks = [i for s in sorted(session_ids) for i in self.active_set.get_session_blocks(s)]
+            rolling_horizon.freeze(blocks, [t // gcd for t in window.start_times])
+
+        solve_time = time.time() - start
+        logger.info(f"Found node schedule for {self.role} with {self.n_sessions} sessions of dataset {self.dataset_id} "
+                    f"in {len(rolling_horizon.windows)} windows in {round(solve_time, 2)} seconds.")
+        if stat == "SAT" and schedule_type == "OPT":
+            # every window is optimal on its own, but the node schedule is not
+            stat = "FEASIBLE_NOT_PROVEN"
+        return stat, [rolling_horizon.start_times[i] * gcd for i in range(self.active_set.n_blocks)], solve_time
+
+    def _construct_lns_schedule(self, network_schedule, scaled_durations):
+        """
+        Improves a HEU node schedule by a large-neighbourhood search (see `LargeNeighbourhoodSearch`): in every
+        iteration, the sessions of a neighbourhood are scheduled again by an OPT model of their own that sees the blocks
+        of all other sessions as frozen (see `RollingHorizon`), and the result is kept unless it increases the
+        makespan. The search stops after `lns_iterations` iterations, once `lns_budget` seconds (including the HEU
+        node schedule) are used up or once the makespan reaches its lower bound. The improving makespans are kept as
+        incumbents.
+        """
+        start = time.time()
+        status, start_times, _ = self.construct_node_schedule(network_schedule, "HEU")
+        if status not in self.FEASIBLE_STATUSES:
+            return status, None, time.time() - start
+        gcd = self.active_set.get_gcd()
+        scaled_start_times = [t // gcd for t in start_times]
+        makespan = max(t + int(d) for (t, d) in zip(scaled_start_times, scaled_durations))
+        lower_bound = self.lower_bounds.get_bound()
+        self.incumbents = [(round(time.time() - start, 4), makespan * gcd)]
+        search = LargeNeighbourhoodSearch(self.active_set, scaled_durations, n_free=self.lns_sessions)
+        n_iterations = 0
+        while n_iterations < self.lns_iterations and makespan > lower_bound:
+            remaining = self.lns_budget - (time.time() - start)
+            if remaining < 1:
+                break
+            session_ids = search.get_neighbourhood(n_iterations, scaled_start_times)
+            n_iterations += 1
+            blocks = [i for s in session_ids for i in self.active_set.get_session_blocks(s)]
+            frozen = RollingHorizon(self.active_set, scaled_durations, 1)
+            others = sorted(set(range(self.active_set.n_blocks)) - set(blocks))
+            frozen.freeze(others, [scaled_start_times[i] for i in others])
+            neighbourhood = NodeSchedule(dataset_id=self.dataset_id, n_sessions=self.n_sessions, ns_id=self.ns_id,
+                                         role=self.role, schedule_type="OPT", save_schedule=False,
+                                         save_metrics=False, ns_length_factor=self.length_factor, use_cache=False,
+                                         symmetry_breaking=self.symmetry_breaking,
+                                         time_limit=int(min(remaining, self.time_limit or remaining)),
+                                         portfolio=self.portfolio, catalog=self.catalog, capacities=self.capacities,
+                                         qubits=self.qubits, active_set=self.active_set.select_sessions(session_ids),
+                                         frozen=frozen, fallback=False)
+            if neighbourhood.status in self.FEASIBLE_STATUSES:
+                candidate = list(scaled_start_times)
+                for i, t in zip(blocks, neighbourhood.start_times):
+                    candidate[i] = t // gcd
+                candidate_makespan = max(t + int(d) for (t, d) in zip(candidate, scaled_durations))
+                if candidate_makespan <= makespan:
+                    scaled_start_times = candidate
+                    if candidate_makespan < makespan:
+                        makespan = candidate_makespan
+                        self.incumbents.append((round(time.time() - start, 4), makespan * gcd))
+            logger.info(f"LNS iteration {n_iterations} with sessions {session_ids} took "
+                        f"{round(neighbourhood.solve_time, 2)} seconds (status {neighbourhood.status}), makespan is "
+                        f"{makespan * gcd}.")
+
+        solve_time = time.time() - start
+        logger.info(f"Found node schedule for {self.role} with {self.n_sessions} sessions of dataset {self.dataset_id} "
+                    f"in {n_iterations} LNS iterations in {round(solve_time, 2)} seconds, improving the makespan from "
+                    f"{self.incumbents[0][1]} to {makespan * gcd}.")
+        # the node schedule is only proven optimal if it reaches the lower bound
+        stat = "SAT" if makespan <= lower_bound else "FEASIBLE_NOT_PROVEN"
+        return stat, [t * gcd for t in scaled_start_times], solve_time
+
+    def _construct_decomposed_schedule(self, segments, schedule_type):
+        """
+        Schedules every segment (see `AnchorDecomposition`) by a model of its own, restricted to the time windows its
+        blocks have in the whole active set, and stitches the start times together. The node schedule exists if all
+        segments can be scheduled, and its makespan is that of the last segment, so with the OPT approach only the last
+        segment is optimised (and the node schedule is optimal if it is). Segments do not fall back on their own: if
+        one of them is not scheduled within the time limit, the status is UNKNOWN and the whole active set falls back.
+        Symmetry breaking is left to the models of whole active sets, as sessions are split over several segments.
+        """
+        start = time.time()
+        est, lst = self.time_windows.est, self.time_windows.lst
+        jobs = [dict(dataset_id=self.dataset_id, n_sessions=self.n_sessions, ns_id=self.ns_id, role=self.role,
+                     schedule_type="HEU" if schedule_type == "OPT" and k < len(segments) - 1 else schedule_type,
+                     ns_length_factor=self.length_factor, time_limit=self.time_limit, portfolio=self.portfolio,
+                     catalog=self.catalog, capacities=self.capacities, qubits=self.qubits,
+                     active_set=self.active_set.select_blocks(blocks),
+                     bounds=([est[i] for i in blocks], [lst[i] for i in blocks]), fallback=False)
+                for k, blocks in enumerate(segments)]
+        if self.segment_workers > 1:
+            with ProcessPoolExecutor(max_workers=self.segment_workers) as executor:
+                results = list(executor.map(_construct_segment, jobs))
+        else:
+            results = list(map(_construct_segment, jobs))
+
+        start_times = [None] * self.active_set.n_blocks
+        for k, (blocks, (status, segment_start_times, reason, solver_name, model_size, incumbents, solve_time)) in \
+                enumerate(zip(segments, results)):
+            logger.info(f"Segment {k + 1} of {len(segments)} with {len(blocks)} blocks from {est[blocks[0]]} took "
+                        f"{round(solve_time, 2)} seconds (status {status}).")
+            # the largest model of all segments is reported
+            if model_size is not None and (self.model_size is None or
+                                           model_size["n_variables"] > self.model_size["n_variables"]):
+                self.model_size = model_size
+            if status == "UNSAT" and reason is not None and self.infeasibility_reason is None:
+                self.infeasibility_reason = f"segment {k + 1} cannot be scheduled, as {reason}"
+            if segment_start_times is not None:
+                for i, t in zip(blocks, segment_start_times):
+                    start_times[i] = t
+            self.solver_name = solver_name
+            self.incumbents = incumbents
+
+        solve_time = time.time() - start
+        statuses = [result[0] for result in results]
+        if "UNSAT" in statuses:
+            stat = "UNSAT"
+        elif any(status not in self.FEASIBLE_STATUSES for status in statuses):
+            stat = "UNKNOWN"
+        else:
+            # the last segment decides whether the makespan is optimal
+            stat = statuses[-1]
+        if stat not in self.FEASIBLE_STATUSES:
+            logger.info(f"Not all {len(segments)} segments could be scheduled (status {stat}).")
+            return stat, None, solve_time
+        logger.info(f"Found node schedule for {self.role} with {self.n_sessions} sessions of dataset {self.dataset_id} "
+                    f"in {len(segments)} segments in {round(solve_time, 2)} seconds (status {stat}).")
+        return stat, start_times, solve_time
 
-        # x[i] is the starting time of the ith job
-        x = VarArray(size=self.active_set.n_blocks, dom=range(schedule_size))
+    def _post_node_constraints(self, x, scaled_durations, scaled_d_max, scaled_network_schedule, capacities,
+                               schedule_type, symmetry_breaking):
+        """
+        Adds the constraints on the start times `x` of the blocks of this node to the model.
+        """
+        # in a window of a rolling horizon, the resources are partly used by the frozen blocks, whose usage is added to
+        # the cumulative constraints as tasks with a fixed start (the solver only accepts variables as origins)
+        segments = [] if self.frozen is None else \
+            [(k, segment) for k in range(len(capacities)) for segment in self.frozen.get_resource_segments(k)
+             if self._is_reachable(segment[0], segment[0] + segment[1], scaled_durations)]
+        self._n_frozen_segments = len(segments)
+        if len(segments) > 0:
+            frozen = VarArray(size=len(segments), dom=lambda j: {segments[j][1][0]})
 
         # taken from http://pycsp.org/documentation/models/COP/RCPSP/
         def cumulative_for(k):
             # TODO: this doesn't work if session is purely quantum or purely classical
             origins, lengths, heights = zip(*[(x[i], scaled_durations[i], self.active_set.resource_reqs[i][k])
                                               for i in range(self.active_set.n_blocks) if
-                                              self.active_set.resource_reqs[i][k] > 0])
+                                              self.active_set.resource_reqs[i][k] > 0] +
+                                            [(frozen[j], length, units) for j, (resource, (_, length, units))
+                                             in enumerate(segments) if resource == k])
             return Cumulative(origins=origins, lengths=lengths, heights=heights)
 
-        def get_CS_indices():
-            forward = list(zip(self.active_set.ids, self.active_set.cs_ids))
-            backwards = list(zip(self.active_set.ids, self.active_set.cs_ids))
-            backwards.reverse()
-
-            CS_indices = []
-            for (session_id, cs_id) in set(zip(self.active_set.ids, self.active_set.cs_ids)):
-                if cs_id is not None:
-                    CS_indices.append((session_id, cs_id, forward.index((session_id, cs_id)),
-                                       len(forward) - backwards.index((session_id, cs_id)) - 1))
-
-            return CS_indices
-
         # constraints
         satisfy(
             # precedence constraints
@@ -130,19 +623,18 @@ class NodeSchedule:
             [(x[i + 1] - (x[i] + scaled_durations[i])) <= scaled_d_max[i + 1] for i in
              range(self.active_set.n_blocks - 1)
              if (self.active_set.types[i + 1] != "QC" or scaled_d_max[i] is None) and scaled_d_max[i + 1] is not None],
-            [(x[i] < x[start]) | (x[end] < x[i]) for (session_id, cs_id, start, end) in get_CS_indices()
-             for i in range(self.active_set.n_blocks - 1) if
-             (self.active_set.ids[i] != session_id and self.active_set.cs_ids[i] != cs_id)]
+            self._critical_section_constraints(x, scaled_durations, scaled_d_max, scaled_network_schedule),
+            self._memory_constraints(x, scaled_durations)
         )
 
         def get_QC_indices(without=None):
-            indices = [i for i in range(0, self.active_set.n_blocks - 1) if self.active_set.types[i] == "QC"]
+            indices = np.flatnonzero(self.active_set.type_codes[:-1] == ActiveSet.TYPES.index("QC")).tolist()
             if without is not None:
                 for remove in without:
                     indices.remove(remove)
             return indices
 
-        if network_schedule is not None:
+        if scaled_network_schedule is not None:
             satisfy(
                 [x[i] in set(scaled_network_schedule.get_session_start_times(self.active_set.ids[i])) for i in
                  get_QC_indices()],
@@ -157,62 +649,282 @@ class NodeSchedule:
                  if self.active_set.types[i + 1] == "QC" and scaled_d_max[i + 1] is not None]
             )
 
+        if symmetry_breaking and schedule_type != "NAIVE":
+            self._break_symmetries(x, scaled_d_max, scaled_network_schedule)
+
         if schedule_type == "NAIVE":
+            # blocks only depend on blocks with a lower index, so this order respects the precedence constraints
             satisfy(
                 [x[i] < x[i + 1] for i in range(self.active_set.n_blocks - 1)],
             )
 
-        # optional objective function
-        if schedule_type == "OPT":
-            minimize(
-                Maximum([x[i] + scaled_durations[i] for i in range(self.active_set.n_blocks)])
-            )
+    def _get_domain(self, i):
+        """
+        :return: Start times of block i within its time window, where in a window of a rolling horizon the start times
+            within the span of a frozen critical section (with another ID) are removed
+        """
+        domain = self.time_windows.domain(i)
+        if self.frozen is None or i == self.active_set.last_block:
+            return domain
+        times = np.array(domain, dtype=np.int64)
+        return times[RollingHorizon.outside(times, self.frozen.get_cs_spans(self.active_set.cs_ids[i]))].tolist()
 
-        instance = compile()
+    def _is_reachable(self, start, end, scaled_durations):
+        """
+        :return: True if a block can be processed during the time from `start` to `end` (exclusive)
+        """
+        ends = np.array(self.time_windows.lst) + np.array(scaled_durations)
+        return start < ends.max() and end > min(self.time_windows.est)
+
+    def _joint_constraints(self, x, y, scaled_durations, peer_scaled_durations):
+        """
+        Constraints between the start times `x` of the blocks of this node and `y` of the blocks of the peer: both nodes
+        generate entanglement in their QC blocks at the same time, and a CC block cannot start before the block of
+        the other node that sends its message has finished (it then takes the latency of the message).
+
+        :return: List of constraints
+        """
+        peer = self.peer.active_set
+        return [x[i] == y[j] for (i, j) in self.active_set.get_qc_pairs(peer)] + \
+            [y[i] + peer_scaled_durations[i] <= x[j] for (i, j) in self.active_set.get_messages(peer)] + \
+            [x[i] + scaled_durations[i] <= y[j] for (i, j) in peer.get_messages(self.active_set)]
+
+    def _critical_section_constraints(self, x, scaled_durations, scaled_d_max, scaled_network_schedule):
+        """
+        No block of another session (that is not part of a critical section with the same ID) may start between the
+        start of the first and the start of the last block of a critical section. Blocks whose time window lies
+        entirely before or after the span of the critical section satisfy this anyway and are left out. If the blocks
+        of a critical section are chained without any slack, the span has a fixed length and all remaining blocks
+        are kept out of it by a single cumulative constraint, in which the span uses the full capacity. Otherwise, a
+        disjunction is added for every remaining block. In a window of a rolling horizon, the same holds for the
+        frozen blocks.
+
+        :return: List of constraints
+        """
+        n_blocks = self.active_set.n_blocks
+        est = np.array(self.time_windows.est)
+        lst = np.array(self.time_windows.lst)
+        # the last block is not constrained
+        candidates = np.arange(n_blocks) != self.active_set.last_block
+
+        # fixed[k] is True if block k + 1 always starts right after block k has finished
+        fixed = np.zeros(n_blocks, dtype=bool)
+        for k in range(n_blocks - 1):
+            lag_imposed = scaled_d_max[k + 1] is not None and \
+                (scaled_network_schedule is None or self.active_set.types[k + 1] != "QC" or scaled_d_max[k] is None)
+            fixed[k] = lag_imposed and scaled_d_max[k + 1] == 0 and k + 1 in self.active_set.successors[k]
+
+        constraints = []
+        for (session_id, cs_id), (start, end) in sorted(self.active_set.get_cs_spans().items(),
+                                                        key=lambda item: item[1]):
+            cs_code = self.active_set.cs_values.index(cs_id)
+            blocks = np.flatnonzero(candidates & (self.active_set.id_array != session_id)
+                                    & (self.active_set.cs_codes != cs_code)
+                                    & (lst >= est[start]) & (est <= lst[end])).tolist()
+            if self.frozen is not None:
+                length = sum(scaled_durations[start:end]) if fixed[start:end].all() else None
+                constraints += self._frozen_critical_section_constraints(x, start, end, cs_id, length)
+            if len(blocks) == 0:
+                continue
+            if len(blocks) > 1 and fixed[start:end].all():
+                length = sum(scaled_durations[start:end]) + 1
+                constraints.append(Cumulative(origins=[x[start]] + [x[i] for i in blocks],
+                                              lengths=[length] + [1] * len(blocks),
+                                              heights=[len(blocks)] + [1] * len(blocks)) <= len(blocks))
+            else:
+                constraints += [(x[i] < x[start]) | (x[end] < x[i]) for i in blocks]
+        return constraints
+
+    def _frozen_critical_section_constraints(self, x, start, end, cs_id, length=None):
+        """
+        :param length: Fixed time from the start of the first until the start of the last block of the critical
+            section, if there is one
+        :return: List of constraints keeping the frozen blocks from starting within the span of a critical section
+        """
+        starts = self.frozen.get_block_starts(cs_id)
+        starts = starts[(starts >= self.time_windows.est[start]) & (starts <= self.time_windows.lst[end])]
+        if len(starts) == 0:
+            return []
+        if length is not None:
+            # the span cannot start up to its length before a frozen block
+            times = np.array(self.time_windows.domain(start), dtype=np.int64)
+            conflicts = times[~RollingHorizon.outside(times, (starts - length, starts))].tolist()
+            return [x[start] not in set(conflicts)] if len(conflicts) > 0 else []
+        return [(t < x[start]) | (x[end] < t) for t in starts.tolist()]
+
+    def _memory_constraints(self, x, scaled_durations):
+        """
+        The number of qubits held at the same time may not exceed the number of qubits of the node. This only has to be
+        checked at the start of every interval in which qubits are held (see `ActiveSet.get_qubit_intervals`), since
+        the number of held qubits only increases there. Intervals that cannot contain such a start according to the
+        time windows are left out. In a window of a rolling horizon, the qubits held by the frozen sessions are
+        counted as well, which is also checked at the start of every frozen interval.
+
+        :return: List of constraints
+        """
+        intervals = self.active_set.get_qubit_intervals()
+        est, lst = self.time_windows.est, self.time_windows.lst
+        # (start, end, number of qubits) of the frozen intervals the blocks can overlap with
+        frozen = [] if self.frozen is None else \
+            [interval for interval in self.frozen.get_qubit_intervals()
+             if self._is_reachable(interval[0], interval[1], scaled_durations)]
+        if self.qubits is None or sum(n for (_, _, n) in intervals + frozen) <= self.qubits:
+            return []
+
+        constraints = []
+        for k, (start, _, n) in enumerate(intervals):
+            overlapping = [(first, last, m) for j, (first, last, m) in enumerate(intervals) if j != k and
+                           est[first] <= lst[start] and lst[last] + scaled_durations[last] > est[start]]
+            overlapping_frozen = [(first, end, m) for (first, end, m) in frozen
+                                  if first <= lst[start] and end > est[start]]
+            if n + sum(m for (_, _, m) in overlapping + overlapping_frozen) <= self.qubits:
+                continue
+            constraints.append(Sum([m * ((x[first] <= x[start]) & (x[start] < x[last] + scaled_durations[last]))
+                                    for (first, last, m) in overlapping] +
+                                   [m * ((first <= x[start]) & (x[start] < end))
+                                    for (first, end, m) in overlapping_frozen]) <= self.qubits - n)
+        for (t, _, _) in frozen:
+            held = sum(m for (first, end, m) in frozen if first <= t < end)
+            overlapping = [(first, last, m) for (first, last, m) in intervals
+                           if est[first] <= t < lst[last] + scaled_durations[last]]
+            if held + sum(m for (_, _, m) in overlapping) <= self.qubits:
+                continue
+            constraints.append(Sum([m * ((x[first] <= t) & (t < x[last] + scaled_durations[last]))
+                                    for (first, last, m) in overlapping]) <= self.qubits - held)
+        return constraints
+
+    def _solve_with_ace(self, instance):
+        """
+        :return: Tuple of the status, the values of the variables and the file with the output of the solver
+        """
         ace = solver(ACE)
+        simplified_options = {}
+        if self.time_limit is not None:
+            simplified_options["limit_time"] = str(int(self.time_limit))
+        ace.solve(instance, dict_options=self.solver_options, dict_simplified_options=simplified_options)
 
-        # https://github.com/xcsp3team/pycsp3/blob/master/docs/optionsSolvers.pdf
-        # here you can possibly define other heuristics to use
-        heuristics = {}
+        solver_status = status().name if status() is not None else None
+        values = solution().values if status() is SAT or status() is OPTIMUM else None
+        return solver_status, values, ace.get_logger()
 
-        start = time.time()
-        result = ace.solve(instance, dict_options=heuristics)
-        end = time.time()
+    def _read_incumbents(self, log_file):
+        """
+        Reads the improving solutions reported by ACE during an optimisation, i.e. the lines `o <bound> <time>`.
 
-        stat = None
-        start_times = None
-        solve_time = end - start
+        :param log_file: Path of the log file with the output of the solver
+        :return: List of tuples with the time (in seconds since the solver started) and the makespan of each incumbent
+        """
+        if log_file is None or not os.path.isfile(log_file):
+            return []
+        incumbents = []
+        with open(log_file, "r") as file_handle:
+            for line in file_handle:
+                # the solver output contains colour codes
+                match = re.match(r"o (\d+)\s+([\d.]+)", re.sub(r"\x1b\[[0-9;]*m", "", line))
+                if match is not None:
+                    incumbents.append((float(match.group(2)), int(match.group(1)) * self.active_set.get_gcd()))
+        return incumbents
 
-        if status() is SAT or status() is OPTIMUM:
-            start_times = [s * self.active_set.get_gcd() for s in solution().values]
-            stat = "SAT"
+    def _break_symmetries(self, x, scaled_d_max, scaled_network_schedule):
+        """
+        Adds constraints removing solutions that only differ by a permutation of interchangeable sessions. Without a
+        network schedule, interchangeable sessions are ordered lexicographically by the start times of their blocks.
+        With a network schedule, QC blocks are bound to the timeslots of their own session, so only the first blocks
+        (which precede the first QC block) can be exchanged; these are ordered like the first QC blocks.
+        """
+        active = self.active_set
+        if any(scaled_d_max[active.get_session_blocks(s)[0]] is not None for s in set(active.ids)):
+            # maximum time lags link the last block of a session to the first block of the next one
+            logger.info("Symmetry breaking is skipped, since sessions with deadlines are not interchangeable.")
+            return
 
-            logger.info(f"Found node schedule for {self.role} with {self.n_sessions} sessions of "
-                        f"dataset {self.dataset_id} in {round(solve_time, 2)} seconds.")
+        groups = active.get_interchangeable_sessions()
+        if self.peer is not None:
+            # in a joint model, sessions are only exchanged together with their blocks on the other node
+            peer_groups = {s: k for k, group in enumerate(self.peer.active_set.get_interchangeable_sessions())
+                           for s in group}
+            groups = [[s for s in group if peer_groups.get(s) == k] for group in groups
+                      for k in sorted({peer_groups[s] for s in group if s in peer_groups})]
 
-            # remove PyCSP log files
-            for filename in os.listdir():
-                if filename.endswith(".log") or filename.endswith(".xml"):
-                    os.remove(filename)
+        n_constraints = 0
+        for group in groups:
+            # the model does not apply the critical section constraints to the very last block
+            group = [s for s in group if s != active.ids[-1]]
+            sessions = [active.get_session_blocks(s) for s in group]
+            if len(sessions) < 2:
+                continue
+            if scaled_network_schedule is None:
+                satisfy(LexIncreasing([[x[i] for i in blocks] for blocks in sessions]))
+                n_constraints += 1
+            elif self._has_exchangeable_first_block(sessions[0], scaled_d_max):
+                firsts = [blocks[0] for blocks in sessions]
+                first_qcs = [next(i for i in blocks if active.types[i] == "QC") for blocks in sessions]
+                satisfy(
+                    [(x[first_qcs[a]] > x[first_qcs[b]]) | (x[firsts[a]] <= x[firsts[b]])
+                     for a in range(len(sessions)) for b in range(len(sessions)) if a != b]
+                )
+                n_constraints += len(sessions) * (len(sessions) - 1)
+        logger.debug(f"Added {n_constraints} symmetry breaking constraints.")
 
-        elif status() is UNKNOWN:
-            stat = "UNKNOWN"
-            logger.info("The solver cannot find a solution. (The problem might be too large.) "
-                        "Time taken to finish: %.4f seconds" % solve_time)
-        elif status() is UNSAT:
-            stat = "UNSAT"
-            logger.info("No feasible node schedule can be found. Time taken to finish: %.4f seconds" % solve_time)
-        else:
-            logger.info("Something else went wrong. Time taken to finish: %.4f seconds" % solve_time)
+    def _has_exchangeable_first_block(self, blocks, scaled_d_max):
+        """
+        The first blocks of two sessions can be exchanged if they are not part of a critical section and all blocks
+        up to the first QC block depend on each other and (apart from the first two) follow each other without delay.
+        """
+        active = self.active_set
+        if active.cs_ids[blocks[0]] is not None or "QC" not in [active.types[i] for i in blocks]:
+            return False
+        first_qc = next(i for i in blocks if active.types[i] == "QC")
+        if any(i not in active.successors[i - 1] for i in range(blocks[1], first_qc + 1)):
+            return False
+        for i in range(blocks[2], first_qc + 1) if first_qc > blocks[1] else []:
+            # with a network schedule, the time lag before a QC block only holds if its predecessor has none
+            without_delay = scaled_d_max[i] == 0 and (active.types[i] != "QC" or scaled_d_max[i - 1] is None)
+            if not without_delay:
+                return False
+        return True
 
-        clear()
-        return stat, start_times, solve_time
+    def _share_with_peer(self):
+        """
+        Splits the start times found by a joint solve into the node schedules of both nodes.
+        """
+        start_times = self.start_times
+        if start_times is not None:
+            self.start_times = start_times[:self.active_set.n_blocks]
+            self.peer.start_times = start_times[self.active_set.n_blocks:]
+        self.peer.status = self.status
+        self.peer.solve_time = self.solve_time
+        for attribute in ["fallback_type", "solver_name", "model_size", "incumbents"]:
+            setattr(self.peer, attribute, getattr(self, attribute))
 
-    def save_success_metrics(self, solve_time):
-        # there is one results file for each combination of n_sessions and schedule_type
-        filename = f"static-results-node-schedule_sessions-{self.n_sessions}_schedule-{self.schedule_type}"
-        path = os.path.dirname(__file__).rstrip("program_scheduling") + "/results"
-        # create a pandas dataframe
+    def _construct_list_schedule(self, scaled_durations, scaled_d_max, scaled_network_schedule, schedule_size,
+                                 capacities):
+        # list scheduling is not complete, so if the chosen priority rule gets stuck the other rules are tried as well
+        rules = [self.priority_rule] + [r for r in ListScheduler.PRIORITY_RULES if r != self.priority_rule]
+
+        start = time.time()
+        scaled_start_times = None
+        for rule in rules:
+            scheduler = ListScheduler(self.active_set, scaled_durations, scaled_d_max,
+                                      network_schedule=scaled_network_schedule, horizon=schedule_size,
+                                      priority_rule=rule, capacities=capacities, qubits=self.qubits)
+            scaled_start_times = scheduler.schedule()
+            if scaled_start_times is not None:
+                break
+            logger.debug(f"The list scheduler could not place all blocks using the {rule} rule.")
+        end = time.time()
+        solve_time = end - start
+
+        if scaled_start_times is None:
+            logger.info("The list scheduler could not place all blocks. Time taken to finish: %.4f seconds"
+                        % solve_time)
+            return "UNKNOWN", None, solve_time
+
+        logger.info(f"Found node schedule for {self.role} with {self.n_sessions} sessions of dataset "
+                    f"{self.dataset_id} in {round(solve_time, 4)} seconds using the {rule} rule.")
+        return "SAT", [s * self.active_set.get_gcd() for s in scaled_start_times], solve_time
+
+    def get_success_metrics(self):
         dataset = create_dataset(self.dataset_id, self.n_sessions, only_session_name=True)
         metadata = {
             "dataset_id": self.dataset_id,
@@ -224,16 +936,94 @@ class NodeSchedule:
             "bqc_sessions": dataset.get("bqc", 0),
             "pingpong_sessions": dataset.get("pingpong", 0),
             "qkd_sessions": dataset.get("qkd", 0),
-            "solve_time": solve_time
+            "status": self.status,
+            "fallback_type": self.fallback_type,
+            "solver": self.solver_name,
+            "solve_time": self.solve_time,
+            "domain_reduction": self.domain_reduction,
+            "CPU_capacity": self.capacities[0],
+            "QPU_capacity": self.capacities[1],
+            "qubits": self.qubits,
+            "joint": self.joint,
+            "window_size": self.window_size,
+            "n_segments": self.n_segments
         }
+        model_size = self.model_size if self.model_size is not None else {}
+        metadata.update({key: model_size.get(key) for key in ["n_variables", "n_constraints", "xcsp_bytes",
+                                                               "build_time"]})
         success_metrics = {
-            "makespan": self.get_makespan(),
-            "PUF_both": self.get_PUF_both(),
-            "PUF_CPU": self.get_PUF_CPU(),
-            "PUF_QPU": self.get_PUF_QPU()
+            "infeasibility_reason": self.infeasibility_reason,
+            "lower_bound": self.get_lower_bound(),
+            "makespan": None,
+            "gap": None,
+            "PUF_both": None,
+            "PUF_CPU": None,
+            "PUF_QPU": None,
+            "peak_qubits": None
         }
-        df = pd.DataFrame(data={**metadata, **success_metrics},
-                          columns=list(metadata.keys()) + list(success_metrics.keys()), index=[0])
+        if self.start_times is not None:
+            success_metrics.update({
+                "makespan": self.get_makespan(),
+                "gap": LowerBounds.get_gap(self.get_makespan(), self.get_lower_bound()),
+                "PUF_both": self.get_PUF_both(),
+                "PUF_CPU": self.get_PUF_CPU(),
+                "PUF_QPU": self.get_PUF_QPU(),
+                "peak_qubits": self.get_peak_qubits()
+            })
+        return {**metadata, **success_metrics}
+
+    def get_incumbent_trajectory(self):
+        """
+        :return: List of dictionaries with the time and makespan of every improving solution found by the solver
+        """
+        return [{"dataset_id": self.dataset_id, "n_sessions": self.n_sessions, "ns_id": self.ns_id,
+                 "length_factor": self.length_factor, "role": self.role, "time": t, "makespan": makespan}
+                for (t, makespan) in self.incumbents]
+
+    def save_success_metrics(self):
+        schedule_type = NodeSchedule.get_label(self.schedule_type, self.joint, self.window_size)
+        NodeSchedule.save_metrics([self.get_success_metrics()], n_sessions=self.n_sessions,
+                                  schedule_type=schedule_type)
+        NodeSchedule.save_incumbents(self.get_incumbent_trajectory(), n_sessions=self.n_sessions,
+                                     schedule_type=schedule_type)
+
+    @staticmethod
+    def save_metrics(metrics, n_sessions, schedule_type):
+        """
+        Appends rows of success metrics to the results file.
+
+        :param metrics: List of dictionaries as returned by `get_success_metrics`
+        :param n_sessions: Total number of sessions of the node schedules
+        :param schedule_type: Schedule type of the node schedules
+        :return:
+        """
+        # there is one results file for each combination of n_sessions and schedule_type
+        NodeSchedule._append_results(metrics, f"static-results-node-schedule_sessions-{n_sessions}_schedule-"
+                                              f"{schedule_type}")
+
+    @staticmethod
+    def save_incumbents(incumbents, n_sessions, schedule_type):
+        """
+        Appends rows of incumbents (as returned by `get_incumbent_trajectory`) to the file next to the results file.
+        """
+        NodeSchedule._append_results(incumbents, f"incumbents-node-schedule_sessions-{n_sessions}_schedule-"
+                                                 f"{schedule_type}")
+
+    @staticmethod
+    def save_online_results(results, n_sessions, schedule_type):
+        """
+        Appends rows of results of sessions admitted online (see `online_scheduler.benchmark`) to their own file.
+        """
+        NodeSchedule._append_results(results, f"online-results-node-schedule_sessions-{n_sessions}_schedule-"
+                                              f"{schedule_type}")
+
+    @staticmethod
+    def _append_results(rows, filename):
+        if len(rows) == 0:
+            return
+        path = os.path.dirname(__file__).rstrip("program_scheduling") + "/results"
+        # create a pandas dataframe
+        df = pd.DataFrame(data=rows, columns=list(rows[0].keys()))
 
         if os.path.isfile(f"{path}/{filename}.csv"):  # if the file exists, append
             old_df = pd.read_csv(f"{path}/{filename}.csv")
@@ -257,53 +1047,61 @@ class NodeSchedule:
         for b in q_ops:
             cprint(f"\tt={b[0]}: {b[1]} ({b[2]}) -- (duration = {b[3]} -> end time = {b[0] + b[3]})", "light_blue")
 
+    def get_schedule_array(self):
+        """
+        :return: Array in which the node schedule is stored in the catalog (see `ScheduleCatalog.node_schedule_array`)
+        """
+        return ScheduleCatalog.node_schedule_array(self.active_set.types, self.start_times, self.active_set.durations)
+
     def save_node_schedule(self, filename):
-        path = os.path.dirname(__file__).rstrip("program_scheduling") + "/node_schedules"
-        if not os.path.exists(path):
-            os.makedirs(path)
-        if os.path.isfile(f"{path}/{filename}.csv"):
+        if filename in self.catalog:
             logger.warning("An older node schedule is being overwritten.")
-        df = pd.DataFrame(data={"index": list(range(self.active_set.n_blocks)),
-                                "type": self.active_set.types,
-                                "start_time": self.start_times,
-                                "duration": self.active_set.durations})
-        df.to_csv(f"{path}/{filename}.csv", index=False)
-
-    def _calculate_activities(self, resource_index):
-        activities = [-1] * self.get_makespan()
-        for activity, start_time in enumerate(self.start_times):
-            if self.active_set.resource_reqs[activity][resource_index] == 1:
-                if self.active_set.durations[activity] == 1:
-                    activities[start_time] = activity
-                else:
-                    end_time = start_time + self.active_set.durations[activity]
-                    activities[start_time:end_time] = [activity] * self.active_set.durations[activity]
-        return activities
+        self.catalog.add([(filename, self.get_schedule_array())])
+
+    def get_lower_bound(self):
+        if self.lower_bounds is None:
+            return None
+        return self.lower_bounds.get_bound() * self.active_set.get_gcd()
 
     def get_makespan(self):
         if self.makespan is None:
-            makespan = -1
-            for activity, start_time in enumerate(self.start_times):
-                end_time = start_time + self.active_set.durations[activity]
-                if end_time > makespan:
-                    makespan = end_time
-            self.makespan = makespan
+            end_times = np.array(self.start_times, dtype=np.int64) + self.active_set.duration_array
+            self.makespan = int(end_times.max()) if len(end_times) > 0 else -1
         return self.makespan
 
+    def _get_utilization(self, resource_index):
+        """
+        :return: Fraction of the capacity of a resource that is used during the node schedule
+        """
+        work = int((self.active_set.duration_array * self.active_set.resource_req_array[:, resource_index]).sum())
+        return work / (self.get_makespan() * self.capacities[resource_index])
+
     def get_PUF_CPU(self):
         if self.PUF_CPU is None:
-            CPU_duration = sum([self.active_set.durations[i] for i in range(self.active_set.n_blocks)
-                                if self.active_set.types[i][0] == "C"])
-            self.PUF_CPU = CPU_duration / self.get_makespan()
+            self.PUF_CPU = self._get_utilization(0)
         return self.PUF_CPU
 
     def get_PUF_QPU(self):
         if self.PUF_QPU is None:
-            QPU_duration = sum([self.active_set.durations[i] for i in range(self.active_set.n_blocks)
-                                if self.active_set.types[i][0] == "Q"])
-            self.PUF_QPU = QPU_duration / self.get_makespan()
+            self.PUF_QPU = self._get_utilization(1)
         return self.PUF_QPU
 
+    def get_peak_qubits(self):
+        """
+        :return: Largest number of qubits held at the same time during the node schedule
+        """
+        # qubits are taken at the start of the first block of an interval and released at the end of its last block,
+        # where releases come before takes at the same time
+        events = []
+        for (first, last, n) in self.active_set.get_qubit_intervals():
+            events.append((self.start_times[first], 1, n))
+            events.append((self.start_times[last] + self.active_set.durations[last], 0, -n))
+        peak = held = 0
+        for (_, _, n) in sorted(events):
+            held += n
+            peak = max(peak, held)
+        return peak
+
     def get_PUF_both(self):
         if self.PUF_both is None:
             total_duration = 0
@@ -321,3 +1119,23 @@ class NodeSchedule:
                         c = end_time
             self.PUF_both = total_duration / self.get_makespan()
         return self.PUF_both
+
+
+def _construct_segment(options):
+    """
+    Creates the node schedule of a segment in a temporary working directory of its own, so the files of concurrent
+    solver calls do not clash.
+
+    :param options: Keyword arguments passed on to `NodeSchedule`
+    :return: Tuple of the status, the start times, the infeasibility reason, the solver, the model size, the incumbents
+        and the time taken
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="segment_") as working_dir:
+        os.chdir(working_dir)
+        try:
+            segment = NodeSchedule(save_schedule=False, save_metrics=False, use_cache=False, **options)
+        finally:
+            os.chdir(cwd)
+    return segment.status, segment.start_times, segment.infeasibility_reason, segment.solver_name, segment.model_size, \
+        segment.incumbents, segment.solve_time
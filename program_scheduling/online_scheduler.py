@@ -0,0 +1,268 @@
+import logging
+import math
+import time
+from argparse import ArgumentParser
+
+from program_scheduling.activity_metadata import ActiveSet, ActivityMetadata
+from program_scheduling.datasets import create_dataset
+from program_scheduling.list_scheduler import ListScheduler
+from program_scheduling.network_schedule import NetworkSchedule
+from program_scheduling.node_schedule import NodeSchedule
+from program_scheduling.rolling_horizon import RollingHorizon
+from program_scheduling.schedule_catalog import ScheduleCatalog
+from program_scheduling.session_metadata import SessionMetadata
+from setup_logging import setup_logging
+
+logger = logging.getLogger("program_scheduling")
+
+
+class OnlineScheduler:
+    SCHEDULE_TYPES = ["LIST", "HEU", "OPT"]
+
+    def __init__(self, node_schedule, schedule_type="LIST", latency=1, priority_rule="EST"):
+        """
+        Admits sessions into a committed node schedule as they arrive, instead of scheduling all sessions again. The
+        blocks of the committed node schedule are frozen (see `RollingHorizon`) and never move, and the blocks of an
+        arriving session are inserted into the capacity and timeslots these leave free: by the list scheduler (LIST)
+        or by a model of the session alone (HEU or OPT), whose solver gets the latency bound as its time limit. If the
+        session cannot be inserted, it is appended after all committed blocks instead.
+
+        :param node_schedule: Committed `NodeSchedule`, which also determines the network schedule, the capacities and
+            the number of qubits
+        :param schedule_type: One of `OnlineScheduler.SCHEDULE_TYPES`
+        :param latency: Time in seconds that admitting a session may take. The solver gets what is left of it in whole
+            seconds (at least one), so building the model can exceed it; the list scheduler takes milliseconds.
+        :param priority_rule: Priority rule of the list scheduler, which also appends sessions
+        """
+        if schedule_type not in self.SCHEDULE_TYPES:
+            raise ValueError(f"Schedule type {schedule_type} cannot admit sessions, pick one of "
+                             f"{self.SCHEDULE_TYPES}.")
+        if node_schedule.start_times is None:
+            raise ValueError("Sessions can only be admitted into a feasible node schedule.")
+        self.dataset_id = node_schedule.dataset_id
+        self.n_sessions = node_schedule.n_sessions
+        self.ns_id = node_schedule.ns_id
+        self.role = node_schedule.role
+        self.length_factor = node_schedule.length_factor
+        self.catalog = node_schedule.catalog
+        self.capacities = node_schedule.capacities
+        self.qubits = node_schedule.qubits
+        self.schedule_type = schedule_type
+        self.latency = latency
+        self.priority_rule = priority_rule
+
+        self.network_schedule = None
+        if self.ns_id is not None:
+            self.network_schedule = self.catalog.get_network_schedule(dataset_id=self.dataset_id,
+                                                                      n_sessions=self.n_sessions,
+                                                                      length_factor=self.length_factor,
+                                                                      ns_id=self.ns_id)
+            self.network_schedule.rewrite_sessions(create_dataset(self.dataset_id, self.n_sessions))
+
+        # committed blocks and their start times, which grow with every admitted session
+        self.active_set = node_schedule.active_set
+        self.start_times = list(node_schedule.start_times)
+        # how the last session was admitted: the schedule type if it was inserted, APPEND if it was appended
+        self.method = None
+
+    def admit(self, yaml_file, session_id=None, now=0):
+        """
+        :param yaml_file: Path of the session configuration (of the role of this node)
+        :param session_id: ID of the session, by default the ID after the largest committed one (with a network
+            schedule, the session can only use the timeslots assigned to its ID)
+        :param now: Current time, before which no block of the session can start
+        :return: Tuple of the status (SAT if the session is admitted, UNSAT if it cannot even be appended), the start
+            times of its blocks and the time taken
+        """
+        start = time.time()
+        if session_id is None:
+            session_id = max(self.active_set.session_ranges, default=-1) + 1
+        session = ActivityMetadata(SessionMetadata(yaml_file, session_id=session_id), self.network_schedule)
+        active_set = self.active_set.add_session(session)
+        window = active_set.select_sessions([session_id])
+        gcd = active_set.get_gcd()
+
+        scaled_durations, _ = active_set.scale_down()
+        rolling_horizon = RollingHorizon(active_set, scaled_durations, 1)
+        rolling_horizon.freeze(range(self.active_set.n_blocks), [t // gcd for t in self.start_times])
+        rolling_horizon.release = math.ceil(now / gcd)
+        scaled_network_schedule = None
+        if self.network_schedule is not None:
+            scaled_network_schedule = NetworkSchedule.scale_down(self.network_schedule, gcd)
+
+        self.method = self.schedule_type
+        if self.schedule_type == "LIST":
+            scaled_start_times = self._place(window, rolling_horizon, scaled_network_schedule)
+        else:
+            scaled_start_times = self._solve(window, rolling_horizon, self.latency - (time.time() - start))
+        if scaled_start_times is None:
+            logger.info(f"Session {session_id} could not be inserted, appending it after the committed blocks.")
+            self.method = "APPEND"
+            rolling_horizon.release = max(rolling_horizon.release, rolling_horizon.get_end())
+            scaled_start_times = self._place(window, rolling_horizon, scaled_network_schedule)
+
+        admission_time = time.time() - start
+        if admission_time > self.latency:
+            logger.warning(f"Admitting session {session_id} took {round(admission_time, 4)} seconds, which exceeds "
+                           f"the latency bound of {self.latency} seconds.")
+        if scaled_start_times is None:
+            logger.info(f"Session {session_id} cannot be admitted, not even after the committed blocks.")
+            return "UNSAT", None, admission_time
+
+        start_times = [t * gcd for t in scaled_start_times]
+        self.active_set = active_set
+        self.start_times += start_times
+        logger.info(f"Admitted session {session_id} for {self.role} ({self.method}) in {round(admission_time, 4)} "
+                    f"seconds, the makespan is now {self.get_makespan()}.")
+        return "SAT", start_times, admission_time
+
+    def _place(self, window, rolling_horizon, scaled_network_schedule):
+        """
+        Places the blocks of the session around the frozen blocks by the list scheduler, trying the other priority
+        rules if the chosen one gets stuck. The qubits held by the frozen sessions are taken into account.
+
+        :return: List of (scaled) start times of the blocks of the session or None if they could not be placed
+        """
+        durations, d_max = window.scale_down()
+        rules = [self.priority_rule] + [r for r in ListScheduler.PRIORITY_RULES if r != self.priority_rule]
+        for rule in rules:
+            start_times = ListScheduler(window, durations, d_max, network_schedule=scaled_network_schedule,
+                                        priority_rule=rule, capacities=self.capacities, frozen=rolling_horizon,
+                                        qubits=self.qubits).schedule()
+            if start_times is not None:
+                return start_times
+            logger.debug(f"The list scheduler could not place the session using the {rule} rule.")
+        return None
+
+    def _solve(self, window, rolling_horizon, budget):
+        """
+        Schedules the session by a model of its own around the frozen blocks, without falling back to other schedule
+        types, as appending the session is faster.
+
+        :param budget: Time in seconds left for the solver, which gets at least one second
+
+        :return: List of (scaled) start times of the blocks of the session or None if the solver did not find them
+        """
+        node_schedule = NodeSchedule(dataset_id=self.dataset_id, n_sessions=self.n_sessions, ns_id=self.ns_id,
+                                     role=self.role, schedule_type=self.schedule_type, save_schedule=False,
+                                     save_metrics=False, ns_length_factor=self.length_factor, use_cache=False,
+                                     time_limit=max(int(budget), 1), catalog=self.catalog,
+                                     capacities=self.capacities, qubits=self.qubits, active_set=window,
+                                     frozen=rolling_horizon, fallback=False)
+        if node_schedule.status not in NodeSchedule.FEASIBLE_STATUSES:
+            return None
+        return [t // window.get_gcd() for t in node_schedule.start_times]
+
+    def get_makespan(self):
+        return max([t + d for t, d in zip(self.start_times, self.active_set.durations)], default=0)
+
+
+def benchmark(dataset_id, n_sessions, ns_id, role, schedule_type="LIST", latency=1, priority_rule="EST",
+              resolve_type=None, time_limit=None, n_initial=1, catalog=None):
+    """
+    Lets the sessions of a dataset arrive one at a time, in the order of their first timeslot in the network schedule
+    (or of their IDs without one), and admits each into the node schedule of the sessions before it. After every
+    arrival, the node schedule of all sessions so far is also created from scratch, against which the admission
+    latency and the drift of the makespan are measured.
+
+    :param resolve_type: Schedule type of the node schedules created from scratch, by default `schedule_type`
+    :param time_limit: Time limit in seconds of the solver creating node schedules from scratch
+    :param n_initial: Number of sessions in the first node schedule, which is created from scratch
+    :return: List of dictionaries with the results of every arrival
+    """
+    resolve_type = resolve_type if resolve_type is not None else schedule_type
+    length_factor = {6: 3, 12: 5}.get(n_sessions) if ns_id is not None else 2
+    catalog = catalog if catalog is not None else ScheduleCatalog()
+    dataset = create_dataset(dataset_id, n_sessions)
+    # configuration of every session, in the order of their IDs
+    configs = [config_file + f"_{role}.yml" for (config_file, number) in dataset.items() for _ in range(number)]
+    options = dict(dataset_id=dataset_id, n_sessions=n_sessions, ns_id=ns_id, role=role, save_schedule=False,
+                   save_metrics=False, ns_length_factor=length_factor, priority_rule=priority_rule, use_cache=False,
+                   time_limit=time_limit, catalog=catalog)
+
+    network_schedule = None
+    scaled_network_schedule = None
+    if ns_id is not None:
+        network_schedule = catalog.get_network_schedule(dataset_id=dataset_id, n_sessions=n_sessions,
+                                                        length_factor=length_factor, ns_id=ns_id)
+        network_schedule.rewrite_sessions(dataset)
+    active_set = ActiveSet.create_active_set(dataset=dataset, role=role, network_schedule=network_schedule)
+    if network_schedule is not None:
+        scaled_network_schedule = NetworkSchedule.scale_down(network_schedule, active_set.get_gcd())
+    order = [s for window in RollingHorizon(active_set, active_set.scale_down()[0], 1,
+                                            network_schedule=scaled_network_schedule).windows for s in window]
+
+    committed = NodeSchedule(schedule_type=resolve_type, active_set=active_set.select_sessions(order[:n_initial]),
+                             **options)
+    if committed.status not in NodeSchedule.FEASIBLE_STATUSES:
+        logger.warning(f"No node schedule of the first {n_initial} sessions was found (status {committed.status}).")
+        return []
+    online = OnlineScheduler(committed, schedule_type=schedule_type, latency=latency, priority_rule=priority_rule)
+
+    results = []
+    for k, session_id in enumerate(order[n_initial:], start=n_initial + 1):
+        status, _, admission_time = online.admit(configs[session_id], session_id=session_id)
+        start = time.time()
+        resolved = NodeSchedule(schedule_type=resolve_type, active_set=active_set.select_sessions(order[:k]),
+                                **options)
+        resolve_time = time.time() - start
+        makespan = online.get_makespan() if status == "SAT" else None
+        resolved_makespan = resolved.get_makespan() if resolved.start_times is not None else None
+        results.append({
+            "dataset_id": dataset_id,
+            "n_sessions": n_sessions,
+            "ns_id": ns_id,
+            "role": role,
+            "schedule_type": schedule_type,
+            "resolve_type": resolve_type,
+            "session_id": session_id,
+            "n_arrived": k,
+            "status": status,
+            "method": online.method,
+            "latency": admission_time,
+            "makespan": makespan,
+            "resolve_status": resolved.status,
+            "resolve_time": resolve_time,
+            "resolve_makespan": resolved_makespan,
+            "drift": makespan / resolved_makespan - 1 if makespan is not None and resolved_makespan else None
+        })
+        logger.info(f"Session {session_id}: admitted in {round(admission_time, 4)} seconds with makespan {makespan}, "
+                    f"created from scratch in {round(resolve_time, 4)} seconds with makespan {resolved_makespan}.")
+    return results
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser()
+    parser.add_argument('-d', '--dataset-id', required=True, type=int,
+                        help="Dataset of sessions that arrive one at a time.")
+    parser.add_argument('-s', '--n_sessions', required=False, default=6, type=int,
+                        help="Total number of sessions in the dataset.")
+    parser.add_argument('--ns_id', required=False, default=None, type=int,
+                        help="ID of the network schedule, by default the sessions are scheduled without one.")
+    parser.add_argument('--role', required=False, default="alice", type=str, choices=["alice", "bob"],
+                        help="Node whose node schedule is created.")
+    parser.add_argument('--type', dest="schedule_type", required=False, default="LIST", type=str,
+                        choices=OnlineScheduler.SCHEDULE_TYPES,
+                        help="How arriving sessions are inserted: by the list scheduler or by a model of their own.")
+    parser.add_argument('--latency', required=False, default=1, type=float,
+                        help="Time in seconds that inserting a session may take before it is appended instead.")
+    parser.add_argument('--priority_rule', required=False, default="EST", type=str,
+                        choices=ListScheduler.PRIORITY_RULES,
+                        help="Priority rule of the list scheduler.")
+    parser.add_argument('--resolve_type', required=False, default=None, type=str,
+                        choices=["LIST", "NAIVE", "HEU", "OPT"],
+                        help="Schedule type of the node schedules created from scratch, by default the one of --type.")
+    parser.add_argument('-t', '--time_limit', required=False, default=None, type=int,
+                        help="Time limit in seconds of the solver creating node schedules from scratch.")
+    parser.add_argument('--initial', dest="n_initial", required=False, default=1, type=int,
+                        help="Number of sessions in the first node schedule.")
+    parser.add_argument('--log', dest='loglevel', type=str, required=False, default="INFO",
+                        help="Set log level: DEBUG, INFO, WARNING, ERROR, or CRITICAL")
+    args, unknown = parser.parse_known_args()
+
+    setup_logging(args.loglevel)
+
+    rows = benchmark(dataset_id=args.dataset_id, n_sessions=args.n_sessions, ns_id=args.ns_id, role=args.role,
+                     schedule_type=args.schedule_type, latency=args.latency, priority_rule=args.priority_rule,
+                     resolve_type=args.resolve_type, time_limit=args.time_limit, n_initial=args.n_initial)
+    NodeSchedule.save_online_results(rows, n_sessions=args.n_sessions, schedule_type=args.schedule_type)
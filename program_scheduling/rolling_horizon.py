@@ -0,0 +1,141 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger("program_scheduling")
+
+
+class RollingHorizon:
+
+    def __init__(self, active_set, durations, window_size, network_schedule=None):
+        """
+        Rolling-horizon decomposition of an active set: the sessions are split into windows of `window_size` sessions,
+        which are scheduled one after another. Sessions are taken in the order of their first timeslot in the network
+        schedule (or in the order of their IDs without one). Once a window is scheduled, its blocks are frozen and the
+        next windows only see what they occupy: the resource usage, the spans of their critical sections and the
+        qubits they hold. Blocks of a window cannot start before the release time, e.g. the current time when
+        sessions are admitted online (see `OnlineScheduler`).
+
+        :param active_set: Active set with all blocks that should be scheduled
+        :param durations: (Scaled) durations of the blocks
+        :param window_size: Number of sessions per window
+        :param network_schedule: Optional (scaled) network schedule
+        """
+        if window_size < 1:
+            raise ValueError(f"Windows need at least one session, not {window_size}.")
+        self.active_set = active_set
+        self.durations = np.array(durations, dtype=np.int64)
+        self.window_size = window_size
+        self.windows = self._calculate_windows(network_schedule)
+        # (scaled) start time of every frozen block
+        self.start_times = {}
+        # (scaled) time before which no block of a window can start
+        self.release = 0
+
+    def _calculate_windows(self, network_schedule):
+        """
+        :return: List of windows, each a list of session IDs
+        """
+        session_ids = list(self.active_set.session_ranges.keys())
+        if network_schedule is not None:
+            first_slots = {}
+            for session_id in session_ids:
+                start_times = network_schedule.get_session_start_times(session_id)
+                # sessions without timeslots cannot be scheduled anyway, they are put last
+                first_slots[session_id] = min(start_times) if start_times else np.inf
+            session_ids.sort(key=lambda s: (first_slots[s], s))
+        return [session_ids[k:k + self.window_size] for k in range(0, len(session_ids), self.window_size)]
+
+    def freeze(self, blocks, start_times):
+        """
+        :param blocks: Indices of the blocks of a scheduled window
+        :param start_times: (Scaled) start times of these blocks
+        """
+        self.start_times.update(zip(blocks, start_times))
+
+    def _get_frozen(self):
+        blocks = np.array(sorted(self.start_times), dtype=np.int64)
+        starts = np.array([self.start_times[i] for i in blocks.tolist()], dtype=np.int64)
+        return blocks, starts
+
+    def get_end(self):
+        """
+        :return: Time at which all frozen blocks have finished
+        """
+        blocks, starts = self._get_frozen()
+        return int((starts + self.durations[blocks]).max()) if len(blocks) > 0 else 0
+
+    def get_resource_segments(self, k):
+        """
+        Usage of a resource by the frozen blocks, as maximal segments in which it does not change.
+
+        :param k: Index of the resource (0 for the CPU, 1 for the QPU)
+        :return: List of (start, length, units) tuples of the segments in which the resource is used
+        """
+        blocks, starts = self._get_frozen()
+        units = self.active_set.resource_req_array[blocks, k]
+        starts, ends, units = starts[units > 0], (starts + self.durations[blocks])[units > 0], units[units > 0]
+        if len(units) == 0:
+            return []
+        times, inverse = np.unique(np.concatenate((starts, ends)), return_inverse=True)
+        changes = np.zeros(len(times), dtype=np.int64)
+        np.add.at(changes, inverse, np.concatenate((units, -units)))
+        usage = np.cumsum(changes)[:-1]
+        segments = []
+        for start, end, used in zip(times[:-1].tolist(), times[1:].tolist(), usage.tolist()):
+            if used == 0:
+                continue
+            if len(segments) > 0 and segments[-1][0] + segments[-1][1] == start and segments[-1][2] == used:
+                segments[-1] = (segments[-1][0], segments[-1][1] + end - start, used)
+            else:
+                segments.append((start, end - start, used))
+        return segments
+
+    def get_cs_spans(self, cs_id):
+        """
+        :param cs_id: ID of a critical section (or None)
+        :return: Tuple of two arrays with the first and last time of the merged frozen spans (from the start of the
+            first until the start of the last block) of all critical sections with another ID, in which no other block
+            may start
+        """
+        spans = sorted((self.start_times[first], self.start_times[last])
+                       for (_, other), (first, last) in self.active_set.get_cs_spans().items()
+                       if other != cs_id and first in self.start_times)
+        merged = []
+        for first, last in spans:
+            if len(merged) > 0 and first <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], last)
+            else:
+                merged.append([first, last])
+        merged = np.array(merged, dtype=np.int64).reshape(-1, 2)
+        return merged[:, 0], merged[:, 1]
+
+    def get_block_starts(self, cs_id):
+        """
+        :param cs_id: ID of a critical section
+        :return: Sorted array of the start times of the frozen blocks outside of critical sections with this ID, which
+            may not lie within the span of such a critical section (the last block of the active set is exempt)
+        """
+        blocks, starts = self._get_frozen()
+        cs_code = self.active_set.cs_values.index(cs_id)
+        keep = (self.active_set.cs_codes[blocks] != cs_code) & (blocks != self.active_set.last_block)
+        return np.sort(starts[keep])
+
+    def get_qubit_intervals(self):
+        """
+        :return: List of (start, end, number of qubits) tuples of the intervals in which the frozen sessions hold
+            qubits (see `ActiveSet.get_qubit_intervals`)
+        """
+        return [(self.start_times[first], self.start_times[last] + int(self.durations[last]), n)
+                for (first, last, n) in self.active_set.get_qubit_intervals() if first in self.start_times]
+
+    @staticmethod
+    def outside(times, spans):
+        """
+        :param times: Array of times
+        :param spans: Tuple of arrays with the first and last times of disjoint, sorted spans
+        :return: Boolean array which is True for the times that do not lie within any of the spans
+        """
+        firsts, lasts = spans
+        k = np.searchsorted(firsts, times, side="right") - 1
+        return (k < 0) | (times > lasts[np.maximum(k, 0)]) if len(firsts) > 0 else np.ones(len(times), dtype=bool)
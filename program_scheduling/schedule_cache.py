@@ -0,0 +1,85 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger("program_scheduling")
+
+
+class NodeScheduleCache:
+    # results that depend on how long the solver was allowed to run are not worth reusing
+    CACHED_STATUSES = ["SAT", "UNSAT"]
+
+    def __init__(self, folder_path=None):
+        """
+        Persistent cache of solved node schedules. Entries are stored as one JSON file per key, where the key is a
+        hash of everything the solver gets to see, so identical problems are never solved twice.
+
+        :param folder_path: Folder in which the cache entries are stored
+        """
+        if folder_path is None:
+            folder_path = os.path.dirname(__file__).rstrip("program_scheduling") + "node_schedule_cache"
+        self.folder_path = folder_path
+
+    @staticmethod
+    def get_key(active_set, scaled_durations, scaled_d_max, scaled_network_schedule, schedule_type, options):
+        """
+        Calculates the key of a solve from its inputs.
+
+        :param active_set: Active set being scheduled
+        :param scaled_durations: Scaled durations of the blocks
+        :param scaled_d_max: Scaled maximum time lags of the blocks
+        :param scaled_network_schedule: Scaled network schedule (or None)
+        :param schedule_type: Schedule type (e.g. HEU or OPT)
+        :param options: Dictionary with any other option influencing the result (e.g. solver options)
+        :return: Hexadecimal SHA-256 digest
+        """
+        content = {
+            "ids": active_set.ids,
+            "successors": active_set.successors,
+            "resource_reqs": active_set.resource_reqs,
+            "qubits": active_set.qubits,
+            "types": active_set.types,
+            "qc_indices": active_set.qc_indices,
+            "cs_ids": active_set.cs_ids,
+            "gcd": active_set.get_gcd(),
+            "durations": scaled_durations,
+            "d_max": scaled_d_max,
+            "schedule_type": schedule_type,
+            "options": options,
+        }
+        if scaled_network_schedule is not None:
+            content["network_schedule"] = {
+                "length": scaled_network_schedule.length,
+                "start_times": scaled_network_schedule.start_times,
+                "sessions": scaled_network_schedule.sessions,
+            }
+        serialised = json.dumps(content, sort_keys=True, default=str)
+        return hashlib.sha256(serialised.encode()).hexdigest()
+
+    def load(self, key):
+        """
+        :return: Tuple of status, start times and the time the original solve took, or None if there is no entry
+        """
+        path = f"{self.folder_path}/{key}.json"
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "r") as file_handle:
+                entry = json.load(file_handle)
+        except (OSError, ValueError):
+            logger.warning(f"Ignoring unreadable cache entry {path}.")
+            return None
+        return entry["status"], entry["start_times"], entry["solve_time"]
+
+    def save(self, key, status, start_times, solve_time):
+        if status not in self.CACHED_STATUSES:
+            return
+        os.makedirs(self.folder_path, exist_ok=True)
+        entry = {"status": status, "start_times": start_times, "solve_time": solve_time}
+        # write to a temporary file first, so concurrent processes never read a partially written entry
+        fd, temp_path = tempfile.mkstemp(dir=self.folder_path, suffix=".tmp")
+        with os.fdopen(fd, "w") as file_handle:
+            json.dump(entry, file_handle)
+        os.replace(temp_path, f"{self.folder_path}/{key}.json")
@@ -0,0 +1,288 @@
+import io
+import logging
+import os
+import re
+import tempfile
+import zipfile
+from argparse import ArgumentParser
+
+import numpy as np
+import pandas as pd
+
+from program_scheduling.network_schedule import NetworkSchedule
+from setup_logging import setup_logging
+
+logger = logging.getLogger("program_scheduling")
+
+
+class ScheduleCatalog:
+    NETWORK_SCHEDULE_PATTERN = re.compile(
+        r"network-schedule_sessions-(\d+)_dataset-(\d+)_length-(\d+)_id-(\d+)$")
+    NODE_SCHEDULE_PATTERN = re.compile(
+        r"node-schedule_sessions-(\d+)_dataset-(\d+)_schedule-(\w+?)_length-(\w+)_NS-(\w+)_role-(alice|bob)$")
+    # block types of node schedules are stored by their index in this list
+    BLOCK_TYPES = ["CL", "CC", "QL", "QC"]
+
+    def __init__(self, path=None, archives=None):
+        """
+        Single-file store of network and node schedules. Every schedule is a compact integer array saved as one
+        `.npy` member of a zip archive under the name it used to have as a CSV file (see `NetworkSchedule.get_name`
+        and `NodeSchedule.get_name`). Every archive is opened (and its central directory parsed) once, after which a
+        schedule is read from the open archive through the index of names instead of a directory scan. Zip archives
+        of network schedule CSVs (such as the shipped `network_schedules/network-schedules.zip`) are indexed as
+        read-only sources and read without extracting.
+
+        New schedules are appended to the archive, so only one process should write to it at a time.
+
+        :param path: Path of the catalog archive
+        :param archives: Paths of read-only zip archives of CSV files, defaults to the shipped network schedules
+        """
+        root = os.path.dirname(__file__).rstrip("program_scheduling")
+        self.path = path if path is not None else root + "schedule-catalog.zip"
+        self.network_schedule_folder = root + "network_schedules"
+        if archives is None:
+            archives = [f"{self.network_schedule_folder}/network-schedules.zip"]
+
+        # name of every schedule -> (archive, member), where entries of the catalog take precedence
+        self.index = {}
+        # path of every archive -> open zip file it is read from
+        self._archives = {}
+        for archive in archives:
+            self._index_archive(archive)
+        self._index_archive(self.path)
+
+    def _index_archive(self, archive):
+        zf = self._open(archive)
+        if zf is None:
+            return
+        for member in zf.namelist():
+            name, extension = os.path.splitext(os.path.basename(member))
+            if extension in [".csv", ".npy"]:
+                self.index[name] = (archive, member)
+
+    def _open(self, archive):
+        """
+        :return: Open zip file of the archive (opened on first use), or None if the archive does not exist
+        """
+        if archive not in self._archives:
+            if not os.path.isfile(archive):
+                return None
+            self._archives[archive] = zipfile.ZipFile(archive, "r")
+        return self._archives[archive]
+
+    def _close(self, archive):
+        zf = self._archives.pop(archive, None)
+        if zf is not None:
+            zf.close()
+
+    def close(self):
+        for archive in list(self._archives):
+            self._close(archive)
+
+    def __getstate__(self):
+        # open zip files cannot be sent to other processes, which open the archives again on first use
+        state = self.__dict__.copy()
+        state["_archives"] = {}
+        return state
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def add(self, items):
+        """
+        Adds (or replaces) schedules in the catalog. Schedules that are stored with the same content already are
+        skipped, and replacing a schedule by a different one rewrites the archive without the old member, so every
+        name is stored only once.
+
+        :param items: Iterable of (name, array) tuples
+        """
+        members = {}
+        for name, array in items:
+            buffer = io.BytesIO()
+            np.save(buffer, np.asarray(array), allow_pickle=False)
+            members[f"{name}.npy"] = buffer.getvalue()
+        # the archive is read again after it changed
+        self._close(self.path)
+        stored = {}
+        if os.path.isfile(self.path):
+            with zipfile.ZipFile(self.path, "r") as zf:
+                stored = {member: zf.read(member) for member in zf.namelist() if member in members}
+        changed = {member: data for (member, data) in members.items() if stored.get(member) != data}
+        replaced = [member for member in changed if member in stored]
+        if len(replaced) > 0:
+            logger.debug(f"Rewriting {self.path} to replace {len(replaced)} schedules.")
+            self._rewrite(without=replaced)
+        with zipfile.ZipFile(self.path, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+            for member, data in changed.items():
+                zf.writestr(member, data)
+        for member in members:
+            self.index[member[:-len(".npy")]] = (self.path, member)
+
+    def _rewrite(self, without):
+        """
+        Rewrites the catalog archive without some of its members, replacing the archive only once the copy is
+        complete.
+
+        :param without: Names of the members to leave out
+        """
+        fd, tmp_path = tempfile.mkstemp(suffix=".zip", dir=os.path.dirname(os.path.abspath(self.path)))
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(self.path, "r") as old, \
+                    zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as new:
+                for info in old.infolist():
+                    if info.filename not in without:
+                        new.writestr(info, old.read(info))
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get_array(self, name):
+        """
+        :return: Array stored under the name (CSV members are returned as a DataFrame), or None if there is none
+        """
+        if name not in self.index:
+            return None
+        archive, member = self.index[name]
+        with self._open(archive).open(member) as file_handle:
+            if member.endswith(".csv"):
+                return pd.read_csv(file_handle)
+            return np.load(io.BytesIO(file_handle.read()), allow_pickle=False)
+
+    @staticmethod
+    def network_schedule_array(network_schedule):
+        """
+        :return: Array with the start times and the application codes (see `NetworkSchedule.get_application_code`)
+            of the timeslots
+        """
+        applications = [NetworkSchedule.get_application_code(a) for a in network_schedule.app_array.tolist()]
+        return np.array([network_schedule.start_time_array, applications], dtype=np.int64)
+
+    def add_network_schedules(self, network_schedules):
+        """
+        :param network_schedules: Iterable of generated network schedules (the sessions must not be rewritten yet)
+        :return: IDs of the added network schedules
+        """
+        ns_ids = []
+        items = []
+        for network_schedule in network_schedules:
+            name = NetworkSchedule.get_name(dataset_id=network_schedule.dataset_id,
+                                            n_sessions=network_schedule.n_sessions, ns_id=network_schedule.id,
+                                            length_factor=network_schedule.length_factor)
+            items.append((name, self.network_schedule_array(network_schedule)))
+            ns_ids.append(network_schedule.id)
+        self.add(items)
+        return ns_ids
+
+    def get_network_schedule(self, dataset_id, n_sessions, length_factor, ns_id):
+        """
+        Loads a network schedule from the catalog, or from its CSV file in `network_schedules/` if it is not in the
+        catalog.
+
+        :return: Network schedule with the sessions not rewritten yet
+        """
+        name = NetworkSchedule.get_name(dataset_id=dataset_id, n_sessions=n_sessions, ns_id=ns_id,
+                                        length_factor=length_factor)
+        stored = self.get_array(name)
+        if stored is None:
+            stored = pd.read_csv(f"{self.network_schedule_folder}/{name}.csv")
+        if isinstance(stored, pd.DataFrame):
+            sessions = list(stored["session"])
+            start_times = list(map(lambda x: int(x), stored["start_time"]))
+        else:
+            sessions = [NetworkSchedule.APPLICATIONS[code - 1] for code in stored[1].tolist()]
+            start_times = stored[0].tolist()
+        network_schedule = NetworkSchedule(dataset_id=dataset_id, n_sessions=n_sessions, sessions=sessions,
+                                           start_times=start_times, length_factor=length_factor)
+        network_schedule.id = ns_id
+        return network_schedule
+
+    def get_ns_ids(self, dataset_id, n_sessions, length_factor):
+        """
+        :return: Sorted IDs of all network schedules in the catalog for a dataset and length factor
+        """
+        ns_ids = []
+        for name in self.index:
+            match = self.NETWORK_SCHEDULE_PATTERN.match(name)
+            if match is not None and tuple(map(int, match.groups()[:3])) == (n_sessions, dataset_id, length_factor):
+                ns_ids.append(int(match.group(4)))
+        return sorted(ns_ids)
+
+    def get_next_ns_id(self, dataset_id, n_sessions, length_factor):
+        """
+        :return: First ID after those of all network schedules in the catalog for a dataset and length factor
+        """
+        ns_ids = self.get_ns_ids(dataset_id=dataset_id, n_sessions=n_sessions, length_factor=length_factor)
+        return ns_ids[-1] + 1 if len(ns_ids) > 0 else 0
+
+    @staticmethod
+    def node_schedule_array(types, start_times, durations):
+        """
+        :return: Array with the block type codes (see `BLOCK_TYPES`), start times and durations of the blocks
+        """
+        return np.array([[ScheduleCatalog.BLOCK_TYPES.index(t) for t in types], start_times, durations],
+                        dtype=np.int64)
+
+    def get_node_schedule(self, name):
+        """
+        :param name: Name of the node schedule of one role (see `NodeSchedule.get_name`)
+        :return: DataFrame with the columns of a saved node schedule (index, type, start_time and duration), or None
+        """
+        stored = self.get_array(name)
+        if stored is None or isinstance(stored, pd.DataFrame):
+            return stored
+        return pd.DataFrame(data={"index": list(range(stored.shape[1])),
+                                  "type": [self.BLOCK_TYPES[code] for code in stored[0].tolist()],
+                                  "start_time": stored[1].tolist(),
+                                  "duration": stored[2].tolist()})
+
+    def get_node_schedule_names(self, dataset_id, n_sessions, schedule_type):
+        """
+        :return: Sorted names (without the role, i.e. ending in `_role`) of the node schedules in the catalog
+        """
+        names = set()
+        for name in self.index:
+            match = self.NODE_SCHEDULE_PATTERN.match(name)
+            if match is not None and (int(match.group(1)), int(match.group(2)), match.group(3)) == \
+                    (n_sessions, dataset_id, schedule_type):
+                names.add(name[:-len(match.group(6)) - 1])
+        return sorted(names)
+
+    def import_folder(self, folder_path):
+        """
+        Adds all network and node schedule CSV files in a folder to the catalog.
+
+        :return: Number of imported schedules
+        """
+        items = []
+        for f in sorted(os.listdir(folder_path)):
+            name, extension = os.path.splitext(f)
+            if extension != ".csv":
+                continue
+            df = pd.read_csv(f"{folder_path}/{f}")
+            if self.NETWORK_SCHEDULE_PATTERN.match(name) is not None:
+                applications = [NetworkSchedule.get_application_code(a) for a in df["session"]]
+                items.append((name, np.array([df["start_time"], applications], dtype=np.int64)))
+            elif self.NODE_SCHEDULE_PATTERN.match(name) is not None:
+                items.append((name, self.node_schedule_array(df["type"], df["start_time"], df["duration"])))
+        self.add(items)
+        return len(items)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser()
+    parser.add_argument('--import', dest="folders", nargs="+", required=True, type=str,
+                        help="Folders with network and node schedule CSV files to add to the catalog.")
+    parser.add_argument('--log', dest='loglevel', type=str, required=False, default="INFO",
+                        help="Set log level: DEBUG, INFO, WARNING, ERROR, or CRITICAL")
+    args, unknown = parser.parse_known_args()
+
+    setup_logging(args.loglevel)
+
+    catalog = ScheduleCatalog()
+    for folder in args.folders:
+        logger.info(f"Imported {catalog.import_folder(folder)} schedules from {folder} into {catalog.path}.")
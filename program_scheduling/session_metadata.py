@@ -1,3 +1,5 @@
+import os
+
 import yaml
 
 
@@ -12,31 +14,47 @@ class BlockMetadata:
         self.type = config.get("type")
         self.duration = config.get("duration")
         self.CS = config.get("CS")
+        # names of the blocks this block depends on, None means that it only depends on the block before it
+        self.predecessors = config.get("predecessors")
+        # number of units of its resource (CPU cores or QPUs) the block uses
+        self.demand = config.get("demand", 1)
+        if not isinstance(self.demand, int) or self.demand < 1:
+            raise ValueError(f"Demand of block {name} should be a positive integer")
+        # number of qubits the session holds after the block, None means that it is derived from the block type
+        self.qubits = config.get("qubits")
+        if self.qubits is not None and (not isinstance(self.qubits, int) or self.qubits < 0):
+            raise ValueError(f"Number of qubits held after block {name} should be a non-negative integer")
+        # name of the block of the other node that sends the message this (CC) block receives
+        self.sender = config.get("sender")
+        if self.sender is not None and self.type != "CC":
+            raise ValueError(f"Block {name} receives a message but is not a CC block")
 
     def __str__(self):
-        return f"(type = {self.type}, duration = {self.duration}, " \
-               f"critical section ID = {self.CS})"
+        s = f"(type = {self.type}, duration = {self.duration}, critical section ID = {self.CS}"
+        if self.demand != 1:
+            s += f", demand = {self.demand}"
+        if self.qubits is not None:
+            s += f", qubits = {self.qubits}"
+        if self.predecessors is not None:
+            s += f", predecessors = {self.predecessors}"
+        if self.sender is not None:
+            s += f", sender = {self.sender}"
+        return s + ")"
 
 
 class SessionMetadata:
+    # parsed session configurations by path, together with the modification time and size of the file when parsed
+    _templates = {}
 
     def __init__(self, yaml_file, session_id=None):
-        with open(yaml_file, 'r') as file_handle:
-            config = yaml.load(file_handle, yaml.SafeLoader) or {}
-
-        for key in ["session_id", "app_deadline", "blocks"]:
-            if key not in config.keys():
-                raise ValueError(f"Key {key} is not defined in session configuration")
+        config, blocks = SessionMetadata.load_template(yaml_file)
 
         default_params = {"T1": None, "T2": None, "gate_duration": 1, "gate_fidelity": 1.0, "cc_duration": 1}
         # for key in ["T1", "T2", "gate_duration", "gate_fidelity", "cc_duration"]:
         #     if key not in config.keys():
         #         print(f"Value for {key} is not defined, it will be set to its default value ({default_params[key]})")
 
-        if session_id is not None:
-            config["session_id"] = session_id
-
-        self.session_id = config.get("session_id")
+        self.session_id = session_id if session_id is not None else config.get("session_id")
         self.app_deadline = config.get("app_deadline")
 
         self.T1 = config.get("T1", default_params["T1"])
@@ -45,10 +63,55 @@ class SessionMetadata:
         self.gate_fidelity = config.get("gate_fidelity", default_params["gate_fidelity"])
         self.cc_duration = config.get("cc_duration", default_params["cc_duration"])
 
+        # the block metadata is shared by all sessions created from the same configuration
+        self.blocks = list(blocks)
+
+    @staticmethod
+    def load_template(yaml_file):
+        """
+        Parses a session configuration only once per process, and again only if the file has changed since, so
+        sessions with different IDs are cheap to create.
+
+        :param yaml_file: Path of the session configuration
+        :return: Tuple of the configuration and the list of its block metadata
+        """
+        path = os.path.abspath(yaml_file)
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        if path in SessionMetadata._templates and SessionMetadata._templates[path][0] == version:
+            return SessionMetadata._templates[path][1]
+
+        with open(path, 'r') as file_handle:
+            config = yaml.load(file_handle, yaml.SafeLoader) or {}
+
+        for key in ["session_id", "app_deadline", "blocks"]:
+            if key not in config.keys():
+                raise ValueError(f"Key {key} is not defined in session configuration")
+
         # note that each block is a nested dictionary with an arbitrary block name
-        self.blocks = [BlockMetadata(name=list(block_config.keys())[0],
-                                     config=block_config.get(list(block_config.keys())[0]))
-                       for block_config in config.get("blocks")]
+        blocks = [BlockMetadata(name=list(block_config.keys())[0],
+                                config=block_config.get(list(block_config.keys())[0]))
+                  for block_config in config.get("blocks")]
+        SessionMetadata._check_predecessors(blocks)
+        SessionMetadata._templates[path] = (version, (config, blocks))
+        return config, blocks
+
+    @staticmethod
+    def _check_predecessors(blocks):
+        """
+        Blocks can only depend on blocks before them, so the order of the blocks is a topological order. The blocks of
+        a critical section are executed back-to-back, so each of them depends on the block before it.
+        """
+        names = [b.name for b in blocks]
+        for k, block in enumerate(blocks):
+            if block.predecessors is None:
+                continue
+            for name in block.predecessors:
+                if name not in names[:k]:
+                    raise ValueError(f"Predecessor {name} of block {block.name} is not defined before it")
+            if k > 0 and block.CS is not None and blocks[k - 1].CS == block.CS \
+                    and names[k - 1] not in block.predecessors:
+                raise ValueError(f"Block {block.name} does not depend on block {names[k - 1]} of its critical section")
 
     def __str__(self):
         s = f"Session {self.session_id}:" \
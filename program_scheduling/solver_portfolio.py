@@ -0,0 +1,135 @@
+import logging
+import os
+import re
+import signal
+import subprocess
+import time
+
+from pycsp3.solvers.ace.ace import Ace
+from pycsp3.solvers.choco.choco import Choco
+
+logger = logging.getLogger("program_scheduling")
+
+
+class SolverPortfolio:
+    # name, solver and options (in the format of pycsp3, see docs/optionsSolvers.pdf) of every configuration
+    CONFIGURATIONS = [
+        ("ACE", Ace, {}),
+        ("ACE-wdeg", Ace, {"varh": "dom/wdeg"}),
+        ("ACE-lc", Ace, {"varh": "dom/wdeg", "lc": "2"}),
+        ("ACE-restarts", Ace, {"varh": "dom/ddeg", "valh": "rand", "seed": "1", "restarts_cutoff": "20"}),
+        ("CHOCO", Choco, {}),
+    ]
+    # seconds between two checks whether a solver has finished
+    POLL_INTERVAL = 0.05
+    # seconds a solver may take on top of the time limit before it is killed (e.g. to start the JVM)
+    GRACE_PERIOD = 10
+
+    def __init__(self, configurations=None, time_limit=None):
+        """
+        Races several solver configurations on the same compiled instance, each in its own process. For satisfaction
+        problems the first configuration that decides the instance wins, for optimisation problems the first one that
+        proves optimality. If there is no such configuration within the time limit, the best solution found wins.
+
+        :param configurations: List of (name, solver class, options) tuples, defaults to `CONFIGURATIONS`
+        :param time_limit: Time limit in seconds of every configuration (None means no limit)
+        """
+        self.configurations = configurations if configurations is not None else self.CONFIGURATIONS
+        self.time_limit = time_limit
+
+    def get_command(self, solver_class, options, instance_file):
+        solver = solver_class()
+        options = dict(options)
+        if self.time_limit is not None:
+            options["limit_time"] = str(int(self.time_limit))
+        return f"{solver.command} {instance_file} {solver.parse_general_options('', {}, options)}"
+
+    def solve(self, instance):
+        """
+        :param instance: Compiled instance, as returned by `pycsp3.compile`
+        :return: Tuple of the status (OPTIMUM, SAT, UNSAT or UNKNOWN), the values of the variables, the name of the
+            winning configuration and the file with its output
+        """
+        instance_file, cop = instance
+        decisive = ["OPTIMUM", "UNSAT"] if cop else ["OPTIMUM", "SAT", "UNSAT"]
+        deadline = None if self.time_limit is None else time.time() + self.time_limit + self.GRACE_PERIOD
+
+        running = {}
+        for name, solver_class, options in self.configurations:
+            log_file = f"portfolio_{name}.log"
+            with open(log_file, "w") as output:
+                # every solver gets its own process group, so it can be killed together with its children
+                running[name] = subprocess.Popen(self.get_command(solver_class, options, instance_file).split(),
+                                                 stdout=output, stderr=subprocess.STDOUT, start_new_session=True)
+        logger.debug(f"Started solver configurations {list(running.keys())}.")
+
+        results = {}
+        winner = None
+        try:
+            while len(running) > 0 and winner is None:
+                for name, process in list(running.items()):
+                    if process.poll() is None:
+                        continue
+                    del running[name]
+                    results[name] = self._read_result(f"portfolio_{name}.log")
+                    logger.debug(f"Solver configuration {name} finished with status {results[name][0]}.")
+                    if results[name][0] in decisive:
+                        winner = name
+                        break
+                if deadline is not None and time.time() > deadline:
+                    logger.warning(f"Solver configurations {list(running.keys())} exceeded the time limit.")
+                    break
+                time.sleep(self.POLL_INTERVAL)
+        finally:
+            for process in running.values():
+                self._kill(process)
+
+        if winner is None:
+            # otherwise the best (i.e. lowest bound) solution wins
+            found = [name for name, result in results.items() if result[0] == "SAT"]
+            if len(found) == 0:
+                return "UNKNOWN", None, None, None
+            winner = min(found, key=lambda name: results[name][2] if results[name][2] is not None else float("inf"))
+
+        status, values, _ = results[winner]
+        logger.info(f"Solver configuration {winner} won the race with status {status}.")
+        return status, values, winner, f"portfolio_{winner}.log"
+
+    @staticmethod
+    def _kill(process):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+
+    @staticmethod
+    def _read_result(log_file):
+        """
+        Reads the status, the values of the last solution and the last bound from the output of a solver in the
+        XCSP3 competition format.
+        """
+        with open(log_file, "r") as file_handle:
+            # the solver output contains colour codes
+            output = re.sub(r"\x1b\[[0-9;]*m", "", file_handle.read())
+
+        if "s UNSATISFIABLE" in output:
+            return "UNSAT", None, None
+        left, right = output.rfind("<instantiation"), output.rfind("</instantiation>")
+        if left == -1 or right == -1:
+            return "UNKNOWN", None, None
+
+        instantiation = output[left:right].replace("\nv", "")
+        tokens = re.search(r"<values>(.*?)</values>", instantiation, re.DOTALL).group(1).split()
+        values = []
+        for token in tokens:
+            if "x" in token:  # compact form of repeated values, e.g. 100x3
+                value, repetitions = token.split("x")
+                values += [int(value)] * int(repetitions)
+            else:
+                values.append(int(token))
+
+        bounds = re.findall(r"^o (\d+)", output, re.MULTILINE)
+        bound = int(bounds[-1]) if len(bounds) > 0 else None
+        status = "OPTIMUM" if "s OPTIMUM" in output else "SAT"
+        return status, values, bound
@@ -0,0 +1,118 @@
+import logging
+from bisect import bisect_left, bisect_right
+
+logger = logging.getLogger("program_scheduling")
+
+
+class TimeWindows:
+    MAX_ITERATIONS = 100
+
+    def __init__(self, active_set, durations, d_max, network_schedule=None, horizon=None, bounds=None):
+        """
+        Earliest and latest start times of all blocks of an active set. These are derived from the precedence
+        constraints, the maximum time lags and the network schedule timeslots of the QC blocks, and are only
+        tightened in ways that every feasible node schedule satisfies, so they can be used as variable domains.
+
+        :param active_set: Active set with all blocks that should be scheduled
+        :param durations: (Scaled) durations of the blocks
+        :param d_max: (Scaled) maximum time lags of the blocks
+        :param network_schedule: Optional (scaled) network schedule
+        :param horizon: Upper bound (exclusive) on the start time of every block
+        :param bounds: Optional tuple of the earliest and latest start times the windows are tightened from, e.g. the
+            time windows of the same blocks in a larger active set
+        """
+        self.active_set = active_set
+        self.durations = durations
+        self.d_max = d_max
+        self.network_schedule = network_schedule
+        self.horizon = horizon if horizon is not None else sum(durations)
+        self.bounds = bounds
+
+        self.slots = {}
+        if network_schedule is not None:
+            for i in range(active_set.n_blocks):
+                if active_set.types[i] == "QC":
+                    self.slots[i] = network_schedule.get_slots(active_set.ids[i], active_set.qc_indices[i])
+
+        self.lags = self._calculate_lags()
+        self.est, self.lst = self._calculate_windows()
+
+    def _calculate_lags(self):
+        """
+        Maximum time lags (i, j, lag) as they are imposed by `NodeSchedule.construct_node_schedule`, i.e. the start of
+        block j = i + 1 is at most `lag` after the end of block i.
+        """
+        lags = []
+        for i in range(self.active_set.n_blocks - 1):
+            if self.d_max[i + 1] is None:
+                continue
+            if self.network_schedule is not None and self.active_set.types[i + 1] == "QC" \
+                    and self.d_max[i] is not None:
+                continue
+            lags.append((i, i + 1, self.d_max[i + 1]))
+        return lags
+
+    def _snap_up(self, i, t):
+        if i not in self.slots:
+            return t
+        k = bisect_left(self.slots[i], t)
+        return self.slots[i][k] if k < len(self.slots[i]) else self.horizon
+
+    def _snap_down(self, i, t):
+        if i not in self.slots:
+            return t
+        k = bisect_right(self.slots[i], t)
+        return self.slots[i][k - 1] if k > 0 else -1
+
+    def _calculate_windows(self):
+        n = self.active_set.n_blocks
+        successors = self.active_set.successors
+        d = self.durations
+        earliest, latest = self.bounds if self.bounds is not None else ([0] * n, [self.horizon - 1] * n)
+        est = [self._snap_up(i, max(earliest[i], 0)) for i in range(n)]
+        lst = [self._snap_down(i, min(latest[i], self.horizon - 1)) for i in range(n)]
+
+        for _ in range(self.MAX_ITERATIONS):
+            old = (list(est), list(lst))
+            # forward pass: a block starts after all its predecessors have finished
+            for i in range(n):
+                for j in successors[i]:
+                    est[j] = max(est[j], est[i] + d[i])
+            for (i, j, lag) in self.lags:
+                est[i] = max(est[i], est[j] - d[i] - lag)
+            est = [self._snap_up(i, t) for i, t in enumerate(est)]
+
+            # backward pass: a block finishes before all its successors start
+            for i in reversed(range(n)):
+                for j in successors[i]:
+                    lst[i] = min(lst[i], lst[j] - d[i])
+            for (i, j, lag) in self.lags:
+                lst[j] = min(lst[j], lst[i] + d[i] + lag)
+            lst = [self._snap_down(i, t) for i, t in enumerate(lst)]
+
+            if (est, lst) == old or any(e > l for e, l in zip(est, lst)):
+                break
+        return est, lst
+
+    def is_empty(self):
+        """
+        :return: True if some block has no feasible start time, in which case no node schedule exists
+        """
+        return any(e > l for e, l in zip(self.est, self.lst))
+
+    def domain(self, i):
+        if i in self.slots:
+            return [t for t in self.slots[i] if self.est[i] <= t <= self.lst[i]]
+        return range(self.est[i], self.lst[i] + 1)
+
+    def get_domain_sizes(self):
+        return [len(self.domain(i)) for i in range(self.active_set.n_blocks)]
+
+    def get_reduction_ratio(self):
+        """
+        :return: Fraction of the original domains (`range(horizon)` for every block) that is removed
+        """
+        original = self.active_set.n_blocks * self.horizon
+        if original == 0:
+            return 0
+        return 1 - sum(self.get_domain_sizes()) / original
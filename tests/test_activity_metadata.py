@@ -1,6 +1,10 @@
+import os
+
 import pytest
+import yaml
 
 from activity_metadata import ActivityMetadata, ActiveSet
+from datasets import create_dataset
 from session_metadata import SessionMetadata
 from network_schedule import NetworkSchedule
 from unittest import *
@@ -42,3 +46,87 @@ class TestActiveSet(TestCase):
         self.assertEqual(a.durations, [1, 2, 1] * 2)
         self.assertEqual(a.d_min, [0, 0, 0] * 2)
         self.assertEqual(a.d_max, [16, 16, 0] * 2)
+
+    def test_interchangeable_sessions(self):
+        a = ActiveSet.create_active_set(create_dataset(6, 6), "alice", None)
+        self.assertEqual(a.get_interchangeable_sessions(), [[0, 1], [2, 3], [4, 5]])
+        self.assertEqual(a.get_session_blocks(1), [i for i in range(a.n_blocks) if a.ids[i] == 1])
+
+    def test_array_columns(self):
+        a = ActiveSet.create_active_set(create_dataset(6, 6), "alice", None)
+        self.assertEqual([ActiveSet.TYPES[c] for c in a.type_codes], a.types)
+        self.assertEqual(a.duration_array.tolist(), a.durations)
+        durations, d_max = a.scale_down()
+        self.assertEqual(durations, [d // a.get_gcd() for d in a.durations])
+        self.assertEqual([d is None for d in d_max], [d is None for d in a.d_max])
+        # critical sections are consecutive blocks of one session
+        for (session_id, cs_id), (first, last) in a.get_cs_spans().items():
+            blocks = [i for i in range(a.n_blocks) if a.ids[i] == session_id and a.cs_ids[i] == cs_id]
+            self.assertEqual((first, last), (blocks[0], blocks[-1]))
+
+    def test_large_demand(self):
+        config = {"session_id": 0, "app_deadline": None, "blocks": [
+            {"b0": {"type": "CL", "duration": 4, "CS": None, "demand": 200}},
+            {"b1": {"type": "QL", "duration": 2, "CS": None}},
+        ]}
+        yaml.dump(config, open("temp_alice.yml", "w"))
+        a = ActiveSet.create_active_set({"temp": 2}, "alice", None)
+        os.remove("temp_alice.yml")
+        self.assertEqual(a.resource_reqs, [[200, 0], [0, 1]] * 2)
+
+    def test_qubit_intervals(self):
+        a = ActiveSet.create_active_set(create_dataset(6, 6), "bob", None)
+        # a QC block takes a qubit, which is released by the last QL block before it is taken again (last in, first out)
+        self.assertEqual(a.qubits[:10], [0, 1, 1, 2, 2, 2, 1, 1, 1, 0])
+        self.assertEqual(a.get_qubit_intervals()[:2], [(3, 6, 1), (1, 9, 1)])
+        self.assertEqual(sum(n for (_, _, n) in a.get_qubit_intervals()), a.types.count("QC"))
+
+    def test_joint_blocks(self):
+        alice = ActiveSet.create_active_set(create_dataset(1, 6), "alice", None)
+        bob = ActiveSet.create_active_set(create_dataset(1, 6), "bob", None)
+        # the QC blocks b2 and b5 of alice generate entanglement with b1 and b6 of bob
+        pairs = alice.get_qc_pairs(bob)
+        self.assertEqual(len(pairs), 12)
+        self.assertEqual([(alice.block_names[i], bob.block_names[j]) for (i, j) in pairs[:2]], [("b2", "b1"),
+                                                                                               ("b5", "b6")])
+        # b8 of bob sends the messages received by b6 and b7 of alice
+        messages = alice.get_messages(bob)
+        self.assertEqual([(bob.block_names[i], alice.block_names[j]) for (i, j) in messages[:2]], [("b8", "b6"),
+                                                                                                  ("b8", "b7")])
+        self.assertTrue(all(bob.ids[i] == alice.ids[j] for (i, j) in messages))
+
+    def test_select_sessions(self):
+        active = ActiveSet.create_active_set(create_dataset(3, 4), "alice", None)
+        selected = active.select_sessions([3, 0])
+        self.assertEqual(list(selected.session_ranges.keys()), [0, 3])
+        self.assertEqual(selected.n_blocks, len(active.get_session_blocks(0)) + len(active.get_session_blocks(3)))
+        self.assertEqual(selected.block_names, [active.block_names[i] for s in [0, 3]
+                                                for i in active.get_session_blocks(s)])
+        # successors are reindexed and the time unit is kept
+        first = selected.session_ranges[3][0]
+        self.assertEqual(selected.successors[first], [j - active.session_ranges[3][0] + first
+                                                      for j in active.successors[active.session_ranges[3][0]]])
+        self.assertEqual(selected.get_gcd(), active.get_gcd())
+
+    def test_select_blocks(self):
+        active = ActiveSet.create_active_set(create_dataset(0, 2), "alice", None)
+        blocks = active.get_session_blocks(1)[2:]
+        selected = active.select_blocks(blocks)
+        self.assertEqual(selected.session_ranges, {1: (0, len(blocks))})
+        # the last block of all sessions stays exempt from critical sections
+        self.assertEqual(selected.last_block, len(blocks) - 1)
+        self.assertIsNone(active.select_blocks(active.get_session_blocks(0)).last_block)
+
+    def test_add_session(self):
+        active = ActiveSet.create_active_set(create_dataset(0, 2), "alice", None)
+        session = ActivityMetadata(SessionMetadata("test_config.yaml", session_id=2))
+        extended = active.add_session(session)
+        self.assertEqual(extended.session_ranges[2], (active.n_blocks, active.n_blocks + session.n_blocks))
+        self.assertEqual(extended.last_block, extended.n_blocks - 1)
+        # the time unit divides both the one of the active set and the durations of the session
+        self.assertEqual(active.get_gcd() % extended.get_gcd(), 0)
+        self.assertTrue(all(d % extended.get_gcd() == 0 for d in session.durations))
+        # the active set itself is left unchanged
+        self.assertEqual(active.n_blocks, extended.n_blocks - session.n_blocks)
+        with pytest.raises(ValueError):
+            active.add_session(ActivityMetadata(SessionMetadata("test_config.yaml", session_id=1)))
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from activity_metadata import ActiveSet
+from anchor_decomposition import AnchorDecomposition
+from datasets import create_dataset
+from unittest import TestCase
+
+
+class TestAnchorDecomposition(TestCase):
+
+    def setUp(self):
+        self.active = ActiveSet.create_active_set(create_dataset(0, 2), "alice", None)
+        self.durations, self.d_max = self.active.scale_down()
+
+    def _time_windows(self, offsets, slack=5):
+        """
+        :return: Time windows in which the blocks of session s follow each other from `offsets[s]` on, with some slack
+        """
+        est = []
+        for session_id, (first, end) in self.active.session_ranges.items():
+            t = offsets[session_id]
+            for i in range(first, end):
+                est.append(t)
+                t += self.durations[i]
+        return SimpleNamespace(est=est, lst=[t + slack for t in est])
+
+    def test_separate_sessions(self):
+        time_windows = self._time_windows({0: 0, 1: 10 * sum(self.durations)})
+        segments = AnchorDecomposition(self.active, self.durations, self.d_max, time_windows).segments
+        self.assertEqual(segments, [self.active.get_session_blocks(0), self.active.get_session_blocks(1)])
+        # the segments have to follow the order of the blocks of all sessions
+        time_windows = self._time_windows({0: 10 * sum(self.durations), 1: 0})
+        self.assertEqual(len(AnchorDecomposition(self.active, self.durations, self.d_max, time_windows).segments), 2)
+        self.assertEqual(len(AnchorDecomposition(self.active, self.durations, self.d_max, time_windows,
+                                                 ordered=True).segments), 1)
+
+    def test_overlapping_sessions(self):
+        time_windows = self._time_windows({0: 0, 1: 1})
+        segments = AnchorDecomposition(self.active, self.durations, self.d_max, time_windows).segments
+        self.assertEqual(segments, [list(range(self.active.n_blocks))])
+
+    def test_fixed_segment(self):
+        # a segment without any choice is not scheduled on its own
+        time_windows = self._time_windows({0: 0, 1: 10 * sum(self.durations)}, slack=0)
+        segments = AnchorDecomposition(self.active, self.durations, self.d_max, time_windows).segments
+        self.assertEqual(len(segments), 1)
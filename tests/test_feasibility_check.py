@@ -0,0 +1,51 @@
+import copy
+
+from activity_metadata import ActiveSet
+from datasets import create_dataset
+from feasibility_check import FeasibilityCheck
+from network_schedule import NetworkSchedule
+from time_windows import TimeWindows
+from unittest import TestCase
+
+
+class TestFeasibilityCheck(TestCase):
+
+    def setUp(self):
+        self.dataset = create_dataset(6, 6)
+        self.ns = NetworkSchedule(dataset_id=6, n_sessions=6, save=False, seed=0)
+        self.ns.rewrite_sessions(self.dataset)
+
+    def get_reason(self, slots):
+        ns = NetworkSchedule(dataset_id=6, n_sessions=6, sessions=[s for (s, _) in slots],
+                             start_times=[t for (_, t) in slots])
+        active = ActiveSet.create_active_set(self.dataset, "alice", ns)
+        durations, d_max = active.scale_down()
+        scaled_ns = NetworkSchedule.scale_down(copy.deepcopy(ns), active.get_gcd())
+        # same margin as used by the node schedule
+        horizon = scaled_ns.length + int(35_000_000 / active.get_gcd())
+        windows = TimeWindows(active, durations, d_max, network_schedule=scaled_ns, horizon=horizon)
+        return FeasibilityCheck(active, durations, network_schedule=scaled_ns, time_windows=windows).get_reason()
+
+    def test_feasible_network_schedule(self):
+        self.assertIsNone(self.get_reason(list(zip(self.ns.sessions, self.ns.start_times))))
+
+    def test_missing_timeslot(self):
+        slots = [(s, t) for (s, t) in zip(self.ns.sessions, self.ns.start_times) if s != (0, 1)]
+        self.assertIn("there is no timeslot", self.get_reason(slots))
+
+    def test_setup_time(self):
+        # all timeslots of the first QC block of session 0 are moved to the very start of the network schedule
+        slots = [(s, t) for (s, t) in zip(self.ns.sessions, self.ns.start_times) if s != (0, 0)] + [((0, 0), 0)]
+        self.assertIn("the setup of session 0", self.get_reason(slots))
+
+    def test_demand_exceeds_capacity(self):
+        active = ActiveSet.create_active_set(self.dataset, "alice", None)
+        durations, _ = active.scale_down()
+        self.assertIsNone(FeasibilityCheck(active, durations).get_reason())
+        self.assertIn("but its capacity is 0", FeasibilityCheck(active, durations, capacities=(1, 0)).get_reason())
+
+    def test_qubits_exceed_memory(self):
+        active = ActiveSet.create_active_set(self.dataset, "bob", None)
+        durations, _ = active.scale_down()
+        self.assertIsNone(FeasibilityCheck(active, durations, qubits=2).get_reason())
+        self.assertIn("but the node only has 1", FeasibilityCheck(active, durations, qubits=1).get_reason())
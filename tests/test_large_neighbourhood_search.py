@@ -0,0 +1,43 @@
+import numpy as np
+
+from activity_metadata import ActiveSet
+from datasets import create_dataset
+from large_neighbourhood_search import LargeNeighbourhoodSearch
+from unittest import TestCase
+
+
+class TestLargeNeighbourhoodSearch(TestCase):
+
+    def setUp(self):
+        self.active = ActiveSet.create_active_set(create_dataset(6, 6), "alice", None)
+        self.durations, _ = self.active.scale_down()
+        # all blocks one after another, so session 5 finishes last
+        self.start_times = np.concatenate(([0], np.cumsum(self.durations)[:-1])).tolist()
+
+    def test_spans(self):
+        search = LargeNeighbourhoodSearch(self.active, self.durations)
+        firsts, lasts = search.get_spans(self.start_times)
+        self.assertEqual(firsts[0], 0)
+        self.assertEqual(lasts[-1], sum(self.durations))
+        self.assertEqual(firsts[1:].tolist(), lasts[:-1].tolist())
+
+    def test_last_session_is_freed(self):
+        search = LargeNeighbourhoodSearch(self.active, self.durations, n_free=3)
+        for iteration in [0, 2, 4]:
+            session_ids = search.get_neighbourhood(iteration, self.start_times)
+            self.assertEqual(len(session_ids), 3)
+            self.assertIn(5, session_ids)
+            self.assertEqual(session_ids, sorted(set(session_ids)))
+
+    def test_sessions_around_a_time(self):
+        search = LargeNeighbourhoodSearch(self.active, self.durations, n_free=2)
+        for iteration in [1, 3, 5]:
+            # the sessions run one after another, so the neighbourhood consists of consecutive sessions
+            first, second = search.get_neighbourhood(iteration, self.start_times)
+            self.assertEqual(second, first + 1)
+
+    def test_number_of_sessions(self):
+        search = LargeNeighbourhoodSearch(self.active, self.durations, n_free=10)
+        self.assertEqual(search.get_neighbourhood(0, self.start_times), [0, 1, 2, 3, 4, 5])
+        with self.assertRaises(ValueError):
+            LargeNeighbourhoodSearch(self.active, self.durations, n_free=0)
@@ -0,0 +1,159 @@
+import os
+
+import pytest
+import yaml
+
+from activity_metadata import ActiveSet
+from datasets import create_dataset
+from list_scheduler import ListScheduler, ResourceProfile
+from network_schedule import NetworkSchedule
+from rolling_horizon import RollingHorizon
+from unittest import TestCase
+
+
+def check_schedule(active, durations, start_times, network_schedule=None):
+    """
+    Checks the constraints of the node schedule model for a list of (scaled) start times.
+    """
+    n = active.n_blocks
+    for i in range(n):
+        for j in active.successors[i]:
+            assert start_times[i] + durations[i] <= start_times[j]
+    for k in range(2):
+        blocks = [i for i in range(n) if active.resource_reqs[i][k] > 0]
+        intervals = sorted((start_times[i], start_times[i] + durations[i]) for i in blocks)
+        for (_, end), (start, _) in zip(intervals, intervals[1:]):
+            assert end <= start
+    for i in range(n):
+        if network_schedule is not None and active.types[i] == "QC":
+            assert start_times[i] in network_schedule.get_session_start_times(active.ids[i])
+            assert start_times[i] in network_schedule.get_qc_block_start_times(active.qc_indices[i])
+
+
+class TestResourceProfile(TestCase):
+
+    def test_blocked_until(self):
+        profile = ResourceProfile(capacity=1)
+        profile.add(2, 5, 1)
+        self.assertIsNone(profile.blocked_until(0, 2, 1))
+        self.assertEqual(profile.blocked_until(1, 3, 1), 5)
+        self.assertIsNone(profile.blocked_until(5, 8, 1))
+
+
+class TestListScheduler(TestCase):
+
+    def test_wrong_priority_rule(self):
+        active = ActiveSet.create_active_set(create_dataset(0, 2), "alice", None)
+        durations, d_max = active.scale_down()
+        with pytest.raises(ValueError):
+            ListScheduler(active, durations, d_max, priority_rule="FOO")
+
+    def test_schedule_without_network_schedule(self):
+        for dataset_id in range(7):
+            active = ActiveSet.create_active_set(create_dataset(dataset_id, 6), "alice", None)
+            durations, d_max = active.scale_down()
+            for rule in ListScheduler.PRIORITY_RULES:
+                start_times = ListScheduler(active, durations, d_max, priority_rule=rule).schedule()
+                self.assertIsNotNone(start_times)
+                check_schedule(active, durations, start_times)
+
+    def test_critical_sections_are_consecutive(self):
+        active = ActiveSet.create_active_set(create_dataset(2, 6), "bob", None)
+        durations, d_max = active.scale_down()
+        start_times = ListScheduler(active, durations, d_max).schedule()
+        for i in range(active.n_blocks - 1):
+            if d_max[i + 1] == 0:
+                self.assertEqual(start_times[i] + durations[i], start_times[i + 1])
+
+    def test_schedule_with_network_schedule(self):
+        dataset = create_dataset(6, 6)
+        ns = NetworkSchedule(dataset_id=6, n_sessions=6, save=False, seed=0)
+        ns.rewrite_sessions(dataset)
+        active = ActiveSet.create_active_set(dataset, "alice", ns)
+        durations, d_max = active.scale_down()
+        scaled_ns = NetworkSchedule.scale_down(ns, active.get_gcd())
+        start_times = ListScheduler(active, durations, d_max, network_schedule=scaled_ns).schedule()
+        self.assertIsNotNone(start_times)
+        check_schedule(active, durations, start_times, scaled_ns)
+
+    def test_schedule_with_parallel_branches(self):
+        # the quantum block does not depend on the first classical block, so both can be executed at the same time
+        config = {"session_id": 0, "app_deadline": None, "blocks": [
+            {"b0": {"type": "CL", "duration": 4, "CS": None}},
+            {"b1": {"type": "QL", "duration": 2, "CS": None, "predecessors": []}},
+            {"b2": {"type": "CC", "duration": 1, "CS": None, "predecessors": ["b0", "b1"]}},
+        ]}
+        yaml.dump(config, open("temp_alice.yml", "w"))
+        active = ActiveSet.create_active_set({"temp": 2}, "alice", None)
+        os.remove("temp_alice.yml")
+        self.assertEqual(active.successors, [[2], [2], [], [5], [5], []])
+
+        durations, d_max = active.scale_down()
+        for rule in ListScheduler.PRIORITY_RULES:
+            start_times = ListScheduler(active, durations, d_max, priority_rule=rule).schedule()
+            check_schedule(active, durations, start_times)
+            # only bound by the classical work, whereas the makespan is 11 if the blocks form a chain
+            self.assertEqual(max(s + d for s, d in zip(start_times, durations)), 10)
+
+    def test_schedule_with_multiple_units(self):
+        active = ActiveSet.create_active_set(create_dataset(0, 6), "alice", None)
+        durations, d_max = active.scale_down()
+        makespans = []
+        for capacities in [(1, 1), (2, 2)]:
+            start_times = ListScheduler(active, durations, d_max, capacities=capacities).schedule()
+            for k, capacity in enumerate(capacities):
+                # the usage of every resource is at most its capacity whenever a block starts
+                for t in start_times:
+                    usage = sum(active.resource_reqs[i][k] for i in range(active.n_blocks)
+                                if start_times[i] <= t < start_times[i] + durations[i])
+                    self.assertLessEqual(usage, capacity)
+            makespans.append(max(s + d for s, d in zip(start_times, durations)))
+        self.assertLess(makespans[1], makespans[0])
+
+    def test_schedule_around_frozen_blocks(self):
+        active = ActiveSet.create_active_set(create_dataset(6, 6), "alice", None)
+        durations, _ = active.scale_down()
+        rolling_horizon = RollingHorizon(active, durations, 3)
+        start_times = []
+        for k, session_ids in enumerate(rolling_horizon.windows):
+            window = active.select_sessions(session_ids)
+            window_durations, window_d_max = window.scale_down()
+            # the second window starts only after the release time
+            rolling_horizon.release = 10 * k
+            window_start_times = ListScheduler(window, window_durations, window_d_max,
+                                               frozen=rolling_horizon).schedule()
+            self.assertGreaterEqual(min(window_start_times), rolling_horizon.release)
+            blocks = [i for s in session_ids for i in active.get_session_blocks(s)]
+            rolling_horizon.freeze(blocks, window_start_times)
+            start_times += window_start_times
+        check_schedule(active, durations, start_times)
+
+    def test_schedule_with_limited_qubits(self):
+        # every session holds a qubit outside of critical sections, from its first until its last block
+        config = {"session_id": 0, "app_deadline": None, "blocks": [
+            {"b0": {"type": "QL", "duration": 2, "CS": None, "qubits": 1}},
+            {"b1": {"type": "CL", "duration": 4, "CS": None}},
+            {"b2": {"type": "QL", "duration": 2, "CS": None, "qubits": 0}},
+        ]}
+        yaml.dump(config, open("temp_alice.yml", "w"))
+        active = ActiveSet.create_active_set({"temp": 3}, "alice", None)
+        os.remove("temp_alice.yml")
+        durations, d_max = active.scale_down()
+
+        def peak_qubits(start_times):
+            events = []
+            for (first, last, n) in active.get_qubit_intervals():
+                events += [(start_times[first], 1, n), (start_times[last] + durations[last], 0, -n)]
+            held = [0]
+            for (_, _, n) in sorted(events):
+                held.append(held[-1] + n)
+            return max(held)
+
+        self.assertEqual(peak_qubits(ListScheduler(active, durations, d_max).schedule()), 3)
+        for qubits in [1, 2]:
+            for rule in ListScheduler.PRIORITY_RULES:
+                start_times = ListScheduler(active, durations, d_max, priority_rule=rule, qubits=qubits).schedule()
+                check_schedule(active, durations, start_times)
+                self.assertEqual(peak_qubits(start_times), qubits)
+        with self.assertRaises(ValueError):
+            ListScheduler(active, durations, d_max, qubits=0)
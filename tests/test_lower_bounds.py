@@ -0,0 +1,40 @@
+import copy
+
+from activity_metadata import ActiveSet
+from datasets import create_dataset
+from list_scheduler import ListScheduler
+from lower_bounds import LowerBounds
+from network_schedule import NetworkSchedule
+from time_windows import TimeWindows
+from unittest import TestCase
+
+
+class TestLowerBounds(TestCase):
+
+    def test_single_session_is_tight(self):
+        active = ActiveSet.create_active_set(create_dataset(0, 1), "alice", None)
+        durations, d_max = active.scale_down()
+        bounds = LowerBounds(active, durations)
+        self.assertEqual(bounds.get_bound(), sum(durations))
+        self.assertEqual(LowerBounds.get_gap(sum(durations), bounds.get_bound()), 0)
+
+    def test_bound_below_list_schedules(self):
+        for dataset_id in range(7):
+            dataset = create_dataset(dataset_id, 6)
+            ns = NetworkSchedule(dataset_id=dataset_id, n_sessions=6, save=False, seed=0)
+            ns.rewrite_sessions(dataset)
+            for network_schedule in [None, ns]:
+                active = ActiveSet.create_active_set(dataset, "alice", network_schedule)
+                durations, d_max = active.scale_down()
+                scaled_ns = None
+                horizon = sum(durations)
+                if network_schedule is not None:
+                    scaled_ns = NetworkSchedule.scale_down(copy.deepcopy(ns), active.get_gcd())
+                    horizon = scaled_ns.length
+                windows = TimeWindows(active, durations, d_max, network_schedule=scaled_ns, horizon=horizon)
+                bounds = LowerBounds(active, durations, network_schedule=scaled_ns, time_windows=windows)
+                start_times = ListScheduler(active, durations, d_max, network_schedule=scaled_ns).schedule()
+                if start_times is None:
+                    continue
+                makespan = max(s + d for s, d in zip(start_times, durations))
+                self.assertLessEqual(bounds.get_bound(), makespan)
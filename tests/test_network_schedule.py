@@ -55,3 +55,69 @@ class TestNetworkSchedule(TestCase):
 
         for i in range(6):
             os.remove(f"../network_schedules/{filename}_id-{i}.csv")
+
+    def test_picked_timeslots_are_feasible(self):
+        for dataset_id in range(7):
+            ns = NetworkSchedule(dataset_id=dataset_id, n_sessions=6, save=False, seed=0)
+            for seed in range(5):
+                ns.id = seed
+                picked = ns._pick_timeslots(ns._get_all_timeslots())
+                if picked is not None:
+                    self.assertTrue(ns.feasible_network_schedule(picked))
+
+    def test_pick_qkd_timeslots(self):
+        # qkd is only assigned every other timeslot, so consecutive qkd timeslots are 2 apart and can both be picked
+        ns = NetworkSchedule(dataset_id=2, n_sessions=6, save=False, seed=0)
+        separations = set()
+        for seed in range(5):
+            ns.id = seed
+            picked = ns._pick_timeslots(ns._get_all_timeslots())
+            self.assertIsNotNone(picked)
+            self.assertTrue(ns.feasible_network_schedule(picked))
+            start_times = sorted(t for (t, _) in picked)
+            separations.update((t_2 - t_1) // ns.QC_LENGTH for t_1, t_2 in zip(start_times, start_times[1:]))
+        self.assertIn(2, separations)
+
+    def test_generation_is_reproducible(self):
+        ns_1 = NetworkSchedule(dataset_id=6, n_sessions=6, save=False, seed=3)
+        ns_2 = NetworkSchedule(dataset_id=6, n_sessions=6, save=False, seed=3)
+        self.assertEqual(ns_1.id, ns_2.id)
+        self.assertEqual(ns_1.start_times, ns_2.start_times)
+        self.assertEqual(ns_1.sessions, ns_2.sessions)
+
+    def test_feasible_timeslot_batch(self):
+        ns = NetworkSchedule(dataset_id=6, n_sessions=6, save=False, seed=0)
+        bqc, pingpong, qkd = [NetworkSchedule.get_application_code(a) for a in ["bqc", "pingpong", "qkd"]]
+        batch = [
+            [bqc, 0, 0, 0, 0, qkd, 0, pingpong, 0, 0, 0, 0, 0, 0],  # feasible
+            [bqc, 0, 0, qkd, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],  # qkd in the critical section of bqc
+            [qkd, pingpong, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],  # no time for the setup of pingpong
+            [qkd, qkd, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],  # adjacent qkd timeslots
+        ]
+        self.assertEqual(list(ns.feasible_timeslot_batch(batch)), [True, False, False, False])
+        for row, feasible in zip(batch, ns.feasible_timeslot_batch(batch)):
+            suggested_ns = [(100000 + k * ns.QC_LENGTH, ns.APPLICATIONS[code - 1]) for k, code in enumerate(row)
+                            if code != 0]
+            self.assertEqual(ns.feasible_network_schedule(suggested_ns), feasible)
+
+    def test_generate_network_schedules(self):
+        serial = list(NetworkSchedule.generate_network_schedules(dataset_id=6, n_sessions=6, length_factor=3, n=3,
+                                                                 first_id=0))
+        parallel = list(NetworkSchedule.generate_network_schedules(dataset_id=6, n_sessions=6, length_factor=3, n=3,
+                                                                   workers=2, first_id=0))
+        self.assertEqual([ns.id for ns in serial], [ns.id for ns in parallel])
+        self.assertEqual([ns.start_times for ns in serial], [ns.start_times for ns in parallel])
+        # every network schedule uses its own range of seeds
+        for j, ns in enumerate(serial):
+            self.assertTrue(j * NetworkSchedule.MAX_ATTEMPTS <= ns.id < (j + 1) * NetworkSchedule.MAX_ATTEMPTS)
+
+    def test_rewrite_sessions(self):
+        dataset = {"../configs/bqc": 2, "../configs/qkd": 1}
+        ns = NetworkSchedule(dataset_id=0, n_sessions=3, sessions=["qkd", "bqc", "bqc", "qkd", "bqc", "bqc", "bqc"],
+                             start_times=list(range(0, 70, 10)))
+        ns.rewrite_sessions(dataset)
+        self.assertEqual(ns.sessions, [(2, 0), (0, 0), (0, 1), (2, 1), (1, 0), (1, 1), (0, 0)])
+        self.assertEqual(ns.get_session_start_times(0), [10, 20, 60])
+        self.assertEqual(ns.get_qc_block_start_times(1), [20, 30, 50])
+        self.assertEqual(ns.get_slots(0, 0), [10, 60])
+        self.assertEqual(NetworkSchedule.scale_down(ns, 20).get_slots(0, 0), [0, 3])
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+import yaml
+
+from node_metadata import NodeMetadata
+from unittest import TestCase
+
+
+class TestNodeMetadata(TestCase):
+
+    def tearDown(self):
+        if os.path.isfile("temp.yml"):
+            os.remove("temp.yml")
+
+    def test_node_metadata_default(self):
+        self.assertEqual(NodeMetadata("alice").capacities, [1, 1])
+        self.assertEqual(NodeMetadata("alice").qubits, 2)
+
+    def test_node_metadata_capacities(self):
+        yaml.dump({"alice": {"CPU": 4}, "bob": {"CPU": 2, "QPU": 2}}, open("temp.yml", "w"))
+        self.assertEqual(NodeMetadata("alice", "temp.yml").capacities, [4, 1])
+        self.assertEqual(NodeMetadata("bob", "temp.yml").capacities, [2, 2])
+        self.assertIsNone(NodeMetadata("bob", "temp.yml").qubits)
+        with pytest.raises(ValueError):
+            NodeMetadata("charlie", "temp.yml")
+
+    def test_node_metadata_wrong_capacity(self):
+        yaml.dump({"alice": {"CPU": 0}}, open("temp.yml", "w"))
+        with pytest.raises(ValueError):
+            NodeMetadata("alice", "temp.yml")
+
+    def test_node_metadata_wrong_qubits(self):
+        yaml.dump({"alice": {"qubits": 0}}, open("temp.yml", "w"))
+        with pytest.raises(ValueError):
+            NodeMetadata("alice", "temp.yml")
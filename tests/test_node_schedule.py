@@ -1,5 +1,15 @@
+import copy
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+
+import pandas as pd
+
 from activity_metadata import ActiveSet
-from node_schedule import NodeSchedule
+from datasets import create_dataset
+from network_schedule import NetworkSchedule
+from node_schedule import NodeSchedule, NodeScheduleCache
 from unittest import *
 
 
@@ -31,3 +41,169 @@ class TestNodeSchedule(TestCase):
         self.assertEqual(self.ns.get_PUF_CPU(), 8/10)
         self.assertEqual(self.ns.get_PUF_QPU(), 6/10)
         self.assertEqual(self.ns.get_PUF_both(), 10/10)
+
+
+class TestTimeLimit(TestCase):
+
+    def test_unproven_schedule_with_incumbents(self):
+        # a schedule for 12 sessions is found within seconds, but its optimality cannot be proven within the limit
+        node_schedule = NodeSchedule(dataset_id=6, n_sessions=12, ns_id=None, role="alice", schedule_type="OPT",
+                                     save_schedule=False, save_metrics=False, use_cache=False, time_limit=15)
+        self.assertEqual(node_schedule.status, "FEASIBLE_NOT_PROVEN")
+        makespans = [makespan for (_, makespan) in node_schedule.incumbents]
+        self.assertGreater(len(makespans), 0)
+        self.assertEqual(makespans, sorted(makespans, reverse=True))
+        self.assertEqual(makespans[-1], node_schedule.get_makespan())
+
+    def test_fallback_respects_network_schedule(self):
+        name = NetworkSchedule.get_name(dataset_id=6, n_sessions=6, ns_id=58, length_factor=3)
+        with zipfile.ZipFile("../network_schedules/network-schedules.zip") as zf:
+            member = [m for m in zf.namelist() if m.endswith(f"{name}.csv")][0]
+            df = pd.read_csv(zf.open(member))
+        network_schedule = NetworkSchedule(dataset_id=6, n_sessions=6, sessions=list(df["session"]),
+                                           start_times=[int(t) for t in df["start_time"]], length_factor=3)
+        network_schedule.rewrite_sessions(create_dataset(6, 6))
+        unscaled = copy.deepcopy(network_schedule)
+        node_schedule = NodeSchedule(dataset_id=6, n_sessions=6, ns_id=None, role="alice", start_times=[],
+                                     save_schedule=False, save_metrics=False, use_cache=False, time_limit=30)
+        node_schedule.active_set = ActiveSet.create_active_set(create_dataset(6, 6), "alice", network_schedule)
+
+        construct_csp_schedule = NodeSchedule._construct_csp_schedule
+
+        def opt_times_out(self, *args):
+            # the OPT solve does not find any node schedule within the time limit (args[5] is the schedule type)
+            return ("UNKNOWN", None, 30) if args[5] == "OPT" else construct_csp_schedule(self, *args)
+
+        with mock.patch.object(NodeSchedule, "_construct_csp_schedule", opt_times_out):
+            status, start_times, _ = node_schedule.construct_node_schedule(network_schedule, "OPT")
+        self.assertEqual(status, "SAT")
+        self.assertEqual(node_schedule.fallback_type, "HEU")
+        active = node_schedule.active_set
+        for i in range(active.n_blocks):
+            if active.types[i] == "QC":
+                self.assertIn(start_times[i], unscaled.get_session_start_times(active.ids[i]))
+
+
+    def test_rolling_horizon_falls_back_as_a_whole(self):
+        construct_csp_schedule = NodeSchedule._construct_csp_schedule
+
+        def opt_times_out(self, *args):
+            return ("UNKNOWN", None, 30) if args[5] == "OPT" else construct_csp_schedule(self, *args)
+
+        with mock.patch.object(NodeSchedule, "_construct_csp_schedule", opt_times_out):
+            node_schedule = NodeSchedule(dataset_id=6, n_sessions=6, ns_id=None, role="alice", schedule_type="OPT",
+                                         save_schedule=False, save_metrics=False, use_cache=False, time_limit=30,
+                                         window_size=3)
+        # the first window does not fall back on its own, so all windows are scheduled by the HEU approach
+        self.assertEqual(node_schedule.status, "SAT")
+        self.assertEqual(node_schedule.fallback_type, "HEU")
+
+class TestDecomposition(TestCase):
+
+    def setUp(self):
+        # session 0 runs on its own before sessions 1 and 2, which overlap, so the blocks form two segments
+        self.active = ActiveSet.create_active_set(create_dataset(0, 3), "alice", None)
+        durations, _ = self.active.scale_down()
+        est = []
+        for session_id, (first, end) in self.active.session_ranges.items():
+            t = 0 if session_id == 0 else 10 * sum(durations)
+            for i in range(first, end):
+                est.append(t)
+                t += durations[i]
+        slack = sum(durations) // 3
+        self.bounds = (est, [t + slack for t in est])
+
+    def _create(self, schedule_type, decompose, **options):
+        return NodeSchedule(dataset_id=0, n_sessions=3, ns_id=None, role="alice", schedule_type=schedule_type,
+                            save_schedule=False, save_metrics=False, active_set=self.active, bounds=self.bounds,
+                            decompose=decompose, **options)
+
+    def test_same_as_single_model(self):
+        for schedule_type in ["OPT", "HEU", "NAIVE"]:
+            single = self._create(schedule_type, decompose=False, use_cache=False)
+            decomposed = self._create(schedule_type, decompose=True, use_cache=False)
+            self.assertEqual(decomposed.n_segments, 2)
+            self.assertEqual(decomposed.status, single.status)
+            self.assertEqual(decomposed.get_makespan(), single.get_makespan())
+
+    def test_fallback_of_whole_active_set(self):
+        optimal = self._create("OPT", decompose=False, use_cache=False).get_makespan()
+        construct_csp_schedule = NodeSchedule._construct_csp_schedule
+
+        def opt_times_out(self, *args):
+            # the OPT solve of the last segment does not find any node schedule within the time limit
+            return ("UNKNOWN", None, 30) if args[5] == "OPT" else construct_csp_schedule(self, *args)
+
+        folder_path = tempfile.mkdtemp()
+        init = NodeScheduleCache.__init__
+        try:
+            with mock.patch.object(NodeScheduleCache, "__init__", lambda cache: init(cache, folder_path=folder_path)):
+                with mock.patch.object(NodeSchedule, "_construct_csp_schedule", opt_times_out):
+                    fallback = self._create("OPT", decompose=True, time_limit=30)
+                self.assertEqual(fallback.status, "SAT")
+                self.assertEqual(fallback.fallback_type, "HEU")
+                # the HEU node schedule is not cached as the result of the OPT approach
+                decomposed = self._create("OPT", decompose=True, time_limit=30)
+                self.assertIsNone(decomposed.fallback_type)
+                self.assertEqual(decomposed.get_makespan(), optimal)
+        finally:
+            shutil.rmtree(folder_path)
+
+
+class TestCriticalSections(TestCase):
+
+    @staticmethod
+    def _per_block_disjunctions(node_schedule, x, scaled_durations, scaled_d_max, scaled_network_schedule):
+        """
+        Previous encoding of the critical sections, with a disjunction for every pair of a span and a block.
+        """
+        active = node_schedule.active_set
+        return [(x[i] < x[start]) | (x[end] < x[i]) for (session_id, cs_id), (start, end) in
+                active.get_cs_spans().items() for i in range(active.n_blocks - 1)
+                if active.ids[i] != session_id and active.cs_ids[i] != cs_id]
+
+    def _solve(self, dataset_id, n_sessions, network_schedule, encoding):
+        node_schedule = NodeSchedule(dataset_id=dataset_id, n_sessions=n_sessions, ns_id=None, role="alice",
+                                     start_times=[], save_schedule=False, save_metrics=False, use_cache=False)
+        node_schedule.active_set = ActiveSet.create_active_set(create_dataset(dataset_id, n_sessions), "alice",
+                                                               network_schedule)
+        n_constraints = []
+
+        def counting(*args):
+            constraints = encoding(*args)
+            n_constraints.append(len(constraints))
+            return constraints
+
+        with mock.patch.object(NodeSchedule, "_critical_section_constraints", counting):
+            status, start_times, _ = node_schedule.construct_node_schedule(network_schedule, "OPT")
+        return node_schedule.active_set, status, start_times, sum(n_constraints)
+
+    def _compare(self, dataset_id, n_sessions, network_schedule):
+        """
+        :return: Number of constraints of the current and the previous encoding
+        """
+        active, status, start_times, n_constraints = self._solve(dataset_id, n_sessions, network_schedule,
+                                                                 NodeSchedule._critical_section_constraints)
+        _, expected_status, expected_start_times, n_disjunctions = self._solve(dataset_id, n_sessions, network_schedule,
+                                                                               self._per_block_disjunctions)
+        self.assertEqual(status, expected_status)
+        self.assertEqual(max(t + d for t, d in zip(start_times, active.durations)),
+                         max(t + d for t, d in zip(expected_start_times, active.durations)))
+        # no block of another session starts within the span of a critical section
+        for (session_id, cs_id), (start, end) in active.get_cs_spans().items():
+            for i in range(active.n_blocks - 1):
+                if active.ids[i] != session_id and active.cs_ids[i] != cs_id:
+                    self.assertFalse(start_times[start] <= start_times[i] <= start_times[end])
+        return n_constraints, n_disjunctions
+
+    def test_fixed_spans(self):
+        # without a network schedule, the blocks of the critical sections are chained, so most spans are covered by a
+        # cumulative constraint
+        n_constraints, n_disjunctions = self._compare(4, 2, None)
+        self.assertLess(n_constraints, n_disjunctions)
+
+    def test_stretchable_spans(self):
+        # a critical section stretches when its QC blocks wait for their timeslots
+        network_schedule = NetworkSchedule(dataset_id=6, n_sessions=3, save=False, seed=0)
+        network_schedule.rewrite_sessions(create_dataset(6, 3))
+        self._compare(6, 3, network_schedule)
@@ -0,0 +1,55 @@
+import pytest
+
+from activity_metadata import ActiveSet
+from datasets import create_dataset
+from node_schedule import NodeSchedule
+from online_scheduler import OnlineScheduler
+from unittest import TestCase
+
+
+class TestOnlineScheduler(TestCase):
+
+    def setUp(self):
+        dataset = create_dataset(6, 6)
+        active = ActiveSet.create_active_set(dataset, "alice", None)
+        self.configs = [config_file + "_alice.yml" for (config_file, number) in dataset.items() for _ in range(number)]
+        # the list scheduler does not need a solver
+        self.committed = NodeSchedule(dataset_id=6, n_sessions=6, ns_id=None, role="alice", schedule_type="LIST",
+                                      save_schedule=False, save_metrics=False, use_cache=False,
+                                      active_set=active.select_sessions([0, 1, 2]))
+
+    def check_schedule(self, online):
+        active, start_times = online.active_set, online.start_times
+        for i in range(active.n_blocks):
+            for j in active.successors[i]:
+                self.assertLessEqual(start_times[i] + active.durations[i], start_times[j])
+        for k, capacity in enumerate(online.capacities):
+            for t in start_times:
+                usage = sum(active.resource_reqs[i][k] for i in range(active.n_blocks)
+                            if start_times[i] <= t < start_times[i] + active.durations[i])
+                self.assertLessEqual(usage, capacity)
+
+    def test_admit(self):
+        online = OnlineScheduler(self.committed)
+        for session_id in [3, 4, 5]:
+            status, start_times, _ = online.admit(self.configs[session_id], session_id=session_id)
+            self.assertEqual(status, "SAT")
+            self.assertEqual(len(start_times), len(online.active_set.get_session_blocks(session_id)))
+        # the committed blocks are not moved
+        self.assertEqual(online.start_times[:self.committed.active_set.n_blocks], self.committed.start_times)
+        self.assertEqual(list(online.active_set.session_ranges.keys()), [0, 1, 2, 3, 4, 5])
+        self.check_schedule(online)
+
+    def test_admit_after_now(self):
+        online = OnlineScheduler(self.committed)
+        now = self.committed.get_makespan() // 2
+        status, start_times, _ = online.admit(self.configs[3], now=now)
+        self.assertEqual(status, "SAT")
+        self.assertGreaterEqual(min(start_times), now)
+        # the session gets the ID after the committed ones
+        self.assertIn(3, online.active_set.session_ranges)
+        self.check_schedule(online)
+
+    def test_wrong_schedule_type(self):
+        with pytest.raises(ValueError):
+            OnlineScheduler(self.committed, schedule_type="NAIVE")
@@ -0,0 +1,55 @@
+import copy
+
+import numpy as np
+
+from activity_metadata import ActiveSet
+from datasets import create_dataset
+from network_schedule import NetworkSchedule
+from rolling_horizon import RollingHorizon
+from unittest import TestCase
+
+
+class TestRollingHorizon(TestCase):
+
+    def test_windows(self):
+        active = ActiveSet.create_active_set(create_dataset(6, 6), "alice", None)
+        durations, _ = active.scale_down()
+        self.assertEqual(RollingHorizon(active, durations, 4).windows, [[0, 1, 2, 3], [4, 5]])
+        with self.assertRaises(ValueError):
+            RollingHorizon(active, durations, 0)
+
+    def test_windows_follow_network_schedule(self):
+        dataset = create_dataset(6, 6)
+        ns = NetworkSchedule(dataset_id=6, n_sessions=6, save=False, seed=0)
+        ns.rewrite_sessions(dataset)
+        active = ActiveSet.create_active_set(dataset, "alice", ns)
+        durations, _ = active.scale_down()
+        scaled_ns = NetworkSchedule.scale_down(copy.deepcopy(ns), active.get_gcd())
+        windows = RollingHorizon(active, durations, 2, network_schedule=scaled_ns).windows
+        first_slots = [min(scaled_ns.get_session_start_times(s)) for window in windows for s in window]
+        self.assertEqual(first_slots, sorted(first_slots))
+        self.assertEqual(sorted(s for window in windows for s in window), list(range(6)))
+
+    def test_frozen_blocks(self):
+        active = ActiveSet.create_active_set(create_dataset(0, 2), "alice", None)
+        durations, _ = active.scale_down()
+        rolling_horizon = RollingHorizon(active, durations, 1)
+        blocks = active.get_session_blocks(0)
+        # the blocks of the first session one after another
+        start_times = np.concatenate(([0], np.cumsum([durations[i] for i in blocks])[:-1])).tolist()
+        rolling_horizon.freeze(blocks, start_times)
+        self.assertEqual(rolling_horizon.get_end(), sum(durations[i] for i in blocks))
+
+        # the blocks do not overlap, so every resource is used by one unit at a time
+        for k in range(2):
+            segments = rolling_horizon.get_resource_segments(k)
+            self.assertTrue(all(units == 1 for (_, _, units) in segments))
+            self.assertEqual(sum(length for (_, length, _) in segments),
+                             sum(durations[i] for i in blocks if active.resource_reqs[i][k] > 0))
+
+        spans = rolling_horizon.get_cs_spans(None)
+        self.assertEqual(len(spans[0]), len({cs for (s, cs) in active.get_cs_spans() if s == 0}))
+        outside = RollingHorizon.outside(np.arange(rolling_horizon.get_end()), spans)
+        self.assertFalse(outside[spans[0]].any())
+        self.assertEqual(len(rolling_horizon.get_qubit_intervals()),
+                         len([i for i in active.get_qubit_intervals() if i[0] in blocks]))
@@ -0,0 +1,37 @@
+import shutil
+import tempfile
+
+from activity_metadata import ActiveSet
+from datasets import create_dataset
+from schedule_cache import NodeScheduleCache
+from unittest import TestCase
+
+
+class TestNodeScheduleCache(TestCase):
+
+    def setUp(self):
+        self.folder_path = tempfile.mkdtemp()
+        self.cache = NodeScheduleCache(folder_path=self.folder_path)
+        self.active = ActiveSet.create_active_set(create_dataset(0, 2), "alice", None)
+        self.durations, self.d_max = self.active.scale_down()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder_path)
+
+    def test_key_depends_on_inputs(self):
+        key = NodeScheduleCache.get_key(self.active, self.durations, self.d_max, None, "HEU", {})
+        self.assertEqual(key, NodeScheduleCache.get_key(self.active, self.durations, self.d_max, None, "HEU", {}))
+        self.assertNotEqual(key, NodeScheduleCache.get_key(self.active, self.durations, self.d_max, None, "OPT", {}))
+        self.assertNotEqual(key, NodeScheduleCache.get_key(self.active, self.durations, self.d_max, None, "HEU",
+                                                           {"limit_time": 10}))
+
+    def test_save_and_load(self):
+        key = NodeScheduleCache.get_key(self.active, self.durations, self.d_max, None, "HEU", {})
+        self.assertIsNone(self.cache.load(key))
+        self.cache.save(key, "SAT", [0, 1, 2], 1.5)
+        self.assertEqual(self.cache.load(key), ("SAT", [0, 1, 2], 1.5))
+
+    def test_unknown_is_not_cached(self):
+        key = NodeScheduleCache.get_key(self.active, self.durations, self.d_max, None, "OPT", {})
+        self.cache.save(key, "UNKNOWN", None, 100.0)
+        self.assertIsNone(self.cache.load(key))
@@ -0,0 +1,55 @@
+import shutil
+import tempfile
+import zipfile
+
+from network_schedule import NetworkSchedule
+from node_schedule import NodeSchedule
+from schedule_catalog import ScheduleCatalog
+from unittest import TestCase
+
+
+class TestScheduleCatalog(TestCase):
+
+    def setUp(self):
+        self.folder_path = tempfile.mkdtemp()
+        self.catalog = ScheduleCatalog(path=f"{self.folder_path}/catalog.zip",
+                                       archives=["../network_schedules/network-schedules.zip"])
+
+    def tearDown(self):
+        shutil.rmtree(self.folder_path)
+
+    def test_read_from_archive(self):
+        ns_ids = self.catalog.get_ns_ids(dataset_id=0, n_sessions=6, length_factor=3)
+        self.assertTrue(8 in ns_ids)
+        ns = self.catalog.get_network_schedule(dataset_id=0, n_sessions=6, length_factor=3, ns_id=8)
+        self.assertTrue(set(ns.sessions) <= set(NetworkSchedule.APPLICATIONS))
+        self.assertEqual(ns.start_times, sorted(ns.start_times))
+
+    def test_add_network_schedules(self):
+        generated = NetworkSchedule(dataset_id=6, n_sessions=6, save=False, seed=100000)
+        self.assertEqual(self.catalog.add_network_schedules([generated]), [generated.id])
+        # the catalog is found again by a new instance
+        catalog = ScheduleCatalog(path=self.catalog.path, archives=[])
+        self.assertEqual(catalog.get_ns_ids(dataset_id=6, n_sessions=6, length_factor=3), [generated.id])
+        self.assertEqual(catalog.get_next_ns_id(dataset_id=6, n_sessions=6, length_factor=3), generated.id + 1)
+        self.assertEqual(catalog.get_next_ns_id(dataset_id=0, n_sessions=6, length_factor=3), 0)
+        ns = catalog.get_network_schedule(dataset_id=6, n_sessions=6, length_factor=3, ns_id=generated.id)
+        self.assertEqual(ns.sessions, generated.sessions)
+        self.assertEqual(ns.start_times, generated.start_times)
+
+    def test_add_node_schedules(self):
+        name = NodeSchedule.get_name(dataset_id=0, n_sessions=6, schedule_type="HEU", length_factor=3, ns_id=1,
+                                     role="alice")
+        self.catalog.add([(name, ScheduleCatalog.node_schedule_array(["CL", "QC"], [0, 10], [10, 5]))])
+        # a replaced node schedule is stored only once, and adding it again does not change the archive
+        for _ in range(3):
+            self.catalog.add([(name, ScheduleCatalog.node_schedule_array(["CL", "QC"], [0, 20], [10, 5]))])
+        with zipfile.ZipFile(self.catalog.path) as zf:
+            self.assertEqual(zf.namelist(), [f"{name}.npy"])
+        self.assertEqual(list(self.catalog.get_node_schedule(name)["start_time"]), [0, 20])
+        df = ScheduleCatalog(path=self.catalog.path, archives=[]).get_node_schedule(name)
+        self.assertEqual(list(df["type"]), ["CL", "QC"])
+        self.assertEqual(list(df["start_time"]), [0, 20])
+        self.assertEqual(self.catalog.get_node_schedule_names(dataset_id=0, n_sessions=6, schedule_type="HEU"),
+                         [name[:-len("-alice")]])
+        self.assertEqual(self.catalog.get_node_schedule_names(dataset_id=0, n_sessions=6, schedule_type="OPT"), [])
@@ -22,6 +22,12 @@ class TestBlockMetadata(TestCase):
         with pytest.raises(ValueError):
             BlockMetadata(self.config)
 
+    def test_block_metadata_sender(self):
+        self.assertEqual(BlockMetadata("b1", {"type": "CC", "duration": 1, "CS": None, "sender": "b0"}).sender, "b0")
+        # only CC blocks receive messages
+        with pytest.raises(ValueError):
+            BlockMetadata("b1", {**self.config, "sender": "b0"})
+
 
 class TestSessionMetadata(TestCase):
 
@@ -60,3 +66,35 @@ class TestSessionMetadata(TestCase):
         self.assertEqual(sm.cc_duration, 1)
         self.assertIsNone(sm.T1)
         os.remove("temp.yaml")
+
+    def test_session_metadata_template(self):
+        sm_1 = SessionMetadata(self.yaml_file, session_id=1)
+        sm_2 = SessionMetadata(self.yaml_file, session_id=2)
+        self.assertEqual((sm_1.session_id, sm_2.session_id), (1, 2))
+        # the configuration is parsed once
+        self.assertIs(sm_1.blocks[0], sm_2.blocks[0])
+
+        # and again after the file changes
+        yaml.dump(self.config, open("temp.yaml", "w"))
+        SessionMetadata("temp.yaml")
+        self.config["app_deadline"] = 123
+        yaml.dump(self.config, open("temp.yaml", "w"))
+        stat = os.stat("temp.yaml")
+        os.utime("temp.yaml", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(SessionMetadata("temp.yaml").app_deadline, 123)
+        os.remove("temp.yaml")
+
+    def test_session_metadata_predecessors(self):
+        self.config["blocks"][2]["b2"]["predecessors"] = ["b0"]
+        yaml.dump(self.config, open("temp.yaml", "w"))
+        # b2 is in the same critical section as b1, so it has to depend on it
+        with pytest.raises(ValueError):
+            SessionMetadata("temp.yaml")
+
+        self.config["blocks"][1]["b1"]["predecessors"] = ["b2"]
+        self.config["blocks"][2]["b2"]["predecessors"] = ["b0", "b1"]
+        yaml.dump(self.config, open("temp.yaml", "w"))
+        # blocks can only depend on blocks defined before them
+        with pytest.raises(ValueError):
+            SessionMetadata("temp.yaml")
+        os.remove("temp.yaml")
@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+from solver_portfolio import SolverPortfolio
+from unittest import TestCase
+
+
+class TestSolverPortfolio(TestCase):
+
+    def read(self, output):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "solver.log")
+            with open(path, "w") as file_handle:
+                file_handle.write(output)
+            return SolverPortfolio._read_result(path)
+
+    def test_read_optimum(self):
+        output = "o 12  0.5\no 10  0.8\n\x1b[92ms OPTIMUM FOUND\x1b[0m\n" \
+                 "v <instantiation type='optimum' cost='10'> <list> x[] </list> <values> 0 2x3 \nv 5 </values> " \
+                 "</instantiation>\n"
+        self.assertEqual(self.read(output), ("OPTIMUM", [0, 2, 2, 2, 5], 10))
+
+    def test_read_unsat_and_unknown(self):
+        self.assertEqual(self.read("s UNSATISFIABLE\n")[0], "UNSAT")
+        self.assertEqual(self.read("s UNKNOWN\n")[0], "UNKNOWN")
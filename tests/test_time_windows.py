@@ -0,0 +1,54 @@
+import copy
+
+from activity_metadata import ActiveSet
+from datasets import create_dataset
+from list_scheduler import ListScheduler
+from network_schedule import NetworkSchedule
+from time_windows import TimeWindows
+from unittest import TestCase
+
+
+class TestTimeWindows(TestCase):
+
+    def test_windows_without_network_schedule(self):
+        active = ActiveSet.create_active_set(create_dataset(0, 2), "alice", None)
+        durations, d_max = active.scale_down()
+        windows = TimeWindows(active, durations, d_max, horizon=sum(durations))
+        self.assertFalse(windows.is_empty())
+        # the first block cannot start later than the total duration of its session allows
+        self.assertEqual(windows.lst[0], sum(durations) - 1 - sum(durations[:7]))
+        self.assertEqual(windows.est[7], sum(durations[:7]))
+
+    def test_windows_contain_feasible_schedules(self):
+        for dataset_id in range(7):
+            dataset = create_dataset(dataset_id, 6)
+            ns = NetworkSchedule(dataset_id=dataset_id, n_sessions=6, save=False, seed=0)
+            ns.rewrite_sessions(dataset)
+            active = ActiveSet.create_active_set(dataset, "alice", ns)
+            durations, d_max = active.scale_down()
+            scaled_ns = NetworkSchedule.scale_down(copy.deepcopy(ns), active.get_gcd())
+            windows = TimeWindows(active, durations, d_max, network_schedule=scaled_ns, horizon=scaled_ns.length)
+            self.assertTrue(windows.get_reduction_ratio() > 0)
+            start_times = ListScheduler(active, durations, d_max, network_schedule=scaled_ns,
+                                        horizon=scaled_ns.length, priority_rule="CSF").schedule()
+            if start_times is None:
+                continue
+            for i, t in enumerate(start_times):
+                self.assertIn(t, windows.domain(i))
+
+    def test_empty_window(self):
+        active = ActiveSet.create_active_set(create_dataset(0, 2), "alice", None)
+        durations, d_max = active.scale_down()
+        windows = TimeWindows(active, durations, d_max, horizon=sum(durations[:7]))
+        self.assertTrue(windows.is_empty())
+
+    def test_bounded_windows(self):
+        active = ActiveSet.create_active_set(create_dataset(0, 2), "alice", None)
+        durations, d_max = active.scale_down()
+        windows = TimeWindows(active, durations, d_max, horizon=sum(durations))
+        earliest = [10] + windows.est[1:]
+        bounded = TimeWindows(active, durations, d_max, horizon=sum(durations), bounds=(earliest, windows.lst))
+        # the bound on the first block is passed on to its successors
+        self.assertEqual(bounded.est[0], 10)
+        self.assertEqual(bounded.est[1], max(windows.est[1], 10 + durations[0]))
+        self.assertTrue(all(b >= e for b, e in zip(bounded.est, windows.est)))